@@ -0,0 +1,64 @@
+import time
+import traceback
+from threading import Thread, Event
+
+from timing_wheel import TimingWheel
+
+## Action Clock ##
+# One timing wheel holds the turn clock of every table in the process. A table
+# has at most one running clock, starting a new turn replaces it. Clients are
+# only told when the turn started and when it runs out (epoch milliseconds) and
+# count down on their own, the server does nothing until a deadline passes and
+# then calls on_timeout(table_id, position) from the clock thread.
+class ActionClock:
+    def __init__(self, on_timeout, resolution=0.1):
+        self.on_timeout = on_timeout
+        self.resolution = resolution
+        self.wheel = TimingWheel(resolution, now=time.time())
+        self.timers = {}
+        # table id -> (position, start, deadline) of the running turn
+        self.turns = {}
+        self.stopped = Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    # Starts the clock of the player to act, returns (start, deadline) in ms
+    def start_turn(self, table_id, position, seconds):
+        self.cancel(table_id)
+        start = time.time()
+        deadline = start + seconds
+        self.timers[table_id] = self.wheel.schedule(deadline, (table_id, position))
+        self.turns[table_id] = (position, int(start * 1000), int(deadline * 1000))
+        return self.turns[table_id][1:]
+
+    # (position, start, deadline) of the table's running turn, None if there is none
+    def current_turn(self, table_id):
+        return self.turns.get(table_id)
+
+    def cancel(self, table_id):
+        timer = self.timers.pop(table_id, None)
+        self.turns.pop(table_id, None)
+        if timer is not None:
+            self.wheel.cancel(timer)
+
+    def expire(self, now):
+        for timer in self.wheel.advance(now):
+            table_id, position = timer.key
+            if self.timers.get(table_id) is timer:
+                del self.timers[table_id]
+                del self.turns[table_id]
+                # one failing table must not stop the clock of the others
+                try:
+                    self.on_timeout(table_id, position)
+                except Exception:
+                    traceback.print_exc()
+
+    def run(self):
+        while not self.stopped.wait(self.resolution):
+            self.expire(time.time())
+
+    def stop(self):
+        self.stopped.set()
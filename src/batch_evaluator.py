@@ -0,0 +1,46 @@
+import numpy as np
+
+import evaluator
+
+## Batch Hand Evaluator ##
+# Vectorized version of evaluator.evaluate. Takes an (N, 7) array of integer
+# encoded cards and returns an (N,) array of strengths, identical to calling
+# evaluator.evaluate on every row. Works for any number of cards from 5 to 7.
+
+RANK_KEY = np.array(evaluator.RANK_KEY, dtype=np.int64)
+SUIT_KEY = np.array(evaluator.SUIT_KEY, dtype=np.int64)
+RANK_BIT = np.array(evaluator.RANK_BIT, dtype=np.int64)
+FLUSH_SUIT = np.array(evaluator.FLUSH_SUIT, dtype=np.int8)
+FLUSH_TABLE = np.array(evaluator.FLUSH_TABLE, dtype=np.int64)
+
+# the rank table is sparse (keys go up to ~1e9) so it is stored as sorted keys
+# with matching strengths and looked up with a binary search gather
+_keys = sorted(evaluator.RANK_TABLE)
+RANK_KEYS = np.array(_keys, dtype=np.int64)
+RANK_STRENGTHS = np.array([evaluator.RANK_TABLE[key] for key in _keys], dtype=np.int64)
+del _keys
+
+def evaluate_batch(cards):
+    cards = np.asarray(cards)
+    if cards.ndim != 2 or not 5 <= cards.shape[1] <= 7:
+        raise ValueError("Expected an (N, 5-7) array of cards")
+    cards = cards.astype(np.intp, copy=False)
+
+    rank_keys = RANK_KEY[cards].sum(axis=1)
+    strengths = RANK_STRENGTHS[np.searchsorted(RANK_KEYS, rank_keys)]
+
+    flush_suit = FLUSH_SUIT[SUIT_KEY[cards].sum(axis=1)]
+    flushes = np.nonzero(flush_suit >= 0)[0]
+    if len(flushes):
+        flush_cards = cards[flushes]
+        in_suit = (flush_cards & 3) == flush_suit[flushes, None]
+        # rank bits within a suit never repeat so the sum is the same as a bitwise or
+        masks = np.where(in_suit, RANK_BIT[flush_cards], 0).sum(axis=1)
+        strengths[flushes] = FLUSH_TABLE[masks]
+    return strengths
+
+def evaluate_hands(hole_cards, board):
+    # hole_cards: (N, 2) array, board: (5,) array shared by every hand
+    hole_cards = np.asarray(hole_cards)
+    board = np.broadcast_to(np.asarray(board), (len(hole_cards), len(board)))
+    return evaluate_batch(np.concatenate([hole_cards, board], axis=1))
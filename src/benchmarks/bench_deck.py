@@ -0,0 +1,22 @@
+import random
+import time
+
+from deck import Deck
+from benchmarks.fixtures import SEED
+
+# One hand's worth of dealing: 9 players x 2 cards plus burns and the board
+def bench_deal(count=100000):
+    rng = random.Random(SEED)
+    start = time.perf_counter()
+    for _ in range(count):
+        deck = Deck(rng=rng)
+        deck.deal_cards(9, 2)
+        for street in (3, 1, 1):
+            deck.burn()
+            for _ in range(street):
+                deck.deal()
+    elapsed = time.perf_counter() - start
+    return {"decks": count, "decks_per_sec": count / elapsed, "cards_per_sec": count * 26 / elapsed}
+
+def run():
+    return {"deal": bench_deal()}
@@ -0,0 +1,54 @@
+import random
+import time
+
+from engine import Engine, CHECK, BET, FOLD
+from table_state import TableState
+from benchmarks.fixtures import SEED
+
+# Plays full hands through the headless engine with a simple random policy
+def play(engine, rng, actions):
+    state = engine.state
+    hands = 0
+    played = 0
+    for _ in range(actions):
+        played += 1
+        seat = state.seat(state.current_player)
+        roll = rng.random()
+        if roll < 0.2:
+            option, bet = FOLD, seat.bet_size
+        elif roll < 0.3:
+            option, bet = BET, state.current_bet + state.big_blind
+        else:
+            option, bet = CHECK, state.current_bet
+        bet = min(bet, seat.chips + seat.bet_size)
+        seed = engine.hand_seed
+        engine.next_turn(state.current_player, option, bet)
+        # a new deck seed means a hand finished and the next one was dealt
+        if engine.hand_seed != seed:
+            hands += 1
+        if sum(1 for seat in state.seats if seat.chips > 0) < 2:
+            break
+    return played, hands
+
+def new_engine(players, seed, views):
+    state = TableState("bench", 10, 20)
+    engine = Engine(state, 15, 20, rng=random.Random(seed), views=views)
+    for i in range(players):
+        engine.add_player("p" + str(i), 1000000, None)
+    engine.flush()
+    engine.start_game()
+    return engine
+
+def bench_hands(players=6, actions=100000, views=False):
+    rng = random.Random(SEED)
+    engine = new_engine(players, SEED, views)
+    start = time.perf_counter()
+    actions, hands = play(engine, rng, actions)
+    elapsed = time.perf_counter() - start
+    return {"players": players, "actions": actions, "hands": hands, "actions_per_sec": actions / elapsed, "hands_per_sec": hands / elapsed}
+
+def run():
+    return {
+        "headless": bench_hands(),
+        "with_views": bench_hands(views=True, actions=20000)
+    }
@@ -0,0 +1,47 @@
+import random
+import time
+
+from evaluator import evaluate, evaluate7
+from poker_hand import PokerHand
+from benchmarks.fixtures import TEST_HANDS, SEED
+
+def random_hands(count, seed=SEED):
+    rng = random.Random(seed)
+    return [rng.sample(range(52), 7) for _ in range(count)]
+
+def bench_poker_hand(count=50000):
+    hands = [TEST_HANDS[i % len(TEST_HANDS)] for i in range(count)]
+    start = time.perf_counter()
+    for hand in hands:
+        PokerHand(hand)
+    return {"hands": count, "per_sec": count / (time.perf_counter() - start)}
+
+def bench_evaluate(count=200000):
+    hands = random_hands(count)
+    start = time.perf_counter()
+    for hand in hands:
+        evaluate(hand)
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for hand in hands:
+        evaluate7(*hand)
+    return {"hands": count, "per_sec": count / elapsed, "evaluate7_per_sec": count / (time.perf_counter() - start)}
+
+def bench_batch(count=1000000):
+    try:
+        import numpy as np
+        from batch_evaluator import evaluate_batch
+    except ImportError:
+        return None
+    rng = np.random.default_rng(SEED)
+    hands = np.argsort(rng.random((count, 52)), axis=1)[:, :7]
+    start = time.perf_counter()
+    evaluate_batch(hands)
+    return {"hands": count, "per_sec": count / (time.perf_counter() - start)}
+
+def run():
+    return {
+        "poker_hand": bench_poker_hand(),
+        "evaluate": bench_evaluate(),
+        "batch_evaluate": bench_batch()
+    }
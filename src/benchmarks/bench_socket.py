@@ -0,0 +1,57 @@
+import importlib.util
+import json
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.fixtures import SEED
+
+# p50/p99 latency from a next_turn event to the start_turn emit that follows it,
+# through the real socket handlers with mongomock standing in for Mongo
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def bench_next_turn(players=6, actions=2000):
+    import mongomock
+    from dealer import create_app
+    history_dir = tempfile.mkdtemp()
+    (app, socketio) = create_app("http://localhost:5000", db=mongomock.MongoClient().pokerdb, history_dir=history_dir)
+    clients = [socketio.test_client(app) for _ in range(players)]
+    for i, client in enumerate(clients):
+        client.emit("set_player_name", json.dumps({"name": "p" + str(i), "table": "bench"}))
+    clients[0].emit("start_game")
+
+    rng = random.Random(SEED)
+    current = None
+    current_bet = 0
+    latencies = []
+    for _ in range(actions):
+        for i, client in enumerate(clients):
+            for message in client.get_received():
+                if message["name"] == "start_turn":
+                    current = i
+                elif message["name"] in ("game_state", "game_state_delta"):
+                    current_bet = message["args"][0].get("table", {}).get("currentBet", current_bet)
+        if current is None:
+            break
+        option = 4 if rng.random() < 0.15 else 1
+        start = time.perf_counter()
+        clients[current].emit("next_turn", json.dumps({"option": option, "position": current, "betSize": current_bet}))
+        # the test client delivers emits synchronously, so the start_turn is
+        # already queued for its receiver when emit returns
+        latencies.append(time.perf_counter() - start)
+        current = None
+    shutil.rmtree(history_dir, ignore_errors=True)
+    return {
+        "samples": len(latencies),
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p99_ms": 1000 * percentile(latencies, 99),
+        "mean_ms": 1000 * sum(latencies) / len(latencies)
+    }
+
+def run():
+    if importlib.util.find_spec("mongomock") is None:
+        return None
+    return {"next_turn": bench_next_turn()}
@@ -0,0 +1,65 @@
+## Benchmark Fixtures ##
+# Fixed inputs so every run of the suite measures the same work.
+# TEST_HANDS covers every hand category, it used to live inside appraise_hands.
+
+TEST_HANDS = [
+    # high card
+    [{"value": 2, "suit": 0}, {"value": 4, "suit": 1}, {"value": 5, "suit": 2}, {"value": 8, "suit": 3}, {"value": 9, "suit": 1}, {"value": 12, "suit": 0}, {"value": 13, "suit": 0}],
+    # pair
+    [{"value": 2, "suit": 0}, {"value": 3, "suit": 1}, {"value": 4, "suit": 2}, {"value": 4, "suit": 3}, {"value": 5, "suit": 0}, {"value": 8, "suit": 1}, {"value": 9, "suit": 2}],
+    # two pair
+    [{"value": 2, "suit": 0}, {"value": 3, "suit": 1}, {"value": 3, "suit": 2}, {"value": 4, "suit": 2}, {"value": 5, "suit": 3}, {"value": 5, "suit": 0}, {"value": 8, "suit": 2}],
+    [{"value": 2, "suit": 0}, {"value": 2, "suit": 1}, {"value": 7, "suit": 2}, {"value": 7, "suit": 2}, {"value": 12, "suit": 3}, {"value": 12, "suit": 0}, {"value": 14, "suit": 2}],
+    [{"value": 2, "suit": 0}, {"value": 7, "suit": 1}, {"value": 7, "suit": 2}, {"value": 12, "suit": 2}, {"value": 12, "suit": 3}, {"value": 14, "suit": 0}, {"value": 14, "suit": 2}],
+    # trips
+    [{"value": 2, "suit": 0}, {"value": 3, "suit": 1}, {"value": 4, "suit": 2}, {"value": 4, "suit": 0}, {"value": 4, "suit": 3}, {"value": 5, "suit": 0}, {"value": 9, "suit": 2}],
+    # straight
+    [{"value": 2, "suit": 0}, {"value": 3, "suit": 1}, {"value": 4, "suit": 2}, {"value": 5, "suit": 3}, {"value": 6, "suit": 1}, {"value": 10, "suit": 0}, {"value": 12, "suit": 2}],
+    [{"value": 2, "suit": 0}, {"value": 3, "suit": 1}, {"value": 4, "suit": 2}, {"value": 5, "suit": 3}, {"value": 6, "suit": 1}, {"value": 7, "suit": 0}, {"value": 8, "suit": 2}],
+    [{"value": 2, "suit": 0}, {"value": 3, "suit": 1}, {"value": 4, "suit": 2}, {"value": 5, "suit": 3}, {"value": 10, "suit": 1}, {"value": 12, "suit": 0}, {"value": 14, "suit": 2}],
+    [{"value": 2, "suit": 0}, {"value": 3, "suit": 1}, {"value": 4, "suit": 2}, {"value": 5, "suit": 3}, {"value": 6, "suit": 1}, {"value": 7, "suit": 0}, {"value": 14, "suit": 2}],
+    [{"value": 2, "suit": 0}, {"value": 3, "suit": 1}, {"value": 3, "suit": 2}, {"value": 4, "suit": 3}, {"value": 5, "suit": 1}, {"value": 5, "suit": 0}, {"value": 6, "suit": 2}],
+    # flush
+    [{"value": 2, "suit": 0}, {"value": 4, "suit": 0}, {"value": 5, "suit": 2}, {"value": 8, "suit": 0}, {"value": 9, "suit": 0}, {"value": 12, "suit": 0}, {"value": 13, "suit": 2}],
+    [{"value": 2, "suit": 0}, {"value": 4, "suit": 0}, {"value": 5, "suit": 0}, {"value": 8, "suit": 0}, {"value": 9, "suit": 0}, {"value": 12, "suit": 0}, {"value": 13, "suit": 0}],
+    # full house
+    [{"value": 2, "suit": 0}, {"value": 2, "suit": 1}, {"value": 5, "suit": 2}, {"value": 5, "suit": 3}, {"value": 5, "suit": 1}, {"value": 12, "suit": 0}, {"value": 14, "suit": 2}],
+    [{"value": 2, "suit": 0}, {"value": 2, "suit": 1}, {"value": 5, "suit": 2}, {"value": 5, "suit": 3}, {"value": 5, "suit": 1}, {"value": 12, "suit": 0}, {"value": 12, "suit": 2}],
+    [{"value": 2, "suit": 0}, {"value": 2, "suit": 1}, {"value": 2, "suit": 2}, {"value": 5, "suit": 3}, {"value": 5, "suit": 1}, {"value": 12, "suit": 0}, {"value": 12, "suit": 2}],
+    [{"value": 2, "suit": 0}, {"value": 2, "suit": 1}, {"value": 2, "suit": 2}, {"value": 6, "suit": 3}, {"value": 7, "suit": 1}, {"value": 12, "suit": 0}, {"value": 12, "suit": 2}],
+    # quads
+    [{"value": 2, "suit": 0}, {"value": 2, "suit": 1}, {"value": 2, "suit": 2}, {"value": 2, "suit": 3}, {"value": 5, "suit": 1}, {"value": 5, "suit": 0}, {"value": 6, "suit": 2}],
+    [{"value": 2, "suit": 0}, {"value": 2, "suit": 1}, {"value": 2, "suit": 2}, {"value": 2, "suit": 3}, {"value": 5, "suit": 1}, {"value": 5, "suit": 0}, {"value": 5, "suit": 2}],
+    [{"value": 3, "suit": 0}, {"value": 3, "suit": 1}, {"value": 3, "suit": 2}, {"value": 5, "suit": 3}, {"value": 5, "suit": 1}, {"value": 5, "suit": 0}, {"value": 5, "suit": 2}],
+    # straight flush
+    [{"value": 2, "suit": 0}, {"value": 3, "suit": 0}, {"value": 4, "suit": 0}, {"value": 5, "suit": 0}, {"value": 6, "suit": 0}, {"value": 10, "suit": 0}, {"value": 12, "suit": 0}],
+    [{"value": 2, "suit": 0}, {"value": 3, "suit": 0}, {"value": 4, "suit": 0}, {"value": 5, "suit": 0}, {"value": 6, "suit": 0}, {"value": 7, "suit": 0}, {"value": 8, "suit": 0}],
+    [{"value": 2, "suit": 0}, {"value": 3, "suit": 0}, {"value": 4, "suit": 0}, {"value": 5, "suit": 0}, {"value": 6, "suit": 0}, {"value": 7, "suit": 2}, {"value": 8, "suit": 3}],
+    [{"value": 2, "suit": 0}, {"value": 3, "suit": 0}, {"value": 4, "suit": 0}, {"value": 5, "suit": 2}, {"value": 6, "suit": 0}, {"value": 7, "suit": 0}, {"value": 8, "suit": 0}],
+    [{"value": 2, "suit": 0}, {"value": 3, "suit": 0}, {"value": 4, "suit": 0}, {"value": 5, "suit": 0}, {"value": 10, "suit": 1}, {"value": 12, "suit": 3}, {"value": 14, "suit": 0}],
+    [{"value": 2, "suit": 0}, {"value": 3, "suit": 0}, {"value": 4, "suit": 0}, {"value": 5, "suit": 0}, {"value": 6, "suit": 0}, {"value": 7, "suit": 0}, {"value": 14, "suit": 0}],
+    [{"value": 2, "suit": 0}, {"value": 3, "suit": 0}, {"value": 3, "suit": 2}, {"value": 4, "suit": 0}, {"value": 5, "suit": 1}, {"value": 5, "suit": 0}, {"value": 6, "suit": 0}],
+    # royal flush
+    [{"value": 2, "suit": 0}, {"value": 2, "suit": 0}, {"value": 10, "suit": 0}, {"value": 11, "suit": 0}, {"value": 12, "suit": 0}, {"value": 13, "suit": 0}, {"value": 14, "suit": 0}],
+    [{"value": 8, "suit": 0}, {"value": 9, "suit": 0}, {"value": 10, "suit": 0}, {"value": 11, "suit": 0}, {"value": 12, "suit": 0}, {"value": 13, "suit": 0}, {"value": 14, "suit": 0}],
+]
+
+TEST_PLAYER_CARDS = [
+    [{"value": 14, "suit": 3}, {"value": 14, "suit": 2}],
+    [{"value": 2, "suit": 1}, {"value": 3, "suit": 1}],
+    [{"value": 4, "suit": 1}, {"value": 8, "suit": 1}],
+    [{"value": 12, "suit": 0}, {"value": 5, "suit": 2}],
+    [{"value": 11, "suit": 1}, {"value": 5, "suit": 1}],
+    [{"value": 13, "suit": 3}, {"value": 11, "suit": 0}],
+    [{"value": 5, "suit": 3}, {"value": 6, "suit": 0}]
+]
+
+TEST_TABLE_CARDS = [
+    {"value": 2, "suit": 0},
+    {"value": 3, "suit": 2},
+    {"value": 4, "suit": 0},
+    {"value": 8, "suit": 2},
+    {"value": 14, "suit": 0}
+]
+
+SEED = 20211
@@ -0,0 +1,254 @@
+import argparse
+import json
+import random
+import threading
+import time
+
+import socketio
+
+## Load Generator ##
+# Drives the real socket protocol of dealer.py with many simulated players.
+# Every table gets its own set of clients which join with set_player_name, the
+# first one sends start_game and from then on each player answers its own
+# start_turn with a next_turn. The server settles the pots itself, declare_winners
+# is only counted.
+#
+# The run is repeated for every table count in --tables so the report shows
+# how throughput, latency and errors change as load grows:
+#   python -m benchmarks.load_test --url http://localhost:5000 --tables 1,10,50 --players 6 --duration 30
+#
+# Latency is measured from sending an event to the first reply it causes:
+#   set_player_name -> player_info
+#   start_game      -> deal_cards
+#   next_turn       -> game_state_delta (or deal_cards when it ended the hand)
+#
+# socketio.Client runs the handlers on its own threads, every count in Stats
+# is taken under its lock.
+
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.samples = []
+
+    def record(self, seconds):
+        ms = seconds * 1000
+        i = 0
+        while i < len(BUCKETS_MS) and ms > BUCKETS_MS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.samples.append(ms)
+
+    def percentile(self, pct):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def report(self):
+        buckets = {"<=" + str(bound): count for bound, count in zip(BUCKETS_MS, self.counts)}
+        buckets[">" + str(BUCKETS_MS[-1])] = self.counts[-1]
+        return {"count": len(self.samples), "p50_ms": self.percentile(50), "p90_ms": self.percentile(90), "p99_ms": self.percentile(99), "buckets": buckets}
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.sent = 0
+        self.received = 0
+        self.errors = {}
+
+    def latency(self, event, seconds):
+        with self.lock:
+            self.histograms.setdefault(event, LatencyHistogram()).record(seconds)
+
+    def message_sent(self):
+        with self.lock:
+            self.sent += 1
+
+    def message_received(self):
+        with self.lock:
+            self.received += 1
+
+    def error(self, kind):
+        with self.lock:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+class SimulatedPlayer:
+    def __init__(self, url, table_id, name, stats, rng, think_time):
+        self.url = url
+        self.table_id = table_id
+        self.name = name
+        self.stats = stats
+        self.rng = rng
+        self.think_time = think_time
+        self.position = None
+        self.current_bet = 0
+        self.chips = 0
+        self.bet_size = 0
+        self.pending = None
+        self.joined = threading.Event()
+        self.running = True
+        self.client = self.new_client()
+
+    def new_client(self):
+        client = socketio.Client(reconnection=False)
+        client.on("player_info", self.on_player_info)
+        client.on("deal_cards", self.on_deal_cards)
+        client.on("start_turn", self.on_start_turn)
+        client.on("game_state", self.on_game_state)
+        client.on("game_state_delta", self.on_game_state)
+        client.on("declare_winners", self.on_declare_winners)
+        client.on("disconnect", self.on_disconnect)
+        return client
+
+    def send(self, event, payload, reply_to):
+        self.pending = (event, reply_to, time.perf_counter())
+        self.stats.message_sent()
+        if payload is None:
+            self.client.emit(event)
+        else:
+            self.client.emit(event, json.dumps(payload))
+
+    # Latency is recorded under the event that was sent
+    def answered(self, reply):
+        self.stats.message_received()
+        pending = self.pending
+        if pending is not None and pending[1] == reply:
+            self.stats.latency(pending[0], time.perf_counter() - pending[2])
+            self.pending = None
+
+    def connect(self):
+        try:
+            self.client.connect(self.url, transports=["websocket"])
+        except socketio.exceptions.ConnectionError:
+            self.stats.error("connect")
+            return False
+        self.send("set_player_name", {"name": self.name, "table": self.table_id}, "player_info")
+        return True
+
+    def on_player_info(self, msg):
+        self.answered("player_info")
+        if msg["accepted"]:
+            self.position = msg["position"]
+            self.joined.set()
+        elif "url" in msg and msg["url"] != self.url:
+            # the table lives on another worker, move there
+            self.stats.error("wrong_worker")
+            threading.Thread(target=self.move, args=(msg["url"],), daemon=True).start()
+        else:
+            self.stats.error("rejected")
+
+    def move(self, url):
+        old = self.client
+        self.client = self.new_client()
+        self.url = url
+        old.disconnect()
+        self.connect()
+
+    def on_deal_cards(self, msg):
+        self.answered("deal_cards")
+
+    def on_game_state(self, msg):
+        self.answered("game_state_delta")
+        table = msg.get("table", {})
+        self.current_bet = table.get("currentBet", self.current_bet)
+        players = msg.get("players", {})
+        if isinstance(players, list):
+            players = {str(i): player for i, player in enumerate(players)}
+        me = players.get(str(self.position))
+        if me is not None:
+            self.chips = me.get("chips", self.chips)
+            self.bet_size = me.get("betSize", self.bet_size)
+
+    def on_declare_winners(self, msg):
+        self.stats.message_received()
+
+    def on_start_turn(self, msg):
+        self.stats.message_received()
+        if not self.running:
+            return
+        if self.think_time:
+            time.sleep(self.rng.random() * self.think_time)
+        roll = self.rng.random()
+        if roll < 0.15:
+            option, bet = 4, self.bet_size
+        elif roll < 0.25:
+            option, bet = 3, self.current_bet + 20
+        else:
+            option, bet = 1, self.current_bet
+        bet = min(bet, self.chips + self.bet_size)
+        self.send("next_turn", {"option": option, "position": self.position, "betSize": bet}, "game_state_delta")
+
+    def on_disconnect(self, *args):
+        if self.running and self.joined.is_set():
+            self.stats.error("disconnect")
+
+    def close(self):
+        self.running = False
+        try:
+            self.client.disconnect()
+        except Exception:
+            pass
+
+def run_step(url, tables, players, duration, think_time, seed, run_id):
+    stats = Stats()
+    rng = random.Random(seed)
+    seated = []
+    for t in range(tables):
+        table_id = "load-{}-{}".format(run_id, t)
+        table_players = [SimulatedPlayer(url, table_id, "{}-p{}".format(table_id, i), stats, random.Random(rng.getrandbits(32)), think_time) for i in range(players)]
+        for player in table_players:
+            player.connect()
+        seated.append(table_players)
+
+    for table_players in seated:
+        for player in table_players:
+            if not player.joined.wait(10):
+                stats.error("join_timeout")
+        host = table_players[0]
+        if host.joined.is_set():
+            host.send("start_game", None, "deal_cards")
+
+    start = time.perf_counter()
+    time.sleep(duration)
+    elapsed = time.perf_counter() - start
+    for table_players in seated:
+        for player in table_players:
+            player.close()
+
+    actions = stats.histograms.get("next_turn", LatencyHistogram()).report()["count"]
+    return {
+        "tables": tables,
+        "clients": tables * players,
+        "actions_per_sec": actions / elapsed,
+        "messages_sent": stats.sent,
+        "messages_received": stats.received,
+        "error_rate": sum(stats.errors.values()) / max(1, stats.sent),
+        "errors": stats.errors,
+        "latency": {event: histogram.report() for event, histogram in stats.histograms.items()}
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--tables", default="1,5,10")
+    parser.add_argument("--players", type=int, default=6)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--think-time", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=20211)
+    parser.add_argument("--out", default="load_results.json")
+    args = parser.parse_args()
+
+    run_id = str(int(time.time()))
+    steps = []
+    for step, tables in enumerate(int(count) for count in args.tables.split(",")):
+        result = run_step(args.url, tables, args.players, args.duration, args.think_time, args.seed + step, run_id + "-" + str(step))
+        steps.append(result)
+        print("{tables} tables / {clients} clients: {actions_per_sec:.1f} actions/s, error rate {error_rate:.3%}".format(**result))
+    with open(args.out, "w") as out:
+        json.dump({"url": args.url, "players": args.players, "steps": steps}, out, indent=2)
+
+if __name__ == "__main__":
+    main()
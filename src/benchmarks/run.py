@@ -0,0 +1,76 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from benchmarks import bench_evaluator, bench_deck, bench_engine, bench_socket
+
+## Benchmark Runner ##
+# Run from the src directory:
+#   python -m benchmarks.run --out bench_results.json
+#   python -m benchmarks.run --only evaluator,deck --compare old.json
+# Writes one JSON document per run so results from two builds can be diffed.
+
+SUITES = {
+    "evaluator": bench_evaluator.run,
+    "deck": bench_deck.run,
+    "engine": bench_engine.run,
+    "socket": bench_socket.run
+}
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Prints every per_sec style metric that dropped by more than the threshold
+def compare(old, new, threshold=0.1, path=""):
+    regressions = []
+    for key, value in new.items():
+        if key not in old or old[key] is None or value is None:
+            continue
+        name = path + "." + key if path else key
+        if isinstance(value, dict):
+            regressions += compare(old[key], value, threshold, name)
+        elif key.endswith("per_sec") and value < old[key] * (1 - threshold):
+            regressions.append((name, old[key], value))
+        elif key.endswith("_ms") and value > old[key] * (1 + threshold):
+            regressions.append((name, old[key], value))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--only", default=",".join(SUITES))
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "time": time.time(),
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform()
+        }
+    }
+    for name in args.only.split(","):
+        print("running " + name)
+        results[name] = SUITES[name]()
+    with open(args.out, "w") as out:
+        json.dump(results, out, indent=2)
+
+    if args.compare:
+        with open(args.compare) as old_file:
+            old = json.load(old_file)
+        regressions = compare(old, results)
+        for name, before, after in regressions:
+            print("REGRESSION {}: {:.4g} -> {:.4g}".format(name, before, after))
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
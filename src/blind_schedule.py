@@ -0,0 +1,67 @@
+import heapq
+from collections import Counter
+
+## Blind Schedule ##
+# Raises the blinds of every running table on a timer, built from the blinds and
+# ante settings documents once at startup:
+#   increase  raise the blinds at all
+#   interval  seconds per level
+#   double    double both blinds each level, otherwise add amount to the small
+#             blind and twice amount to the big blind
+#   ante      chips every dealt in player posts each hand, 0 for none
+#
+# All tables share one heap of level deadlines, so there is no timer per table.
+# A level only takes effect when the table deals its next hand: start_round asks
+# take() how many levels passed, which pops whatever is due on any table (each
+# level is O(log tables)) and is a single heap peek the rest of the time.
+# Stopped tables are dropped lazily, their entries are skipped when they come up.
+class BlindSchedule:
+    def __init__(self, interval, increase=True, double=True, amount=0, ante=0):
+        self.interval = interval
+        self.increase = increase
+        self.double = double
+        self.amount = amount
+        self.ante = ante
+        # (deadline, table id, run), run tells a restarted table's entries apart
+        self.deadlines = []
+        self.runs = {}
+        self.next_run = 0
+        self.pending = Counter()
+
+    @classmethod
+    def from_settings(cls, blinds, ante):
+        return cls(blinds.get("interval", 0), blinds.get("increase", False), blinds.get("double", True),
+            blinds.get("amount", 0), ante["amount"] if ante.get("active") else 0)
+
+    # The table's first level runs from now
+    def start(self, table_id, now):
+        if not self.increase or self.interval <= 0:
+            return
+        self.next_run += 1
+        self.runs[table_id] = self.next_run
+        self.pending.pop(table_id, None)
+        heapq.heappush(self.deadlines, (now + self.interval, table_id, self.next_run))
+
+    def stop(self, table_id):
+        self.runs.pop(table_id, None)
+        self.pending.pop(table_id, None)
+
+    def advance(self, now):
+        deadlines = self.deadlines
+        while deadlines and deadlines[0][0] <= now:
+            deadline, table_id, run = heapq.heappop(deadlines)
+            if self.runs.get(table_id) != run:
+                continue
+            self.pending[table_id] += 1
+            heapq.heappush(deadlines, (deadline + self.interval, table_id, run))
+
+    # Number of levels the table went up since it last asked
+    def take(self, table_id, now):
+        self.advance(now)
+        return self.pending.pop(table_id, 0)
+
+    # Blinds of the level after small, big
+    def next_blinds(self, small, big):
+        if self.double:
+            return small * 2, big * 2
+        return small + self.amount, big + 2 * self.amount
@@ -0,0 +1,30 @@
+## Card Encoding ##
+# Cards are stored as small ints so they can index lookup tables directly
+#   card = (value - 2) * 4 + suit
+# value 2..14 (ace high), suit uses the constants below
+# 0 -> 2 of clubs, 51 -> ace of spades
+
+CLUBS = 0
+DIAMONDS = 1
+HEARTS = 2
+SPADES = 3
+
+NUM_CARDS = 52
+
+def encode_card(card):
+    return (card["value"] - 2) * 4 + card["suit"]
+
+def decode_card(card, revealed=False):
+    return {"suit": card & 3, "value": (card >> 2) + 2, "revealed": revealed}
+
+def encode_cards(cards):
+    return [(card["value"] - 2) * 4 + card["suit"] for card in cards]
+
+def decode_cards(cards, revealed=False):
+    return [decode_card(card, revealed) for card in cards]
+
+def card_value(card):
+    return (card >> 2) + 2
+
+def card_suit(card):
+    return card & 3
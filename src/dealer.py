@@ -1,23 +1,62 @@
-import json
-import asyncio
-import time
-from threading import Thread, Event
-
-import gevent
-from gevent import monkey
-monkey.patch_all()
-
-from flask import Flask, request, jsonify
-from flask_pymongo import PyMongo
-from flask_socketio import SocketIO, disconnect, emit
-from flask_cors import CORS, cross_origin
-from flask_jwt_extended import verify_jwt_in_request, JWTManager
-
-from deck import Deck
-from poker_hand import PokerHand
-from game_phase import GamePhase
+# gevent has to patch the standard library before anything imports threading,
+# ssl or pymongo (action_clock, write_behind, ...), a server started from here
+# patches first and the worker processes inherit it
+if __name__ == "__main__":
+    from gevent import monkey
+    monkey.patch_all()
 
-def create_app(poker_url):
+import os
+import time
+from collections import Counter
+from multiprocessing import Process
+
+from equity import cached_equity, known_equity, equity_cache
+from engine import TABLE
+from write_behind import WriteBehindStore
+from action_clock import ActionClock
+from hand_history import HandHistoryWriter, MAX_NAME_BYTES
+from table_manager import TableManager, DEFAULT_TABLE
+from blind_schedule import BlindSchedule
+from metrics import Registry, InstrumentedCollection
+from recovery import SNAPSHOTS, latest_hands
+from wire import JSON, PROTOCOLS, negotiate, encode, decode
+
+# table events spectators get besides the game state
+SPECTATOR_EVENTS = ("action_clock", "declare_winners", "blind_level", "equity")
+
+DEFAULT_SETTINGS = [
+    {"_id": "blinds" , "small": 10, "big": 20, "increase": True, "interval": 1200, "double": True, "amount": 0},
+    {"_id": "ante", "active": False, "amount": 30},
+    {"_id": "player_settings", "starting_chips": 5000, "rebuys_allowed": False, "time_per_hand": 15}
+]
+
+# Player names and table ids end up in the hand history with a one byte length
+def fits_history(text):
+    return isinstance(text, str) and 0 < len(text.encode()) <= MAX_NAME_BYTES
+
+# "/" separates the table id from the protocol in the room names, a table id with
+# one could share a room with another table ("a/msgpack" and "a" in msgpack)
+def valid_table_id(table_id):
+    return fits_history(table_id) and "/" not in table_id
+
+# worker_urls lists the address of every worker process, tables are spread over
+# them by TableManager's hash ring and this app only hosts the ones it owns.
+# db replaces the Mongo connection, e.g. with a mongomock database in benchmarks
+# Finished hands are logged to history_dir when it is given
+# spectator_rate caps the game state updates spectators get per second
+# recover brings back the tables of the last run (recovery.py), the ones that do
+# not fit in startup_budget seconds are restored when they are first used
+def create_app(poker_url, worker_id=0, worker_urls=None, db=None, history_dir=None, spectator_rate=None,
+        recover=True, startup_budget=2.0):
+    deadline = time.time() + startup_budget
+    # imported here so run_worker can patch for gevent first
+    from flask import Flask, Response, request, jsonify
+    from flask_socketio import SocketIO, join_room, leave_room
+    from flask_cors import CORS
+    from pymongo import UpdateOne
+
+    if worker_urls is None:
+        worker_urls = [poker_url]
 
     app = Flask(__name__)
     app.config["MONGO_DBNAME"] = "pokerdb"
@@ -26,577 +65,414 @@ def create_app(poker_url):
     app.config["CORS_HEADERS"] = "Content-Type"
 
     CORS(app, resources={r"/*": {"origins": "*"}})
-    mongo = PyMongo(app)
+    if db is None:
+        from flask_pymongo import PyMongo
+        db = PyMongo(app).db
     socketio = SocketIO(app, cors_allowed_origins="*")
-
-    ## Collections
-    players = mongo.db.players
-    settings = mongo.db.settings
-    table = mongo.db.table
-    ## Initialize database
-    players.drop()
-    table.drop()
-    # Settings
-    settings.replace_one({"_id": "blinds"}, {"_id": "blinds" , "small": 10, "big": 20, "increase": True, "interval": 1200, "double": True, "amount": 0}, upsert=True)
-    settings.replace_one({"_id": "ante"}, {"_id": "ante", "active": False, "amount": 30}, upsert=True)
-    settings.replace_one({"_id": "player_settings"}, {"_id": "player_settings", "starting_chips": 5000, "rebuys_allowed": False, "time_per_hand": 15}, upsert=True)
-    # Table
-    table.replace_one({"_id": "player_count"}, {"_id": "player_count", "count": 0, "folded": 0, "eliminated": 0}, upsert=True)
-    small_blind = settings.find_one({"_id": "blinds"})["small"]
-    big_blind = settings.find_one({"_id": "blinds"})["big"]
-    table.replace_one({"_id": "positions"}, {"_id": "positions", "dealer": 0, "bb": 0, "sb": 0, "utg": 0, "current_player": 0, "action": -1}, upsert=True)
-    table.replace_one({"_id": "table_chips"}, {"_id": "table_chips", "pot": 0, "small_blind": small_blind, "big_blind": big_blind, "current_bet": 0}, upsert=True)
-    table.replace_one({"_id": "game_time"}, {"_id": "game_time", "time": 0}, upsert=True)
-    table.replace_one({"_id": "game_phase"}, {"_id": "game_phase", "phase": 0}, upsert=True)
+    metrics = Registry()
+
+    ## Collections, every call is counted and timed for /metrics
+    settings = InstrumentedCollection(db.settings, metrics)
+    table = InstrumentedCollection(db.table, metrics)
+    # Settings, the defaults only fill in missing documents. Read once, the blind
+    # schedule of every table is built from them
+    settings.bulk_write([UpdateOne({"_id": doc["_id"]}, {"$setOnInsert": doc}, upsert=True) for doc in DEFAULT_SETTINGS], ordered=False)
+    settings_docs = {doc["_id"]: doc for doc in settings.find({"_id": {"$in": [doc["_id"] for doc in DEFAULT_SETTINGS]}})}
+    blinds = settings_docs["blinds"]
+    ante = settings_docs["ante"]
+    player_settings = settings_docs["player_settings"]
+    # Tables, held in memory and written behind to the table collection
+    manager = TableManager(blinds["small"], blinds["big"], player_settings["time_per_hand"], worker_id, len(worker_urls),
+        spectator_interval=1 / spectator_rate if spectator_rate else 0, schedule=BlindSchedule.from_settings(blinds, ante))
+    store = WriteBehindStore(table)
+    store.start()
+    history = HandHistoryWriter(history_dir) if history_dir is not None else None
+    # wire protocol of every session and how many sessions of each protocol sit
+    # at a table, a table has one room per protocol (see wire.py)
+    protocols = {}
+    members = Counter()
+    # session id -> table id it watches
+    spectating = {}
+    # (table id, hand started, phase) of the all in spots being sampled
+    sampling = set()
 
     ## HELPER FUNCTIONS ##
-    def player_exists(player):
-        i = 0
-        for obj in players.find({"_id": player}):
-            i += 1
-        return i
-    
-    def get_player_count():
-        return table.find_one({"_id": "player_count"})["count"]
-
-    def get_all_players(show_cards):
-        all_players = []
-        for player in players.find():
-            cards = []
-            if len(player["cards"]) > 0:
-                for key in player["cards"]:
-                    if show_cards and player["status"] > 2:
-                        cards.append(player["cards"][key])
-                    else:
-                        cards.append({"value": None, "suit": None, "revealed": False})
-            all_players.append(
-                {
-                    "name": player["_id"], 
-                    "position": player["position"],
-                    "status": player["status"],
-                    "chips": player["chips"], 
-                    "cards": cards,
-                    "betSize": player["betSize"],
-                    "rebuys": player["rebuys"],
-                    "permissions": player["permissions"]
-                }
-            )
-        return all_players
-    
-    # Gets the position of the next player to receive action
-    def get_next_active_player():
-        current_pos = table.find_one({"_id": "positions"})["current_player"]
-        pos = current_pos + 1
+    # Registers a socket handler wrapped with latency, db call and emit metrics
+    def on(event):
+        def register(handler):
+            return socketio.on(event)(metrics.instrument(event, handler))
+        return register
+
+    # Every emit goes through here so it is counted against the running handler
+    def send(name, payload, room):
+        metrics.record_emit(name, payload)
+        socketio.emit(name, payload, room=room)
+
+    def table_room(table_id, protocol):
+        return table_id if protocol == JSON else table_id + "/" + protocol
+
+    # Sends to one client in the protocol it asked for, a seat whose player is
+    # away has no session and the message is dropped
+    def send_to(name, payload, session_id, state=None):
+        if session_id is None:
+            return
+        protocol = protocols.get(session_id, JSON)
+        send(name, encode(name, payload, protocol, state.find_seat if state is not None else None), session_id)
+
+    # Sends to the whole table, encoded once per protocol in use there
+    def broadcast(name, payload, state):
+        for protocol in PROTOCOLS:
+            if members[(state.table_id, protocol)]:
+                send(name, encode(name, payload, protocol, state.find_seat), table_room(state.table_id, protocol))
+        if name in SPECTATOR_EVENTS:
+            fan_out(name, payload, state)
+
+    def spectator_room(table_id, protocol):
+        return table_id + "/spectators/" + protocol
+
+    # Sends to the spectators of a table, encoded once per protocol they use
+    def fan_out(name, payload, state):
+        feed = manager.feeds[state.table_id]
+        for protocol in PROTOCOLS:
+            if feed.viewers[protocol]:
+                send(name, encode(name, payload, protocol, state.find_seat), spectator_room(state.table_id, protocol))
+
+    # Returns the table the session watched, if any
+    def stop_spectating(session_id, protocol):
+        table_id = spectating.pop(session_id, None)
+        if table_id in manager.feeds:
+            manager.feeds[table_id].viewers[protocol] -= 1
+        return table_id
+
+    def emit_spectator_snapshot(engine, session_id):
+        state = engine.state
+        feed = manager.feeds[state.table_id]
+        latest = manager.versions[state.table_id].last
+        # the feed is only behind when nobody watched the table until now
+        if feed.pending is None and latest is not None and feed.versions.last is not latest:
+            feed.send(latest, time.time())
+        snapshot = feed.snapshot(protocols.get(session_id, JSON), state.find_seat)
+        if snapshot is not None:
+            send("game_state", snapshot, session_id)
+
+    # Sends spectators the updates the rate limit held back
+    def flush_spectators():
         while True:
-            if pos >= get_player_count():
-                pos = 0
-            if pos == current_pos:
-                return pos
-            player_status = players.find_one({"position": pos})["status"]
-            if player_status == 3:
-                return pos
-            pos += 1
-    
-    # Counts players still waiting for action
-    def count_active_players():
-        active_players = 0
-        for player in players.find():
-            if player["status"] >= 3:
-                active_players += 1
-        return active_players
-
-    def count_playing_players():
-        playing_players = 0
-        for player in players.find():
-            if player["status"] >= 2:
-                playing_players += 1
-        return playing_players
-    
-    def get_table_info():
-        table_info = {}
-        table_info["pot"] = table.find_one({"_id": "table_chips"})["pot"]
-        table_info["minBet"] = settings.find_one({"_id": "blinds"})["big"]
-        table_info["currentBet"] = table.find_one({"_id": "table_chips"})["current_bet"]
-        table_info["phase"] = table.find_one({"_id": "game_phase"})["phase"]
-        table_info["dealer"] = table.find_one({"_id": "positions"})["dealer"]
-        table_info["sb"] = table.find_one({"_id": "positions"})["sb"]
-        table_info["bb"] = table.find_one({"_id": "positions"})["bb"]
-        table_info["utg"] = table.find_one({"_id": "positions"})["utg"]
-        table_info["currentPlayer"] = table.find_one({"_id": "positions"})["current_player"]
-        table_info["action"] = table.find_one({"_id": "positions"})["action"]
-        table_info["playerCount"] = table.find_one({"_id": "player_count"})["count"]
-        table_info["folded"] = table.find_one({"_id": "player_count"})["folded"]
-        table_info["eliminated"] = table.find_one({"_id": "player_count"})["eliminated"]
-        table_cards = table.find_one({"_id": "table_cards"})
-        table_info["tableCards"] = []
-        if table_info["phase"] >= 1:
-            for i in range(3):
-                table_info["tableCards"].append(table_cards[str(i)])
-        if table_info["phase"] >= 2:
-            table_info["tableCards"].append(table_cards[str(3)])
-        if table_info["phase"] >= 3:
-            table_info["tableCards"].append(table_cards[str(4)])
-        return table_info
-
-    def emit_game_state(show_cards):
-        socketio.emit("game_state", {"players": get_all_players(show_cards), "table": get_table_info()}, broadcast=True)
-
-    # Sets initial dealer position
-    def dealer_position(player_count):
-        dealer = player_count - 3
-        if dealer < 0:
-            dealer = 0
-        return dealer
-    # Sets initial sb position
-    def sb_position(player_count):
-        dealer = dealer_position(player_count)
-        if player_count == 2:
-            return dealer
-        elif dealer + 1 > player_count - 1:
-            return 0
-        else:
-            return dealer + 1
-    # Sets initial bb position
-    def bb_position(player_count):
-        sb = sb_position(player_count)
-        if player_count == 2:
-            return int(not sb)
-        elif sb + 1 > player_count - 1:
-            return 0
-        else:
-            return sb + 1
-    # Sets initial utg position
-    def utg_position(player_count):
-        bb = bb_position(player_count)
-        if player_count == 2:
-            return int(not bb)
-        elif bb + 1 > player_count - 1:
-            return 0
-        else:
-            return bb + 1
-
-    # Rotates positions for the new round !!! FIX THIS !!!
-    def set_new_positions():
-        positions = []
-        for player in players.find():
-            if player["status"] > 1 or player["b_elim"]:
-                positions.append(player["position"])
-
-        positions = sorted(positions)
-
-        new_dealer = -1
-        new_sb = -1
-        new_bb = -1
-        new_utg = -1
-
-        bb_found = 0
-        ct = 0
-        while new_bb == -1:
-            if ct == len(positions):
-                ct = 0
-            elif positions[ct] == table.find_one({"_id": "positions"})["bb"]:
-                bb_found = 1
-                ct += 1
-            elif bb_found and players.find_one({"position": positions[ct]})["status"] >= 2:
-                new_bb = ct
+            socketio.sleep(manager.spectator_interval)
+            now = time.time()
+            for table_id, feed in list(manager.feeds.items()):
+                delta = feed.flush(now)
+                if delta is not None:
+                    fan_out("game_state_delta", delta, manager.get(table_id).state)
+
+    # Samples the equity of an all in spot off the handler and sends it to the
+    # table as an equity event, unless the hand is over by then. The street may
+    # have been dealt meanwhile, the event says which one the equity is for. Under
+    # gevent the sampling runs on a real thread so the hub keeps serving other
+    # clients, and samples there by itself, the process pool does not mix with
+    # patched threading. The cache stays on the hub.
+    def send_equity(state, spot, names, hands, board):
+        try:
+            if socketio.async_mode == "gevent":
+                from gevent import get_hub
+                equity = cached_equity(hands, board, 1, get_hub().threadpool.apply)
             else:
-                ct += 1
-        
-        new_sb = new_bb - 1
-        if new_sb < 0:
-            new_sb = len(positions) - 1
-        
-        if count_playing_players() > 2:
-            new_dealer = new_sb - 1
-        elif count_playing_players() <= 2:
-            new_dealer = new_bb - 1
-        if new_dealer < 0:
-            new_dealer = len(positions) - 1
-        if players.find_one({"position": positions[new_dealer]})["b_elim"]:
-            players.update_one({"position": positions[new_dealer]}, [{"$set": {"b_elim": 0}}], upsert=True)    
-        
-        new_utg = new_bb + 1
-        if new_utg == len(positions):
-            new_utg = 0
-
-        print(new_dealer, new_sb, new_bb, new_utg)
-        table.update_one({"_id": "positions"}, 
-            [{"$set": 
-                {   "dealer": positions[new_dealer], 
-                    "sb": positions[new_sb], 
-                    "bb": positions[new_bb], 
-                    "utg": positions[new_utg],
-                    "action": -1
-                }
-            }])
-    
-    # Returns player that should act first
-    def first_to_act():
-        phase = table.find_one({"_id": "game_phase"})["phase"]
-        if(phase > 0):
-            if players.find_one({"position": table.find_one({"_id": "positions"})["sb"]})["status"] > 2:
-                return table.find_one({"_id": "positions"})["sb"]
-            else:
-                i = table.find_one({"_id": "positions"})["sb"] + 1
-                for _ in range(table.find_one({"_id": "player_count"})["count"]):
-                    if i >= table.find_one({"_id": "player_count"})["count"]:
-                        i = 0
-                    if players.find_one({"position": i})["status"] > 2:
-                        return i
-                    i += 1
+                equity = cached_equity(hands, board)
+        finally:
+            sampling.discard(spot)
+        _, hand_started, phase = spot
+        if state.hand_started == hand_started:
+            broadcast("equity", {"phase": phase, "equity": dict(zip(names, equity["players"]))}, state)
+
+    # Returns equity for every player still in the hand once no more betting can
+    # happen. Spots that have to be sampled return None and follow in an equity event.
+    def get_all_in_equity(state, all_in, table_info):
+        names = [name for name, _ in all_in]
+        hands = [cards for _, cards in all_in]
+        equity = known_equity(hands, table_info["tableCards"])
+        if equity is not None:
+            return dict(zip(names, equity["players"]))
+        spot = (state.table_id, state.hand_started, state.phase)
+        if spot not in sampling:
+            sampling.add(spot)
+            socketio.start_background_task(send_equity, state, spot, names, hands, table_info["tableCards"])
+        return None
+
+    # Broadcasts only what changed since the last game state, clients get a full
+    # snapshot when they join or ask for one after spotting a sequence gap
+    def emit_game_state(engine, game_state):
+        public_state = game_state["public"]
+        if game_state["all_in"] is not None:
+            equity = get_all_in_equity(engine.state, game_state["all_in"], public_state["table"])
+            if equity is not None:
+                public_state["table"]["equity"] = equity
+        delta = manager.versions[engine.state.table_id].update(public_state)
+        if delta is not None:
+            broadcast("game_state_delta", delta, engine.state)
+        feed = manager.feeds[engine.state.table_id]
+        if len(feed):
+            delta = feed.publish(public_state, time.time())
+            if delta is not None:
+                fan_out("game_state_delta", delta, engine.state)
+
+    def emit_full_game_state(engine, session_id):
+        snapshot = manager.versions[engine.state.table_id].snapshot()
+        if snapshot is not None:
+            send_to("game_state", snapshot, session_id, engine.state)
+
+    # Starts the server side clock of the player to act, the table is told once
+    # when the turn started and when it ends instead of every second
+    def start_turn(engine, payload, position):
+        state = engine.state
+        start, deadline = clock.start_turn(state.table_id, position, payload["time"])
+        broadcast("action_clock", {"position": position, "start": start, "deadline": deadline}, state)
+        send_to("start_turn", {"time": payload["time"], "start": start, "deadline": deadline}, manager.session_for(state.table_id, position))
+
+    # Checks or folds for a player whose clock ran out
+    def turn_timeout(table_id, position):
+        engine = manager.get(table_id)
+        if engine is not None:
+            dispatch(engine, engine.timeout(position))
+
+    # One clock thread drives the turn timers of every table on this worker
+    clock = ActionClock(metrics.instrument("action_timeout", turn_timeout))
+    clock.start()
+    if manager.spectator_interval:
+        socketio.start_background_task(flush_spectators)
+
+    def join_table(session_id, table_id):
+        protocol = protocols.get(session_id, JSON)
+        members[(table_id, protocol)] += 1
+        join_room(table_room(table_id, protocol), sid=session_id)
+
+    def leave_table(session_id, table_id):
+        protocol = protocols.get(session_id, JSON)
+        members[(table_id, protocol)] -= 1
+        leave_room(table_room(table_id, protocol), sid=session_id)
+
+    # Rebinds a seat to a reconnecting session and sends what it missed since
+    # game state seq: the deltas if they are still kept, otherwise a snapshot,
+    # then its hole cards and turn clock if it is still in the hand
+    def resume_session(session_id, token, seq):
+        engine, position, previous = manager.resume(session_id, token)
+        if engine is None:
+            send_to("player_info", {"accepted": False, "resumed": False}, session_id)
+            return
+        state = engine.state
+        if previous != session_id:
+            # the old connection may still be open, it stops getting the table
+            if previous is not None:
+                leave_table(previous, state.table_id)
+            join_table(session_id, state.table_id)
+        send_to("player_info", {"accepted": True, "resumed": True, "position": position, "token": token}, session_id)
+        deltas = manager.versions[state.table_id].since(seq) if seq is not None else None
+        if deltas is None:
+            emit_full_game_state(engine, session_id)
         else:
-            return table.find_one({"_id": "positions"})["utg"]
-
-    def set_blinds():
-        big_blind = table.find_one({"_id": "table_chips"})["big_blind"]
-        small_blind = table.find_one({"_id": "table_chips"})["small_blind"]
-        positions = table.find_one({"_id": "positions"})
-        place_bet(positions["sb"], small_blind)
-        place_bet(positions["bb"], big_blind)
-    
-    def add_chips(pos, new_chips):
-        chips = players.find_one({"position": pos})["chips"]
-        players.update_one({"position": pos}, [{"$set": {"chips": chips + new_chips}}], upsert=True)
-
-    def place_bet(pos, bet):
-        active_bet = players.find_one({"position": pos})["betSize"]
-        add_chips(pos, -(bet - active_bet))
-        players.update_one({"position": pos}, [{"$set": {"betSize": bet}}], upsert=True)
-        pot = table.find_one({"_id": "table_chips"})["pot"]
-        table.update_one({"_id": "table_chips"}, [{"$set": {"pot": pot + bet - active_bet, "current_bet": bet}}], upsert=True)
-
-    def start_round():
-        print("round started")
-        # Reset table info
-        table.update_one({"_id": "player_count"}, {"$set": {"folded": 0}}, upsert=True)
-        table.update_one({"_id": "game_phase"}, {"$set": {"phase": 0}}, upsert=True)
-        # Reset option selection for players
-        socketio.emit("reset_option", broadcast=True)
-        # Deal the cards
-        deck = Deck()
-        deck.shuffle()
-        player_cards = deck.deal_cards(get_player_count(), 2)
-        # Deal the table cards
-        for i in range(5):
-            table.update_one({"_id": "table_cards"}, [{"$set": {str(i): deck.random_card()}}], upsert=True)
-        # Check if player is eliminated, else send cards to players
-        for player in players.find():
-            # if big blind was recently eliminated
-            if player["chips"] <= 0 and player["position"] == table.find_one({"_id": "positions"})["bb"] or player["chips"] <= 0 and player["position"] == table.find_one({"_id": "positions"})["sb"]:
-                players.update_one({"_id": player["_id"]},
-                    [{"$set": {
-                        "status": 1,
-                        "betSize": 0,
-                        "b_elim": 1
-                    }}], upsert=True)
-            # if player was eliminated normally
-            elif player["chips"] <= 0:
-                players.update_one({"_id": player["_id"]},
-                    [{"$set": {
-                        "status": 1,
-                        "betSize": 0,
-                        "b_elim": 0
-                    }}], upsert=True)
-            # deal the cards
+            for delta in deltas:
+                send_to("game_state_delta", delta, session_id, state)
+        seat = state.seat(position)
+        if seat.status != 3:
+            return
+        send_to("deal_cards", {"cards": seat.cards}, session_id)
+        live_hand = engine.live_hands.get(position)
+        if live_hand is not None:
+            send_to("hand_strength", live_hand.view(), session_id)
+        turn = clock.current_turn(state.table_id)
+        if turn is not None and turn[0] == position:
+            send_to("start_turn", {"time": engine.time_per_hand, "start": turn[1], "deadline": turn[2]}, session_id)
+
+    # Turns engine events into socket.io emits and persists the table
+    def dispatch(engine, events):
+        state = engine.state
+        for name, payload, to in events:
+            if name == "game_state":
+                emit_game_state(engine, payload)
+            elif name == "start_turn":
+                start_turn(engine, payload, to)
+            elif name == "hand_history":
+                if history is not None:
+                    history.append(payload)
+            elif to == TABLE:
+                broadcast(name, payload, state)
             else:
-                cards = player_cards[player["position"]]
-                card_dict = {}
-                for j in range(len(cards)):
-                    card_dict[str(j)] = cards[j]
-                players.update_one({"_id": player["_id"]},
-                    [{"$set": {
-                        "cards": card_dict,
-                        "status": 3,
-                        "betSize": 0
-                    }}], upsert=True)
-                socketio.emit("deal_cards", {"cards": cards}, room=player["sessionid"])
-
-        # Update player positions
-        set_new_positions()
-        first = first_to_act()
-        print(first)
-        table.update_one({"_id": "positions"}, {"$set": {"current_player": first}}, upsert=True)
-        # Set the blinds
-        set_blinds()
-        
-        emit_game_state(show_cards=False)
-
-        socketio.emit("start_turn", {"time": settings.find_one({"_id": "player_settings"})["time_per_hand"]}, room=players.find_one({"position": first})["sessionid"])
-
-    def next_phase():
-        # INITIAL = 0,
-        # FLOP = 1,
-        # TURN = 2,
-        # RIVER = 3
-        # SHOWDOWN = 4
-        # table.replace_one({"_id": "game_phase"}, {"_id": "game_phase", "phase": 0}, upsert=True)
-        
-        # go to next phase, if next phase is the end, decide the winner of the hand
-        print("next phase")
-        socketio.emit("reset_option", broadcast=True)
-        next_phase = table.find_one({"_id": "game_phase"})["phase"] + 1
-        if next_phase == 4:
-            print("declare winner of hand")
-            table.update_one({"_id": "positions"}, {"$set": {"action": -1}})
-            # do some stuff, set things up for the next round
-            winners = appraise_hands()
-            print(winners)
-            pot = table.find_one({"_id": "table_chips"})["pot"]
-            pot = pot/len(winners)
-            rem = pot%len(winners)
-            for winner in winners:
-                players.update_one({"_id": winner},
-                    {"$inc": {
-                        "chips": pot
-                    }})
-            table.update_one({"_id": "table_chips"}, {"$set": {"pot": 0}})
-            emit_game_state(show_cards=True)
-            socketio.emit("declare_winners", {"winners": winners}, broadcast=True)
-            start_round()
-        else:
-            table.update_one({"_id": "game_phase"}, {"$set": {"phase": next_phase}})
-            first = first_to_act()
-            table.update_one({"_id": "positions"}, {"$set": {"current_player": first, "action": -1}})
-            table.update_one({"_id": "table_chips"}, {"$set": {"current_bet": 0}})
-            for player in players.find():
-                players.update_one({"_id": player["_id"]}, {"$set":{"betSize": 0}})
-            emit_game_state(show_cards=False)
-            socketio.emit("start_turn", {"time": settings.find_one({"_id": "player_settings"})["time_per_hand"]}, room=players.find_one({"position": first})["sessionid"])
-
-    def appraise_hands():
-        test_hands = [
-            # high card
-            [{"value": 2, "suit": 0}, {"value": 4, "suit": 1}, {"value": 5, "suit": 2}, {"value": 8, "suit": 3}, {"value": 9, "suit": 1}, {"value": 12, "suit": 0}, {"value": 13, "suit": 0}],
-            # pair
-            [{"value": 2, "suit": 0}, {"value": 3, "suit": 1}, {"value": 4, "suit": 2}, {"value": 4, "suit": 3}, {"value": 5, "suit": 0}, {"value": 8, "suit": 1}, {"value": 9, "suit": 2}],
-            # two pair
-            [{"value": 2, "suit": 0}, {"value": 3, "suit": 1}, {"value": 3, "suit": 2}, {"value": 4, "suit": 2}, {"value": 5, "suit": 3}, {"value": 5, "suit": 0}, {"value": 8, "suit": 2}],
-            [{"value": 2, "suit": 0}, {"value": 2, "suit": 1}, {"value": 7, "suit": 2}, {"value": 7, "suit": 2}, {"value": 12, "suit": 3}, {"value": 12, "suit": 0}, {"value": 14, "suit": 2}],
-            [{"value": 2, "suit": 0}, {"value": 7, "suit": 1}, {"value": 7, "suit": 2}, {"value": 12, "suit": 2}, {"value": 12, "suit": 3}, {"value": 14, "suit": 0}, {"value": 14, "suit": 2}],
-            # trips
-            [{"value": 2, "suit": 0}, {"value": 3, "suit": 1}, {"value": 4, "suit": 2}, {"value": 4, "suit": 0}, {"value": 4, "suit": 3}, {"value": 5, "suit": 0}, {"value": 9, "suit": 2}],
-            # straight
-            [{"value": 2, "suit": 0}, {"value": 3, "suit": 1}, {"value": 4, "suit": 2}, {"value": 5, "suit": 3}, {"value": 6, "suit": 1}, {"value": 10, "suit": 0}, {"value": 12, "suit": 2}],
-            [{"value": 2, "suit": 0}, {"value": 3, "suit": 1}, {"value": 4, "suit": 2}, {"value": 5, "suit": 3}, {"value": 6, "suit": 1}, {"value": 7, "suit": 0}, {"value": 8, "suit": 2}],
-            [{"value": 2, "suit": 0}, {"value": 3, "suit": 1}, {"value": 4, "suit": 2}, {"value": 5, "suit": 3}, {"value": 10, "suit": 1}, {"value": 12, "suit": 0}, {"value": 14, "suit": 2}],
-            [{"value": 2, "suit": 0}, {"value": 3, "suit": 1}, {"value": 4, "suit": 2}, {"value": 5, "suit": 3}, {"value": 6, "suit": 1}, {"value": 7, "suit": 0}, {"value": 14, "suit": 2}],
-            [{"value": 2, "suit": 0}, {"value": 3, "suit": 1}, {"value": 3, "suit": 2}, {"value": 4, "suit": 3}, {"value": 5, "suit": 1}, {"value": 5, "suit": 0}, {"value": 6, "suit": 2}],
-            # flush
-            [{"value": 2, "suit": 0}, {"value": 4, "suit": 0}, {"value": 5, "suit": 2}, {"value": 8, "suit": 0}, {"value": 9, "suit": 0}, {"value": 12, "suit": 0}, {"value": 13, "suit": 2}],
-            [{"value": 2, "suit": 0}, {"value": 4, "suit": 0}, {"value": 5, "suit": 0}, {"value": 8, "suit": 0}, {"value": 9, "suit": 0}, {"value": 12, "suit": 0}, {"value": 13, "suit": 0}],
-            # full house
-            [{"value": 2, "suit": 0}, {"value": 2, "suit": 1}, {"value": 5, "suit": 2}, {"value": 5, "suit": 3}, {"value": 5, "suit": 1}, {"value": 12, "suit": 0}, {"value": 14, "suit": 2}],
-            [{"value": 2, "suit": 0}, {"value": 2, "suit": 1}, {"value": 5, "suit": 2}, {"value": 5, "suit": 3}, {"value": 5, "suit": 1}, {"value": 12, "suit": 0}, {"value": 12, "suit": 2}],
-            [{"value": 2, "suit": 0}, {"value": 2, "suit": 1}, {"value": 2, "suit": 2}, {"value": 5, "suit": 3}, {"value": 5, "suit": 1}, {"value": 12, "suit": 0}, {"value": 12, "suit": 2}],
-            [{"value": 2, "suit": 0}, {"value": 2, "suit": 1}, {"value": 2, "suit": 2}, {"value": 6, "suit": 3}, {"value": 7, "suit": 1}, {"value": 12, "suit": 0}, {"value": 12, "suit": 2}],
-            # quads
-            [{"value": 2, "suit": 0}, {"value": 2, "suit": 1}, {"value": 2, "suit": 2}, {"value": 2, "suit": 3}, {"value": 5, "suit": 1}, {"value": 5, "suit": 0}, {"value": 6, "suit": 2}],
-            [{"value": 2, "suit": 0}, {"value": 2, "suit": 1}, {"value": 2, "suit": 2}, {"value": 2, "suit": 3}, {"value": 5, "suit": 1}, {"value": 5, "suit": 0}, {"value": 5, "suit": 2}],
-            [{"value": 3, "suit": 0}, {"value": 3, "suit": 1}, {"value": 3, "suit": 2}, {"value": 5, "suit": 3}, {"value": 5, "suit": 1}, {"value": 5, "suit": 0}, {"value": 5, "suit": 2}],
-            # straight flush
-            [{"value": 2, "suit": 0}, {"value": 3, "suit": 0}, {"value": 4, "suit": 0}, {"value": 5, "suit": 0}, {"value": 6, "suit": 0}, {"value": 10, "suit": 0}, {"value": 12, "suit": 0}],
-            [{"value": 2, "suit": 0}, {"value": 3, "suit": 0}, {"value": 4, "suit": 0}, {"value": 5, "suit": 0}, {"value": 6, "suit": 0}, {"value": 7, "suit": 0}, {"value": 8, "suit": 0}],
-            [{"value": 2, "suit": 0}, {"value": 3, "suit": 0}, {"value": 4, "suit": 0}, {"value": 5, "suit": 0}, {"value": 6, "suit": 0}, {"value": 7, "suit": 2}, {"value": 8, "suit": 3}],
-            [{"value": 2, "suit": 0}, {"value": 3, "suit": 0}, {"value": 4, "suit": 0}, {"value": 5, "suit": 2}, {"value": 6, "suit": 0}, {"value": 7, "suit": 0}, {"value": 8, "suit": 0}],
-            [{"value": 2, "suit": 0}, {"value": 3, "suit": 0}, {"value": 4, "suit": 0}, {"value": 5, "suit": 0}, {"value": 10, "suit": 1}, {"value": 12, "suit": 3}, {"value": 14, "suit": 0}],
-            [{"value": 2, "suit": 0}, {"value": 3, "suit": 0}, {"value": 4, "suit": 0}, {"value": 5, "suit": 0}, {"value": 6, "suit": 0}, {"value": 7, "suit": 0}, {"value": 14, "suit": 0}],
-            [{"value": 2, "suit": 0}, {"value": 3, "suit": 0}, {"value": 3, "suit": 2}, {"value": 4, "suit": 0}, {"value": 5, "suit": 1}, {"value": 5, "suit": 0}, {"value": 6, "suit": 0}],
-            # royal flush
-            [{"value": 2, "suit": 0}, {"value": 2, "suit": 0}, {"value": 10, "suit": 0}, {"value": 11, "suit": 0}, {"value": 12, "suit": 0}, {"value": 13, "suit": 0}, {"value": 14, "suit": 0}],
-            [{"value": 8, "suit": 0}, {"value": 9, "suit": 0}, {"value": 10, "suit": 0}, {"value": 11, "suit": 0}, {"value": 12, "suit": 0}, {"value": 13, "suit": 0}, {"value": 14, "suit": 0}],
-        ]
-        # for test_hand in test_hands:
-        #     hand = PokerHand(test_hand)
-        #     print(hand)
-
-        hands = {}
-
-        # test
-        # test_player_cards = [
-        #     [{"value": 14, "suit": 3}, {"value": 14, "suit": 2}],
-        #     [{"value": 2, "suit": 1}, {"value": 3, "suit": 1}],
-        #     [{"value": 4, "suit": 1}, {"value": 8, "suit": 1}],
-        #     [{"value": 12, "suit": 0}, {"value": 5, "suit": 2}],
-        #     [{"value": 11, "suit": 1}, {"value": 5, "suit": 1}],
-        #     [{"value": 13, "suit": 3}, {"value": 11, "suit": 0}],
-        #     [{"value": 5, "suit": 3}, {"value": 6, "suit": 0}]
-        # ]
-        # test_table_cards = [
-        #     {"value": 2, "suit": 0}, 
-        #     {"value": 3, "suit": 2}, 
-        #     {"value": 4, "suit": 0}, 
-        #     {"value": 8, "suit": 2},
-        #     {"value": 14, "suit": 0}
-        # ]
-        # for i in range(len(test_player_cards)):
-        #     cards = []
-        #     for j in range(2):
-        #         cards.append(test_player_cards[i][j])
-        #     for k in range(5):
-        #         cards.append(test_table_cards[k])
-        #     print(cards)
-        #     hand = PokerHand(cards)
-        #     hands[i] = hand
-        # print(hands)
-        for player in players.find():
-            if player["status"] > 2:
-                cards = []
-                for key in player["cards"]:
-                    cards.append(player["cards"][key])
-                table_cards = table.find_one({"_id": "table_cards"}, {"_id": False})
-                for card in table_cards:
-                    cards.append(table_cards[card])
-                hand = PokerHand(cards)
-                hands[player["_id"]] = hand
-        top = []
-        for curr in hands:
-            if top == []:
-                top.append(curr)
-                print("first hand")
-            elif hands[curr] == hands[top[0]]:
-                print(hands[curr], hands[top[0]])
-                top.append(curr)
-                print("hands equal")
-            elif hands[curr] > hands[top[0]]:
-                print(hands[curr], hands[top[0]])
-                top = []
-                top.append(curr)
-                print("hand stronger")
+                send_to(name, payload, manager.session_for(state.table_id, to), state)
+        store.save(state)
+
+    # Brings back the tables this worker owns as of the last run, as many as fit
+    # in the startup budget, the others when they are first used
+    def recover_tables():
+        docs = [doc for doc in table.find(SNAPSHOTS) if manager.owns(doc["_id"])]
+        # snapshots from before hand_started was kept are taken as they are
+        since = {doc["_id"]: doc["hand_started"] for doc in docs if "hand_started" in doc}
+        hands, missed = latest_hands(history_dir, since, deadline) if history_dir is not None else ({}, set())
+        for doc in docs:
+            if time.time() < deadline and doc["_id"] not in missed:
+                manager.restore(doc, hands.get(doc["_id"]))
             else:
-                print(hands[curr], hands[top[0]])
-                print("hand weaker")
+                manager.defer(doc, hands.get(doc["_id"]), doc["_id"] not in missed)
+
+    def find_hand(doc):
+        return latest_hands(history_dir, {doc["_id"]: doc["hand_started"]})[0].get(doc["_id"])
 
-        return top
+    manager.on_restore = dispatch
+    manager.find_hand = find_hand
+    if recover:
+        recover_tables()
 
     ## APP ROUTE FUNCTIONS ##
 
     @app.route('/', methods=["GET"])
     def default():
-        start_game()
-        start_round()
-        return jsonify({"hello": world})
+        return jsonify({"hello": "world"})
+
+    # Tells a client which worker hosts a table
+    @app.route('/tables/<table_id>', methods=["GET"])
+    def table_worker(table_id):
+        worker = manager.worker_for(table_id)
+        return jsonify({"table": table_id, "worker": worker, "url": worker_urls[worker]})
+
+    # Prometheus scrape endpoint
+    @app.route('/metrics', methods=["GET"])
+    def metrics_endpoint():
+        for stat, value in equity_cache.stats().items():
+            metrics.equity_cache.set(value, (stat,))
+        return Response(metrics.expose(), mimetype="text/plain; version=0.0.4")
+
     ## SOCKET METHODS ##
 
-    ## Triggers whenever new client connects
-    @socketio.on("connect")
-    def connected():
-        print("New Websocket client: ", request.sid)
-    
-    ## Triggers whenever client disconnects
-    @socketio.on("disconnect")
-    def disconnected():
-        print("Websocket client disconnected")
-
-    ## Receives current time 
-    @socketio.on("current_time")
-    def broadcast_current_player_time(msg):
-        json_data = json.loads(msg)
-        table.update_one({"_id": "game_time"}, {"$inc": {"time": 1}})
-        emit("game_time", {"time": json_data["playerTime"]}, broadcast=True)
-
-    @socketio.on("set_player_name")
+    ## Triggers whenever new client connects, auth can pick the wire protocol
+    @on("connect")
+    def connected(auth=None):
+        metrics.connections.inc()
+        protocols[request.sid] = negotiate(auth)
+
+    ## Triggers whenever client disconnects, the seat stays and waits for a resume
+    @on("disconnect")
+    def disconnected(reason=None):
+        metrics.connections.inc(amount=-1)
+        protocol = protocols.pop(request.sid, JSON)
+        seat = manager.leave(request.sid)
+        if seat is not None:
+            members[(seat[0], protocol)] -= 1
+        stop_spectating(request.sid, protocol)
+
+    @on("set_player_name")
     def set_player_name(msg):
-        player_name = json.loads(msg)["name"]
-        if(not player_exists(player_name)):
-            player_position = table.find_one({"_id": "player_count"})["count"]
-            starting_chips = settings.find_one({"_id": "player_settings"})["starting_chips"]
-            permissions = "player"
-            if(player_position == 0):
-                permissions = "host"
-            players.insert_one({
-                "_id": player_name, 
-                "position": player_position,
-                "status": 0,
-                "chips": starting_chips, 
-                "cards": {},
-                "betSize": 0,
-                "rebuys": 0,
-                "permissions": permissions,
-                "sessionid": request.sid,
-                "b_elim": 0
-            })
-            # Increment player count by one
-            table.update_one({"_id": "player_count"}, {"$inc": {"count": 1}})
-            # returns player position as response
-            emit("player_info", {"accepted": True, "position": player_position})
-            emit_game_state(show_cards=False)
+        json_data = decode(msg)
+        player_name = json_data["name"]
+        table_id = json_data.get("table", DEFAULT_TABLE)
+        if not fits_history(player_name) or not valid_table_id(table_id):
+            send_to("player_info", {"accepted": False}, request.sid)
+            return
+        if not manager.owns(table_id):
+            worker = manager.worker_for(table_id)
+            send_to("player_info", {"accepted": False, "worker": worker, "url": worker_urls[worker]}, request.sid)
+            return
+        engine = manager.open_table(table_id)
+        if(not engine.player_exists(player_name)):
+            events = engine.add_player(player_name, player_settings["starting_chips"], request.sid)
+            if request.sid not in manager.sessions:
+                join_table(request.sid, table_id)
+            position = engine.state.find_seat(player_name).position
+            token = manager.join(request.sid, table_id, position)
+            # returns player position and the token to resume the seat with
+            send_to("player_info", {"accepted": True, "position": position, "token": token}, request.sid)
+            dispatch(engine, events)
+            emit_full_game_state(engine, request.sid)
+        elif "token" in json_data:
+            # a returning player, the token has to be the one of the seat with that name
+            position = engine.state.find_seat(player_name).position
+            if manager.sessions.seat_for_token(json_data["token"]) != (table_id, position):
+                send_to("player_info", {"accepted": False, "resumed": False}, request.sid)
+                return
+            resume_session(request.sid, json_data["token"], json_data.get("seq"))
         else:
-            emit("player_info", {"accepted": False})
-            # Think of a way to separate returning player from new player using same name
-    
-    @socketio.on("start_game")
+            send_to("player_info", {"accepted": False}, request.sid)
+
+    ## Reconnects to the seat of a resume token, seq is the last game state seen
+    @on("resume")
+    def resume(msg):
+        json_data = decode(msg)
+        resume_session(request.sid, json_data["token"], json_data.get("seq"))
+
+    ## Watches a table without a seat, the client only gets the public game state
+    @on("spectate")
+    def spectate(msg):
+        json_data = decode(msg)
+        table_id = json_data.get("table", DEFAULT_TABLE)
+        if not valid_table_id(table_id):
+            send_to("spectator_info", {"accepted": False}, request.sid)
+            return
+        if not manager.owns(table_id):
+            worker = manager.worker_for(table_id)
+            send_to("spectator_info", {"accepted": False, "worker": worker, "url": worker_urls[worker]}, request.sid)
+            return
+        engine = manager.open_table(table_id)
+        if spectating.get(request.sid) != table_id:
+            protocol = protocols.get(request.sid, JSON)
+            # a viewer watches one table at a time
+            previous = stop_spectating(request.sid, protocol)
+            if previous is not None:
+                leave_room(spectator_room(previous, protocol))
+            spectating[request.sid] = table_id
+            manager.feeds[table_id].viewers[protocol] += 1
+            join_room(spectator_room(table_id, protocol))
+        send_to("spectator_info", {"accepted": True, "table": table_id}, request.sid)
+        emit_spectator_snapshot(engine, request.sid)
+
+    ## Sends a full snapshot to a client that missed a delta
+    @on("request_game_state")
+    def request_game_state():
+        if request.sid in spectating:
+            engine = manager.get(spectating[request.sid])
+            if engine is not None:
+                emit_spectator_snapshot(engine, request.sid)
+            return
+        engine = manager.table_for_session(request.sid)
+        if engine is None:
+            return
+        emit_full_game_state(engine, request.sid)
+
+    @on("start_game")
     def start_game():
-        print("getting everything ready...")
-        player_count = get_player_count()
-        table.update_one({"_id": "positions"}, 
-            [{"$set": 
-                {   "dealer": dealer_position(player_count), 
-                    "sb": sb_position(player_count), 
-                    "bb": bb_position(player_count), 
-                    "utg": utg_position(player_count)
-                }
-            }], upsert=True)
-        table.update_one({"_id": "game_phase"}, 
-            [{"$set": 
-                {"phase": 0}
-            }], upsert=True)
-        print("game time started")
-        start_round()
-
-    @socketio.on("next_turn")
+        engine = manager.table_for_session(request.sid)
+        if engine is None:
+            return
+        dispatch(engine, engine.start_game())
+
+    @on("next_turn")
     def next_turn(info):
-        print("next turn")
-        player_info = json.loads(info)
-        # player folded
-        if player_info["option"] == 4:
-            players.update_one({"position": player_info["position"]}, {"$set": {"status": 2}})
-            table.update_one({"_id": "player_count"}, {"$inc": {"folded": 1}})
-        # player placed bet or went all in or first to act, place action on player
-        elif player_info["option"] == 3 or player_info["option"] == 7 or table.find_one({"_id": "positions"})["action"] == -1:
-            place_bet(player_info["position"], player_info["betSize"])
-            table.update_one({"_id": "positions"}, {"$set": {"action": player_info["position"]}})
-        # handles player check
-        else:
-            place_bet(player_info["position"], player_info["betSize"])
-        
-        # Go to next active player
-        next_player_pos = get_next_active_player()
-        if count_active_players() == 1:
-            pot = table.find_one({"_id": "table_chips"})["pot"]
-            players.update_one({"position": next_player_pos},
-                {"$inc": {
-                    "chips": pot
-                }})
-            table.update_one({"_id": "table_chips"}, {"$set": {"pot": 0}})
-            start_round()
-        elif next_player_pos == table.find_one({"_id": "positions"})["action"]:
-            next_phase()
-        else:
-            table.update_one({"_id": "positions"}, {"$set": {"current_player": next_player_pos}})
-            emit_game_state(show_cards=False)
-            emit("start_turn", {"time": settings.find_one({"_id": "player_settings"})["time_per_hand"]}, room=players.find_one({"position": next_player_pos})["sessionid"])
-
-    @socketio.on("gather_chips")
-    def gather_chips(info):
-        pot = table.find_one({"_id": "table_chips"})["pot"]
-        winners = json.loads(info)["winners"]
-        pot = pot/winners
-        rem = pot%winners
-
-        players.update_one({"sessionid": request.sid},
-                {"$inc": {
-                    "chips": pot
-                }})
-        table.update_one({"_id": "table_chips"}, {"$set": {"pot": 0}})
-        
-        emit_game_state(show_cards=True)
-    
+        player_info = decode(info)
+        engine = manager.table_for_session(request.sid)
+        if engine is None:
+            return
+        # the seat is the session's own, whatever position the client sent
+        position = manager.position_for_session(request.sid)
+        dispatch(engine, engine.next_turn(position, player_info["option"], player_info["betSize"]))
+
     return (app, socketio)
 
-def main():
-    poker_url = "http://localhost:5000"
-    (app, socketio) = create_app(poker_url)
-    socketio.run(app, host="localhost", port=5000, debug=True)
+def run_worker(worker_id, worker_urls, port):
+    # every worker writes its own segments
+    history_dir = os.path.join(os.environ.get("POKER_HISTORY_DIR", "history"), "worker-" + str(worker_id))
+    spectator_rate = os.environ.get("POKER_SPECTATOR_RATE")
+    (app, socketio) = create_app(worker_urls[worker_id], worker_id, worker_urls, history_dir=history_dir,
+        spectator_rate=float(spectator_rate) if spectator_rate else None,
+        startup_budget=float(os.environ.get("POKER_STARTUP_BUDGET", 2.0)))
+    socketio.run(app, host="localhost", port=port, debug=len(worker_urls) == 1)
+
+# Starts one server process per worker on consecutive ports
+def main(workers=1, base_port=5000):
+    worker_urls = ["http://localhost:" + str(base_port + i) for i in range(workers)]
+    if workers == 1:
+        run_worker(0, worker_urls, base_port)
+        return
+    processes = [Process(target=run_worker, args=(i, worker_urls, base_port + i)) for i in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
 
 if __name__ == "__main__":
-    main()
+    main(int(os.environ.get("POKER_WORKERS", 1)))
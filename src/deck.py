@@ -1,51 +1,52 @@
 import random
-from enum import Enum
+from array import array
 
-CLUBS = 0
-DIAMONDS = 1
-HEARTS = 2
-SPADES = 3
+from card import NUM_CARDS, decode_card
 
+# Deck of integer encoded cards (see card.py) held in a 52 byte array.
+# The shuffle is a Fisher-Yates run lazily: every deal swaps a random card from
+# the undealt part of the array into the cursor position, so creating a deck,
+# dealing and burning are all O(1) and only the cards actually used cost anything.
+# Pass a seed or a random.Random to make a hand reproducible.
 class Deck:
-    def __init__(self):
-        self.default = {
-            CLUBS: [2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14],
-            DIAMONDS: [2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14],
-            HEARTS: [2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14],
-            SPADES: [2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14]
-        }
-        self.current = {
-            CLUBS: [2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14],
-            DIAMONDS: [2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14],
-            HEARTS: [2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14],
-            SPADES: [2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14]
-        }
-    
+    def __init__(self, seed=None, rng=None):
+        if rng is None:
+            # without a seed share the module level generator instead of seeding a new one per deck
+            rng = random if seed is None else random.Random(seed)
+        self.rng = rng
+        self.cards = array("B", range(NUM_CARDS))
+        self.position = 0
+
+    def deal(self):
+        position = self.position
+        if position >= NUM_CARDS:
+            raise ValueError("The deck is out of cards")
+        cards = self.cards
+        swap = position + int(self.rng.random() * (NUM_CARDS - position))
+        card = cards[swap]
+        cards[swap] = cards[position]
+        cards[position] = card
+        self.position = position + 1
+        return card
+
+    def burn(self):
+        self.deal()
+
     def deal_cards(self, num_players, num_cards):
-        if num_players * num_cards > 52:
+        if num_players * num_cards > NUM_CARDS - self.position:
             raise ValueError("The deck does not hold enough cards")
-        hands = []
-        curr_hand = []
-        for player in range(num_players):
-            for hand in range(num_cards):
-                curr_hand.append(self.random_card())
-            hands.append(curr_hand)
-            curr_hand = []
-        return hands
+        return [[self.deal() for _ in range(num_cards)] for _ in range(num_players)]
 
+    # Kept for callers that still want a card dict
     def random_card(self):
-        suit = random.choice(list(self.current.keys()))
-        idx = random.randint(0, len(self.current[suit]) - 1)
-        value = self.current[suit].pop(idx)
-        if len(self.current[suit]) == 0:
-            self.current.pop(suit)
-        return {"suit": suit, "value": value, "revealed": False}
+        return decode_card(self.deal())
 
+    # Puts every card back, the next deals continue the shuffle from scratch
     def shuffle(self):
-        self.current = self.default
+        self.position = 0
 
-    def current_deck(self):
-        return self.current
+    def remaining(self):
+        return NUM_CARDS - self.position
 
-    def evaluate_hand(self):
-        pass
\ No newline at end of file
+    def current_deck(self):
+        return self.cards[self.position:].tolist()
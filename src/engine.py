@@ -0,0 +1,475 @@
+import random
+import time
+
+from deck import Deck
+from card import decode_cards
+from showdown import settle
+from hand_history import HandRecord, SeatRecord
+from ledger import Ledger
+from live_hand import LiveHand
+
+## Game Engine ##
+# The betting state machine for one table with no I/O. Every public method
+# takes a player action, updates the TableState and returns the events the
+# action produced as (name, payload, to) tuples, where to is TABLE for
+# everyone at the table or a seat position for a private message.
+# The socket.io server in dealer.py is an adapter that turns these events into
+# emits, a simulation can call the same methods in a loop.
+#
+# A game_state event carries the public view of the table at that moment and,
+# when everyone left is all in, the hole cards the adapter needs for equity.
+# Simulations can pass views=False to skip building it, the payload is then None.
+#
+# Each hand is also recorded as it is played, seats, cards and every action,
+# and handed over as a hand_history event (a HandRecord) once the pot is awarded.
+#
+# Every dealt hand is followed street by street in a LiveHand, each player gets
+# a private hand_strength event with their made hand and draws as the board comes
+# out, and the showdown reads the final strengths from them.
+
+TABLE = -1
+
+## Player Options ##
+CHECK = 1
+BET = 3
+FOLD = 4
+ALL_IN = 7
+
+# Sets initial dealer position
+def dealer_position(player_count):
+    dealer = player_count - 3
+    if dealer < 0:
+        dealer = 0
+    return dealer
+# Sets initial sb position
+def sb_position(player_count):
+    dealer = dealer_position(player_count)
+    if player_count == 2:
+        return dealer
+    elif dealer + 1 > player_count - 1:
+        return 0
+    else:
+        return dealer + 1
+# Sets initial bb position
+def bb_position(player_count):
+    sb = sb_position(player_count)
+    if player_count == 2:
+        return int(not sb)
+    elif sb + 1 > player_count - 1:
+        return 0
+    else:
+        return sb + 1
+# Sets initial utg position
+def utg_position(player_count):
+    bb = bb_position(player_count)
+    if player_count == 2:
+        return int(not bb)
+    elif bb + 1 > player_count - 1:
+        return 0
+    else:
+        return bb + 1
+
+class Engine:
+    # rng seeds the deck of every hand, pass a seeded random.Random to replay a game
+    # schedule is the BlindSchedule that raises the blinds, None keeps them fixed
+    def __init__(self, state, time_per_hand, min_bet, rng=None, views=True, schedule=None):
+        self.state = state
+        self.ledger = Ledger(state)
+        self.time_per_hand = time_per_hand
+        self.min_bet = min_bet
+        self.views = views
+        self.rng = rng if rng is not None else random.Random()
+        self.schedule = schedule
+        self.hand_seed = None
+        self.hand = None
+        self.board = []
+        self.live_hands = {}
+        self.events = []
+
+    def emit(self, name, payload=None, to=TABLE):
+        self.events.append((name, payload, to))
+
+    def emit_game_state(self, show_cards):
+        if not self.views:
+            self.emit("game_state")
+            return
+        in_hand = self.all_in_players()
+        all_in = None
+        if in_hand is not None:
+            all_in = [(seat.name, seat.cards) for seat in in_hand]
+        self.emit("game_state", {"public": self.public_state(show_cards), "all_in": all_in})
+
+    def flush(self):
+        events = self.events
+        self.events = []
+        return events
+
+    ## PUBLIC VIEW ##
+    def get_all_players(self, show_cards):
+        all_players = []
+        for seat in self.state.seats:
+            cards = []
+            for card in seat.cards:
+                if show_cards and seat.status > 2:
+                    cards.append(card)
+                else:
+                    cards.append({"value": None, "suit": None, "revealed": False})
+            all_players.append(
+                {
+                    "name": seat.name, 
+                    "position": seat.position,
+                    "status": seat.status,
+                    "chips": seat.chips, 
+                    "cards": cards,
+                    "betSize": seat.bet_size,
+                    "rebuys": seat.rebuys,
+                    "permissions": seat.permissions
+                }
+            )
+        return all_players
+
+    def get_table_info(self):
+        state = self.state
+        table_info = {}
+        table_info["pot"] = state.pot
+        table_info["minBet"] = self.min_bet
+        table_info["ante"] = state.ante
+        table_info["currentBet"] = state.current_bet
+        table_info["phase"] = state.phase
+        table_info["dealer"] = state.dealer
+        table_info["sb"] = state.sb
+        table_info["bb"] = state.bb
+        table_info["utg"] = state.utg
+        table_info["currentPlayer"] = state.current_player
+        table_info["action"] = state.action
+        table_info["playerCount"] = state.player_count
+        table_info["folded"] = state.folded
+        table_info["eliminated"] = state.eliminated
+        table_info["tableCards"] = []
+        if table_info["phase"] >= 1:
+            table_info["tableCards"] += state.table_cards[:3]
+        if table_info["phase"] >= 2:
+            table_info["tableCards"].append(state.table_cards[3])
+        if table_info["phase"] >= 3:
+            table_info["tableCards"].append(state.table_cards[4])
+        return table_info
+
+    def public_state(self, show_cards):
+        return {"players": self.get_all_players(show_cards), "table": self.get_table_info()}
+
+    # Players still in the hand once no more betting can happen, None otherwise
+    def all_in_players(self):
+        ring = self.state.ring
+        if len(ring.active) < 2 or len(ring.active) - len(ring.all_in) > 1:
+            return None
+        return [self.state.seat(pos) for pos in sorted(ring.active.members)]
+
+    ## HELPER FUNCTIONS ##
+    def player_exists(self, player):
+        return self.state.find_seat(player) is not None
+
+    def get_player_count(self):
+        return self.state.player_count
+
+    # Gets the position of the next player to receive action
+    def get_next_active_player(self):
+        return self.next_to_act(self.state.current_player, self.state.action)
+
+    # First seat in the hand after position that still has a decision to make.
+    # All in seats are passed over, except the one holding the action, reaching
+    # it closes the betting round. When every seat is all in the plain next seat
+    # gets the turn and can only check.
+    def next_to_act(self, position, action=-1):
+        ring = self.state.ring
+        first = ring.active.next_of(position)
+        seat = first
+        while seat in ring.all_in and seat != action:
+            seat = ring.active.next_of(seat)
+            if seat == first:
+                return first
+        return seat
+
+    # Counts players still waiting for action
+    def count_active_players(self):
+        return len(self.state.ring.active)
+
+    def count_playing_players(self):
+        return self.state.ring.playing_count()
+
+    # Rotates positions for the new round
+    # The big blind moves to the next seat dealt in after the old one, sb, dealer
+    # and utg are its neighbours in the blinds ring, which keeps the seat of a
+    # just eliminated blind so it can hold a dead small blind or button.
+    def set_new_positions(self):
+        state = self.state
+        blinds = state.ring.blinds
+        state.bb = state.ring.active.next_of(state.bb)
+        state.sb = blinds.prev_of(state.bb)
+        if self.count_playing_players() > 2:
+            state.dealer = blinds.prev_of(state.sb)
+        else:
+            state.dealer = blinds.prev_of(state.bb)
+        state.seat(state.dealer).b_elim = 0
+        state.utg = blinds.next_of(state.bb)
+        state.action = -1
+
+    # Returns player that should act first
+    def first_to_act(self):
+        state = self.state
+        if state.phase > 0:
+            first = state.ring.active.at_or_after(state.sb)
+        else:
+            first = state.utg
+        if first in state.ring.all_in:
+            return self.next_to_act(first)
+        return first
+
+    # Antes from everyone dealt in, then the blinds. A seat short of either posts
+    # what it has left and is all in, the others still owe the full big blind.
+    def set_blinds(self):
+        state = self.state
+        if state.ante:
+            for position in state.ring.active.members:
+                self.ledger.ante(position, min(state.ante, state.seat(position).chips))
+        self.place_bet(state.sb, min(state.small_blind, state.seat(state.sb).chips))
+        self.place_bet(state.bb, min(state.big_blind, state.seat(state.bb).chips))
+        state.current_bet = state.big_blind
+
+    # Returns the seat's chips, bet, committed total and the pot after the bet
+    def place_bet(self, pos, bet):
+        return self.ledger.bet(pos, bet)
+
+    def start_round(self):
+        state = self.state
+        # Reset table info
+        state.folded = 0
+        state.phase = 0
+        # Reset option selection for players
+        self.emit("reset_option")
+        # what the positions are rotated from, kept for the hand history
+        prev_positions = (state.sb, state.bb)
+        b_elims = [seat.b_elim for seat in state.seats]
+        # Deal the cards
+        self.hand_seed = self.rng.getrandbits(64)
+        deck = Deck(seed=self.hand_seed)
+        hole_cards = deck.deal_cards(self.get_player_count(), 2)
+        player_cards = [decode_cards(hand) for hand in hole_cards]
+        # Deal the table cards
+        board = [deck.deal() for _ in range(5)]
+        state.table_cards = decode_cards(board)
+        self.board = board
+        self.live_hands = {}
+        self.ledger.new_hand()
+        self.raise_blinds()
+        # Check if player is eliminated, else send cards to players
+        for seat in state.seats:
+            # if big blind was recently eliminated
+            if seat.chips <= 0 and seat.position == state.bb or seat.chips <= 0 and seat.position == state.sb:
+                seat.status = 1
+                seat.b_elim = 1
+            # if player was eliminated normally
+            elif seat.chips <= 0:
+                seat.status = 1
+                seat.b_elim = 0
+            # deal the cards
+            else:
+                cards = player_cards[seat.position]
+                seat.cards = cards
+                seat.status = 3
+                self.live_hands[seat.position] = LiveHand(hole_cards[seat.position])
+                self.emit("deal_cards", {"cards": cards}, seat.position)
+        state.ring.rebuild(state.seats)
+
+        # Update player positions
+        self.set_new_positions()
+        first = self.first_to_act()
+        state.current_player = first
+        self.record_hand(hole_cards, board, prev_positions, b_elims)
+        # Set the blinds
+        self.set_blinds()
+
+        self.emit_game_state(False)
+        self.emit_hand_strength()
+        self.emit("start_turn", {"time": self.time_per_hand}, first)
+
+    # Adds the board cards of the new street to every live hand
+    def deal_street(self, phase):
+        cards = self.board[:3] if phase == 1 else self.board[phase + 1:phase + 2]
+        for live_hand in self.live_hands.values():
+            for card in cards:
+                live_hand.add(card)
+
+    def emit_hand_strength(self):
+        if not self.views:
+            return
+        for position in self.state.ring.active.members:
+            live_hand = self.live_hands.get(position)
+            if live_hand is not None:
+                self.emit("hand_strength", live_hand.view(), position)
+
+    # Moves the blinds up by the levels that passed since the last hand
+    def raise_blinds(self):
+        if self.schedule is None:
+            return
+        state = self.state
+        levels = self.schedule.take(state.table_id, time.time())
+        if not levels:
+            return
+        for _ in range(levels):
+            state.small_blind, state.big_blind = self.schedule.next_blinds(state.small_blind, state.big_blind)
+        self.min_bet = state.big_blind
+        self.emit("blind_level", {"smallBlind": state.small_blind, "bigBlind": state.big_blind, "ante": state.ante})
+
+    def record_hand(self, hole_cards, board, prev_positions, b_elims):
+        state = self.state
+        seats = []
+        for seat in state.seats:
+            cards = hole_cards[seat.position] if seat.status == 3 else []
+            seats.append(SeatRecord(seat.position, seat.name, seat.status, b_elims[seat.position], seat.chips, cards))
+        state.hand_started = int(time.time() * 1000)
+        self.hand = HandRecord(state.table_id, self.hand_seed, state.hand_started, (state.dealer, state.sb, state.bb, state.utg),
+            prev_positions, state.small_blind, state.big_blind, seats, board, state.ante)
+
+    # Records who won what and hands the finished record to the adapter
+    def finish_hand(self, awards, winners):
+        hand = self.hand
+        if hand is None:
+            return
+        hand.awards = awards
+        hand.winners = winners
+        for record in hand.seats:
+            record.chips_after = self.state.seat(record.position).chips
+        self.hand = None
+        self.emit("hand_history", hand)
+
+    def next_phase(self):
+        # INITIAL = 0,
+        # FLOP = 1,
+        # TURN = 2,
+        # RIVER = 3
+        # SHOWDOWN = 4
+        state = self.state
+
+        # go to next phase, if next phase is the end, decide the winner of the hand
+        self.emit("reset_option")
+        next_phase = state.phase + 1
+        if next_phase < 4:
+            self.deal_street(next_phase)
+        if next_phase == 4:
+            state.action = -1
+            # pay out the main pot and side pots, set things up for the next round
+            ranking, pots = self.appraise_hands()
+            awards = {}
+            for pot in pots:
+                for position, chips in pot["winners"]:
+                    self.ledger.award(position, chips)
+                    awards[position] = awards.get(position, 0) + chips
+            winners = ranking[0]
+            self.finish_hand(sorted(awards.items()), winners)
+            self.emit_game_state(True)
+            self.emit("declare_winners", {
+                "winners": [state.seat(position).name for position in winners],
+                "pots": [{"amount": pot["amount"], "winners": [state.seat(position).name for position, _ in pot["winners"]]} for pot in pots]
+            })
+            self.start_round()
+        else:
+            state.phase = next_phase
+            first = self.first_to_act()
+            state.current_player = first
+            state.action = -1
+            state.current_bet = 0
+            self.ledger.new_street()
+            self.emit_game_state(False)
+            self.emit_hand_strength()
+            self.emit("start_turn", {"time": self.time_per_hand}, first)
+
+    # Returns the live positions grouped by hand strength, best first, and the
+    # main pot and side pots with the chips each winner takes
+    def appraise_hands(self):
+        live = self.state.ring.active.members
+        if all(position in self.live_hands for position in live):
+            return settle(self.state, {position: self.live_hands[position].strength() for position in live})
+        # a table restored from a snapshot mid hand has no live hands
+        return settle(self.state)
+
+    ## PLAYER ACTIONS ##
+    # Seats a new player, check player_exists first
+    def add_player(self, name, chips, session_id):
+        permissions = "player"
+        if self.get_player_count() == 0:
+            permissions = "host"
+        self.state.add_seat(name, chips, permissions, session_id)
+        self.emit_game_state(False)
+        return self.flush()
+
+    def start_game(self):
+        state = self.state
+        player_count = self.get_player_count()
+        state.dealer = dealer_position(player_count)
+        state.sb = sb_position(player_count)
+        state.bb = bb_position(player_count)
+        state.utg = utg_position(player_count)
+        state.phase = 0
+        if self.schedule is not None:
+            self.schedule.start(state.table_id, time.time())
+        self.start_round()
+        return self.flush()
+
+    # Picks a table restored by recovery.py back up: deals a new hand when asked
+    # to, otherwise announces the state and the turn of the hand in progress
+    def resume(self, new_hand):
+        state = self.state
+        if new_hand:
+            self.start_round()
+            return self.flush()
+        self.emit_game_state(False)
+        if len(state.ring.active) > 1 and state.seat(state.current_player).status == 3:
+            self.emit("start_turn", {"time": self.time_per_hand}, state.current_player)
+        return self.flush()
+
+    def next_turn(self, position, option, bet_size):
+        state = self.state
+        # only the player to act can act, a late click after the clock ran out is dropped
+        if position != state.current_player or state.seat(position).status != 3:
+            return self.flush()
+        # player folded
+        if option == FOLD:
+            state.seat(position).status = 2
+            state.folded += 1
+            state.ring.fold(position)
+        # player placed bet or went all in or first to act, place action on player
+        elif option == BET or option == ALL_IN or state.action == -1:
+            self.place_bet(position, bet_size)
+            state.action = position
+        # handles player check
+        else:
+            self.place_bet(position, bet_size)
+
+        if self.hand is not None:
+            self.hand.actions.append((state.phase, position, option, bet_size))
+
+        # Go to next active player
+        next_player_pos = self.get_next_active_player()
+        if self.count_active_players() == 1:
+            won = state.pot
+            self.ledger.award(next_player_pos, won)
+            self.finish_hand([(next_player_pos, won)], [next_player_pos])
+            self.start_round()
+        elif next_player_pos == state.action:
+            self.next_phase()
+        else:
+            state.current_player = next_player_pos
+            self.emit_game_state(False)
+            self.emit("start_turn", {"time": self.time_per_hand}, next_player_pos)
+        return self.flush()
+
+    # The player to act ran out of time, checks if they can and folds otherwise.
+    # An all in seat is never folded, it keeps its claim on the pots it is in.
+    def timeout(self, position):
+        state = self.state
+        if position != state.current_player or state.seat(position).status != 3:
+            return self.flush()
+        seat = state.seat(position)
+        if seat.bet_size >= state.current_bet or seat.chips <= 0:
+            return self.next_turn(position, CHECK, seat.bet_size)
+        return self.next_turn(position, FOLD, seat.bet_size)
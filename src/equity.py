@@ -0,0 +1,234 @@
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+from card import encode_cards, NUM_CARDS
+from evaluator import evaluate
+from preflop_table import load_table
+from hand_cache import LRUCache, canonical_cards
+
+## Equity ##
+# Estimates each player's chance to win or tie a hand from their hole cards and
+# the known board by sampling the rest of the deck.
+#
+# Sampling is split into rounds of fixed size batches spread over a process
+# pool. Every batch runs on its own RNG stream derived from the seed and its
+# batch number, so a run can be reproduced from its seed. After every round the
+# standard error of each player's equity is checked and sampling stops once the
+# confidence interval is inside the target.
+
+# z score for a 95% confidence interval
+Z_95 = 1.96
+
+_pool = None
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _pool
+
+def _to_ints(cards):
+    if cards and isinstance(cards[0], dict):
+        return encode_cards(cards)
+    return list(cards)
+
+def remaining_cards(hands, board):
+    used = set(board)
+    for hand in hands:
+        used.update(hand)
+    if len(used) != len(board) + sum(len(hand) for hand in hands):
+        raise ValueError("The same card was dealt twice")
+    return [card for card in range(NUM_CARDS) if card not in used]
+
+def stream_seed(seed, stream):
+    # independent 64 bit seed for every batch
+    return random.Random(seed * 1000003 + stream).getrandbits(64)
+
+# Scores one complete board into the running per player totals
+def _score(hands, full_board, strengths, wins, ties, shares):
+    best = -1
+    for i in range(len(hands)):
+        strength = evaluate(hands[i] + full_board)
+        strengths[i] = strength
+        if strength > best:
+            best = strength
+    winners = [i for i in range(len(hands)) if strengths[i] == best]
+    if len(winners) == 1:
+        wins[winners[0]] += 1
+        shares[winners[0]] += 1
+    else:
+        for i in winners:
+            ties[i] += 1
+            shares[i] += 1 / len(winners)
+
+# Runs one batch of samples, returns per player [wins, ties, equity shares]
+def simulate(hands, board, deck, samples, seed):
+    rng = random.Random(seed)
+    missing = 5 - len(board)
+    num_players = len(hands)
+    wins = [0] * num_players
+    ties = [0] * num_players
+    shares = [0.0] * num_players
+    strengths = [0] * num_players
+    for _ in range(samples):
+        _score(hands, board + rng.sample(deck, missing), strengths, wins, ties, shares)
+    return wins, ties, shares
+
+# Scores every board completion whose first new card is deck[first], so the full
+# enumeration can be split across processes by first card
+def enumerate_boards(hands, board, deck, first):
+    missing = 5 - len(board)
+    num_players = len(hands)
+    wins = [0] * num_players
+    ties = [0] * num_players
+    shares = [0.0] * num_players
+    strengths = [0] * num_players
+    count = 0
+    start = board + [deck[first]]
+    for rest in combinations(deck[first + 1:], missing - 1):
+        _score(hands, start + list(rest), strengths, wins, ties, shares)
+        count += 1
+    return wins, ties, shares, count
+
+def _result(wins, ties, shares, samples):
+    players = []
+    margin = 0
+    for i in range(len(wins)):
+        equity = shares[i] / samples
+        players.append({
+            "win": 100 * wins[i] / samples,
+            "tie": 100 * ties[i] / samples,
+            "equity": 100 * equity
+        })
+        margin = max(margin, Z_95 * math.sqrt(equity * (1 - equity) / samples))
+    return {"players": players, "samples": samples, "margin": 100 * margin}
+
+# hands: list of hole card lists, board: 0, 3, 4 or 5 known cards. Cards may be
+# dicts or encoded ints. target is the 95% margin of error (in percent) to stop at.
+def monte_carlo_equity(hands, board=(), max_samples=200000, target=0.5, batch_size=5000, processes=None, seed=None):
+    hands = [_to_ints(hand) for hand in hands]
+    board = _to_ints(list(board))
+    deck = remaining_cards(hands, board)
+    if seed is None:
+        seed = random.getrandbits(32)
+    if processes is None:
+        processes = os.cpu_count()
+    # a complete board needs no sampling
+    if len(board) == 5:
+        return _result(*simulate(hands, board, deck, 1, seed), 1)
+
+    num_players = len(hands)
+    wins = [0] * num_players
+    ties = [0] * num_players
+    shares = [0.0] * num_players
+    samples = 0
+    stream = 0
+    while samples < max_samples:
+        batches = min(processes, math.ceil((max_samples - samples) / batch_size))
+        if processes > 1:
+            futures = [get_pool().submit(simulate, hands, board, deck, batch_size, stream_seed(seed, stream + i)) for i in range(batches)]
+            results = [future.result() for future in futures]
+        else:
+            results = [simulate(hands, board, deck, batch_size, stream_seed(seed, stream))]
+        stream += batches
+        for batch_wins, batch_ties, batch_shares in results:
+            for i in range(num_players):
+                wins[i] += batch_wins[i]
+                ties[i] += batch_ties[i]
+                shares[i] += batch_shares[i]
+            samples += batch_size
+        if _result(wins, ties, shares, samples)["margin"] <= target:
+            break
+    return _result(wins, ties, shares, samples)
+
+# Exact equity from every possible completion of the board, 1,712,304 boards
+# heads up preflop, 990 on the flop and 44 on the turn
+def exact_equity(hands, board=(), processes=None):
+    hands = [_to_ints(hand) for hand in hands]
+    board = _to_ints(list(board))
+    deck = remaining_cards(hands, board)
+    if processes is None:
+        processes = os.cpu_count()
+    if len(board) == 5:
+        return _result(*simulate(hands, board, deck, 1, 0), 1)
+
+    missing = 5 - len(board)
+    firsts = range(len(deck) - missing + 1)
+    if processes > 1 and missing > 2:
+        futures = [get_pool().submit(enumerate_boards, hands, board, deck, first) for first in firsts]
+        results = [future.result() for future in futures]
+    else:
+        results = [enumerate_boards(hands, board, deck, first) for first in firsts]
+
+    num_players = len(hands)
+    wins = [0] * num_players
+    ties = [0] * num_players
+    shares = [0.0] * num_players
+    boards = 0
+    for part_wins, part_ties, part_shares, count in results:
+        for i in range(num_players):
+            wins[i] += part_wins[i]
+            ties[i] += part_ties[i]
+            shares[i] += part_shares[i]
+        boards += count
+    result = _result(wins, ties, shares, boards)
+    result["margin"] = 0
+    return result
+
+# Heads up preflop equity of two concrete hands, every board is enumerated. The
+# preflop table only has class averages, AhKh vs 3h2h is well above AKs vs 32s
+# because the deuce and trey block the ace high flushes, so it is not used here
+def preflop_equity(hand_a, hand_b, processes=None):
+    return exact_equity([hand_a, hand_b], processes=processes)
+
+# Class vs class equity ("AKs vs QQ") from the preflop table, classes as given by
+# preflop_table.hand_class. None when the table has not been built.
+def class_equity(class_a, class_b):
+    table = load_table()
+    if table is None:
+        return None
+    entry = table.lookup_class(class_a, class_b)
+    win_b = 100 - entry["win"] - entry["tie"]
+    return {
+        "players": [entry, {"win": win_b, "tie": entry["tie"], "equity": win_b + entry["tie"] / 2}],
+        "samples": 0,
+        "margin": 0
+    }
+
+# Equity that is quick to get: the flop on is enumerated exactly (990 boards at
+# most, a few ms) and earlier preflop results come from the cache. None when the
+# spot still has to be worked out.
+def known_equity(hands, board=()):
+    hands = [_to_ints(hand) for hand in hands]
+    board = _to_ints(list(board))
+    if len(board) >= 3:
+        return exact_equity(hands, board, processes=1)
+    return equity_cache.get(canonical_cards(hands + [board]))
+
+# Works out a spot known_equity does not have: heads up preflop is enumerated
+# exactly, bigger preflop spots are sampled
+def sample_equity(hands, board=(), processes=None):
+    if len(hands) == 2 and not board:
+        return preflop_equity(hands[0], hands[1], processes=processes)
+    return monte_carlo_equity(hands, board, processes=processes)
+
+# Equity behind a cache keyed by the suit isomorphic deal, so a spot that comes
+# up again with the suits renamed is answered right away. run(function, args)
+# calls sample_equity when given, e.g. a threadpool's apply, the cache itself is
+# only touched by the caller.
+equity_cache = LRUCache(4096)
+
+def cached_equity(hands, board=(), processes=None, run=None):
+    hands = [_to_ints(hand) for hand in hands]
+    board = _to_ints(list(board))
+    result = known_equity(hands, board)
+    if result is None:
+        if run is None:
+            result = sample_equity(hands, board, processes)
+        else:
+            result = run(sample_equity, (hands, board, processes))
+        equity_cache.put(canonical_cards(hands + [board]), result)
+    return result
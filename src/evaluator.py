@@ -0,0 +1,222 @@
+import hashlib
+import marshal
+import os
+
+## Hand Evaluator ##
+# Evaluates 5 to 7 integer encoded cards (see card.py) and returns a single int
+# strength, a larger number is always a stronger hand.
+#
+# Strength layout: category << 20 | five 4-bit rank slots (most significant first)
+# Categories:
+# 0: high card
+# 1: pair
+# 2: two pair
+# 3: trips
+# 4: straight
+# 5: flush
+# 6: full house
+# 7: quads
+# 8: straight flush (royal flush is the ace high straight flush)
+#
+# Two tables do all of the work:
+#   RANK_TABLE  - rank multiset -> strength, keyed by the sum of 5**rank over all cards
+#   FLUSH_TABLE - 13 bit rank mask of the flush suit -> strength
+# A hand only needs the flush table when one suit holds 5+ cards, which is found
+# with a second key summing 8**suit per card.
+#
+# Building the tables takes most of a second, so the first build is cached
+# (marshal) in the user cache directory, or POKER_CACHE_DIR when it is set, and
+# later imports load it from there. The cache file is named after a hash of this
+# file, any change to the code that builds the tables starts a new one.
+
+HIGH_CARD = 0
+PAIR = 1
+TWO_PAIR = 2
+TRIPS = 3
+STRAIGHT = 4
+FLUSH = 5
+FULL_HOUSE = 6
+QUADS = 7
+STRAIGHT_FLUSH = 8
+
+CATEGORY_NAMES = ["high card", "pair", "two pair", "trips", "straight", "flush", "full house", "quads", "straight flush"]
+
+CATEGORY_SHIFT = 20
+
+# per card keys, indexed by the encoded card
+RANK_KEY = [5 ** (card >> 2) for card in range(52)]
+SUIT_KEY = [1 << (3 * (card & 3)) for card in range(52)]
+RANK_BIT = [1 << (card >> 2) for card in range(52)]
+
+def make_strength(category, ranks):
+    # ranks are rank indexes (0 = deuce), padded out to 5 slots
+    strength = category
+    for i in range(5):
+        strength <<= 4
+        if i < len(ranks):
+            strength |= ranks[i] + 2
+    return strength
+
+def strength_category(strength):
+    return strength >> CATEGORY_SHIFT
+
+def strength_name(strength):
+    return CATEGORY_NAMES[strength >> CATEGORY_SHIFT]
+
+# Returns the top rank index of the best straight in a 13 bit rank mask, -1 if none
+def straight_top(mask):
+    # ace plays low in the wheel
+    if mask & 0x1000:
+        mask = (mask << 1) | 1
+    else:
+        mask <<= 1
+    for top in range(13, 3, -1):
+        run = 0x1f << (top - 4)
+        if mask & run == run:
+            return top - 1
+    return -1
+
+def _top_bits(mask, count):
+    ranks = []
+    rank = 12
+    while rank >= 0 and len(ranks) < count:
+        if mask & (1 << rank):
+            ranks.append(rank)
+        rank -= 1
+    return ranks
+
+def _flush_strength(mask):
+    top = straight_top(mask)
+    if top >= 0:
+        return make_strength(STRAIGHT_FLUSH, [top])
+    return make_strength(FLUSH, _top_bits(mask, 5))
+
+def _rank_strength(counts):
+    mask = 0
+    quads = []
+    trips = []
+    pairs = []
+    singles = []
+    for rank in range(12, -1, -1):
+        count = counts[rank]
+        if count:
+            mask |= 1 << rank
+        if count == 4:
+            quads.append(rank)
+        elif count == 3:
+            trips.append(rank)
+        elif count == 2:
+            pairs.append(rank)
+        elif count == 1:
+            singles.append(rank)
+
+    if quads:
+        kicker = _top_bits(mask & ~(1 << quads[0]), 1)
+        return make_strength(QUADS, [quads[0]] + kicker)
+    if trips and (len(trips) > 1 or pairs):
+        pair = max(trips[1:] + pairs)
+        return make_strength(FULL_HOUSE, [trips[0], pair])
+    top = straight_top(mask)
+    if top >= 0:
+        return make_strength(STRAIGHT, [top])
+    if trips:
+        return make_strength(TRIPS, [trips[0]] + singles[:2])
+    if len(pairs) > 1:
+        kicker = max(pairs[2:] + singles[:1])
+        return make_strength(TWO_PAIR, pairs[:2] + [kicker])
+    if pairs:
+        return make_strength(PAIR, pairs[:1] + singles[:3])
+    return make_strength(HIGH_CARD, singles[:5])
+
+def _rank_multisets(num_cards):
+    # yields (counts, rank key) for every multiset of num_cards ranks, at most 4 of each
+    counts = [0] * 13
+    def walk(rank, left, key):
+        if left == 0:
+            yield counts, key
+            return
+        if rank == 13 or left > 4 * (13 - rank):
+            return
+        for count in range(min(4, left), -1, -1):
+            counts[rank] = count
+            yield from walk(rank + 1, left - count, key + count * 5 ** rank)
+        counts[rank] = 0
+    return walk(0, num_cards, 0)
+
+def _build_tables():
+    rank_table = {}
+    for num_cards in range(5, 8):
+        for counts, key in _rank_multisets(num_cards):
+            rank_table[key] = _rank_strength(counts)
+
+    flush_table = [0] * 8192
+    for mask in range(8192):
+        if bin(mask).count("1") >= 5:
+            flush_table[mask] = _flush_strength(mask)
+
+    # suit key -> suit holding 5 or more cards, -1 when there is no flush
+    flush_suit = [-1] * (7 * 512 + 1)
+    for key in range(len(flush_suit)):
+        for suit in range(4):
+            if (key >> (3 * suit)) & 7 >= 5:
+                flush_suit[key] = suit
+    return rank_table, flush_table, flush_suit
+
+def _cache_path():
+    directory = os.environ.get("POKER_CACHE_DIR")
+    if directory is None:
+        directory = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache")), "poker-backend")
+    with open(__file__, "rb") as source:
+        digest = hashlib.sha1(source.read()).hexdigest()[:16]
+    return os.path.join(directory, "evaluator-" + digest + ".bin")
+
+def _load_tables():
+    try:
+        path = _cache_path()
+    except OSError:
+        return _build_tables()
+    try:
+        with open(path, "rb") as cache:
+            return marshal.loads(cache.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    tables = _build_tables()
+    # written to a temporary file first, other processes may be loading it
+    temp_path = path + "." + str(os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_path, "wb") as cache:
+            marshal.dump(tables, cache)
+        os.replace(temp_path, path)
+    except OSError:
+        pass
+    return tables
+
+RANK_TABLE, FLUSH_TABLE, FLUSH_SUIT = _load_tables()
+
+def evaluate(cards):
+    rank_key = 0
+    suit_key = 0
+    for card in cards:
+        rank_key += RANK_KEY[card]
+        suit_key += SUIT_KEY[card]
+    suit = FLUSH_SUIT[suit_key]
+    if suit < 0:
+        return RANK_TABLE[rank_key]
+    mask = 0
+    for card in cards:
+        if card & 3 == suit:
+            mask |= RANK_BIT[card]
+    return FLUSH_TABLE[mask]
+
+def evaluate7(a, b, c, d, e, f, g):
+    key = RANK_KEY
+    suit_key = SUIT_KEY
+    suit = FLUSH_SUIT[suit_key[a] + suit_key[b] + suit_key[c] + suit_key[d] + suit_key[e] + suit_key[f] + suit_key[g]]
+    if suit < 0:
+        return RANK_TABLE[key[a] + key[b] + key[c] + key[d] + key[e] + key[f] + key[g]]
+    mask = 0
+    for card in (a, b, c, d, e, f, g):
+        if card & 3 == suit:
+            mask |= RANK_BIT[card]
+    return FLUSH_TABLE[mask]
@@ -0,0 +1,64 @@
+import itertools
+from collections import OrderedDict
+from threading import Lock
+
+## Suit Isomorphism ##
+# Deals that only differ by renaming suits play out the same, AsKs vs QhQd on
+# 2s7s9c has the same equity as AhKh vs QsQc on 2h7h9d. canonical_cards maps
+# every such deal to one key: each suit permutation is applied, the cards of
+# every group (a player's hand, the board) are sorted and the smallest result
+# is kept. Groups stay in order, so results per player line up with the key.
+
+SUIT_PERMUTATIONS = list(itertools.permutations(range(4)))
+
+def canonical_cards(groups):
+    best = None
+    for permutation in SUIT_PERMUTATIONS:
+        key = tuple(tuple(sorted(card - (card & 3) + permutation[card & 3] for card in group)) for group in groups)
+        if best is None or key < best:
+            best = key
+    return best
+
+## LRU Cache ##
+# Bounded cache that drops the least recently used entry when full and counts
+# hits and misses. Without gevent equity is worked out on threads of its own,
+# so every access takes the lock. Under gevent the cache is only used from the
+# hub, a patched lock does not guard against the threadpool's real threads.
+class LRUCache:
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
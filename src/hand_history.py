@@ -0,0 +1,217 @@
+import glob
+import mmap
+import os
+import struct
+
+## Hand History ##
+# Every finished hand is appended to a binary log as one record. The log is a
+# directory of segment files, a new segment is started once the current one
+# reaches segment_bytes, and segments are never modified after that.
+#
+# Segment: b"PHH1" followed by records
+# Record:  u32 length of the rest of the record
+#          u64 deck seed, u64 start time (epoch ms)
+#          u8 dealer, u8 sb, u8 bb, u8 utg, u8 sb and u8 bb of the hand before,
+#          u8 seat count, i32 small blind, i32 big blind
+#          u8 table id length, table id (utf-8)
+#          per seat:   u8 position, u8 status when dealt, u8 b_elim before the deal,
+#                      i32 chips before, i32 chips after, u8 u8 hole cards,
+#                      u8 name length, name (utf-8)
+#          5 x u8 board
+#          u16 action count, per action: u8 phase, u8 position, u8 option, i32 bet size
+#          u8 award count, per award: u8 position, i32 chips won
+#          u8 winner count, per winner: u8 position
+#          i32 ante (missing from records written before antes, read as 0)
+#
+# Cards are the single byte codes from card.py, NO_CARD marks a seat that was
+# not dealt in. Options are the engine's player options (CHECK, BET, FOLD, ALL_IN).
+# The previous blinds and b_elim flags are what the engine rotates positions
+# from, so a single record is enough to replay its hand (see replay.py).
+
+MAGIC = b"PHH1"
+NO_CARD = 255
+# names and table ids are stored behind a u8 length
+MAX_NAME_BYTES = 255
+
+LENGTH = struct.Struct("<I")
+HEADER = struct.Struct("<QQBBBBBBBiiB")
+SEAT = struct.Struct("<BBBiiBBB")
+BOARD = struct.Struct("<5B")
+COUNT = struct.Struct("<H")
+ACTION = struct.Struct("<BBBi")
+AWARD = struct.Struct("<Bi")
+ANTE = struct.Struct("<i")
+
+class SeatRecord:
+    __slots__ = ("position", "name", "status", "b_elim", "chips_before", "chips_after", "cards")
+
+    def __init__(self, position, name, status, b_elim, chips_before, cards, chips_after=0):
+        self.position = position
+        self.name = name
+        self.status = status
+        self.b_elim = b_elim
+        self.chips_before = chips_before
+        self.chips_after = chips_after
+        # card codes, empty when the seat was not dealt in
+        self.cards = cards
+
+class HandRecord:
+    __slots__ = ("table_id", "seed", "started", "dealer", "sb", "bb", "utg", "prev_sb", "prev_bb",
+        "small_blind", "big_blind", "ante", "seats", "board", "actions", "awards", "winners")
+
+    def __init__(self, table_id, seed, started, positions, prev_positions, small_blind, big_blind, seats, board, ante=0):
+        self.table_id = table_id
+        self.seed = seed
+        self.started = started
+        self.dealer, self.sb, self.bb, self.utg = positions
+        self.prev_sb, self.prev_bb = prev_positions
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.ante = ante
+        self.seats = seats
+        self.board = board
+        # (phase, position, option, bet size)
+        self.actions = []
+        # (position, chips won)
+        self.awards = []
+        self.winners = []
+
+def encode_record(hand):
+    table_id = hand.table_id.encode()
+    parts = [HEADER.pack(hand.seed, hand.started, hand.dealer, hand.sb, hand.bb, hand.utg, hand.prev_sb, hand.prev_bb,
+        len(hand.seats), int(hand.small_blind), int(hand.big_blind), len(table_id)), table_id]
+    for seat in hand.seats:
+        name = seat.name.encode()
+        cards = seat.cards if seat.cards else (NO_CARD, NO_CARD)
+        parts.append(SEAT.pack(seat.position, seat.status, seat.b_elim, int(seat.chips_before), int(seat.chips_after), cards[0], cards[1], len(name)))
+        parts.append(name)
+    parts.append(BOARD.pack(*hand.board))
+    parts.append(COUNT.pack(len(hand.actions)))
+    parts += [ACTION.pack(phase, position, option, int(bet)) for phase, position, option, bet in hand.actions]
+    parts.append(bytes([len(hand.awards)]))
+    parts += [AWARD.pack(position, int(amount)) for position, amount in hand.awards]
+    parts.append(bytes([len(hand.winners)] + hand.winners))
+    parts.append(ANTE.pack(int(hand.ante)))
+    body = b"".join(parts)
+    return LENGTH.pack(len(body)) + body
+
+# Decodes the record body from offset up to end of buffer
+def decode_record(buffer, offset, end):
+    seed, started, dealer, sb, bb, utg, prev_sb, prev_bb, seat_count, small_blind, big_blind, id_length = HEADER.unpack_from(buffer, offset)
+    offset += HEADER.size
+    table_id = bytes(buffer[offset:offset + id_length]).decode()
+    offset += id_length
+    seats = []
+    for _ in range(seat_count):
+        position, status, b_elim, chips_before, chips_after, card_a, card_b, name_length = SEAT.unpack_from(buffer, offset)
+        offset += SEAT.size
+        name = bytes(buffer[offset:offset + name_length]).decode()
+        offset += name_length
+        cards = [] if card_a == NO_CARD else [card_a, card_b]
+        seats.append(SeatRecord(position, name, status, b_elim, chips_before, cards, chips_after))
+    board = list(BOARD.unpack_from(buffer, offset))
+    offset += BOARD.size
+    hand = HandRecord(table_id, seed, started, (dealer, sb, bb, utg), (prev_sb, prev_bb), small_blind, big_blind, seats, board)
+    (action_count,) = COUNT.unpack_from(buffer, offset)
+    offset += COUNT.size
+    for _ in range(action_count):
+        hand.actions.append(ACTION.unpack_from(buffer, offset))
+        offset += ACTION.size
+    award_count = buffer[offset]
+    offset += 1
+    for _ in range(award_count):
+        hand.awards.append(AWARD.unpack_from(buffer, offset))
+        offset += AWARD.size
+    winner_count = buffer[offset]
+    hand.winners = list(buffer[offset + 1:offset + 1 + winner_count])
+    offset += 1 + winner_count
+    if offset + ANTE.size <= end:
+        (hand.ante,) = ANTE.unpack_from(buffer, offset)
+    return hand
+
+def segment_paths(directory):
+    return sorted(glob.glob(os.path.join(directory, "**", "hands-*.phh"), recursive=True))
+
+# Offset just past the last complete record, a crash can leave half a record behind
+def complete_length(buffer):
+    offset = len(MAGIC)
+    while offset + LENGTH.size <= len(buffer):
+        (length,) = LENGTH.unpack_from(buffer, offset)
+        if offset + LENGTH.size + length > len(buffer):
+            break
+        offset += LENGTH.size + length
+    return offset
+
+class HandHistoryWriter:
+    def __init__(self, directory, segment_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+        paths = glob.glob(os.path.join(directory, "hands-*.phh"))
+        self.segment = max([int(os.path.basename(path)[6:-4]) for path in paths], default=0)
+        self.file = None
+        self.size = 0
+        if self.segment:
+            self.reopen()
+        else:
+            self.rotate()
+
+    def path(self, segment):
+        return os.path.join(self.directory, "hands-{:08d}.phh".format(segment))
+
+    # Continues the newest segment after dropping any partial record at its end
+    def reopen(self):
+        path = self.path(self.segment)
+        with open(path, "rb") as segment:
+            data = segment.read()
+        if data[:len(MAGIC)] != MAGIC:
+            self.rotate()
+            return
+        self.size = complete_length(data)
+        self.file = open(path, "r+b")
+        self.file.truncate(self.size)
+        self.file.seek(self.size)
+
+    def rotate(self):
+        if self.file is not None:
+            self.file.close()
+        self.segment += 1
+        self.file = open(self.path(self.segment), "wb")
+        self.file.write(MAGIC)
+        self.size = len(MAGIC)
+
+    def append(self, hand):
+        record = encode_record(hand)
+        if self.size + len(record) > self.segment_bytes and self.size > len(MAGIC):
+            self.rotate()
+        self.file.write(record)
+        self.file.flush()
+        self.size += len(record)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+# Streams the records of one segment, the file is memory mapped so only the
+# pages being decoded are read in
+def read_segment(path):
+    with open(path, "rb") as segment:
+        if os.fstat(segment.fileno()).st_size <= len(MAGIC):
+            return
+        with mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if buffer[:len(MAGIC)] != MAGIC:
+                raise ValueError(path + " is not a hand history segment")
+            offset = len(MAGIC)
+            size = len(buffer)
+            while offset + LENGTH.size <= size:
+                (length,) = LENGTH.unpack_from(buffer, offset)
+                offset += LENGTH.size
+                if offset + length > size:
+                    break
+                yield decode_record(buffer, offset, offset + length)
+                offset += length
+
+def read_hands(directory):
+    for path in segment_paths(directory):
+        yield from read_segment(path)
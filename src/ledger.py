@@ -0,0 +1,56 @@
+## Chip Ledger ##
+# Every chip movement of a table goes through one of these methods, which move a
+# seat's chips, its bet on the current street, its committed total for the hand
+# and the pot together and return the values they end up at. A table's actions
+# run one at a time, so nothing can slip in between the parts of an update, and
+# the WriteBehindStore persists the result with the rest of the table snapshot.
+#
+# committed is what a seat has put into the pot over the whole hand, the side
+# pots at showdown are built from it.
+class Ledger:
+    def __init__(self, state):
+        self.state = state
+
+    # Raises the seat's bet on this street to bet, returns (chips, bet_size, committed, pot)
+    def bet(self, position, bet):
+        state = self.state
+        seat = state.seat(position)
+        amount = bet - seat.bet_size
+        seat.chips -= amount
+        seat.bet_size = bet
+        seat.committed += amount
+        state.pot += amount
+        # a short all in call does not lower the bet the others face
+        state.current_bet = max(state.current_bet, bet)
+        state.ring.update_chips(seat)
+        return seat.chips, seat.bet_size, seat.committed, state.pot
+
+    # Posts an ante, dead money that does not count toward the seat's bet on the
+    # street, returns (chips, committed, pot)
+    def ante(self, position, amount):
+        state = self.state
+        seat = state.seat(position)
+        seat.chips -= amount
+        seat.committed += amount
+        state.pot += amount
+        state.ring.update_chips(seat)
+        return seat.chips, seat.committed, state.pot
+
+    # Pays amount out of the pot to the seat, returns (chips, pot)
+    def award(self, position, amount):
+        state = self.state
+        seat = state.seat(position)
+        seat.chips += amount
+        state.pot -= amount
+        state.ring.update_chips(seat)
+        return seat.chips, state.pot
+
+    # Clears the street bets, the chips stay in the pot
+    def new_street(self):
+        for seat in self.state.seats:
+            seat.bet_size = 0
+
+    def new_hand(self):
+        for seat in self.state.seats:
+            seat.bet_size = 0
+            seat.committed = 0
@@ -0,0 +1,71 @@
+from evaluator import (RANK_KEY, SUIT_KEY, RANK_BIT, RANK_TABLE, FLUSH_TABLE, FLUSH_SUIT, STRAIGHT, FLUSH,
+    _rank_strength, straight_top, strength_category, strength_name)
+
+## Live Hands ##
+# A player's hand as the board comes out. Each card updates the rank counts, the
+# rank and suit keys of the evaluator tables and the rank mask of every suit, so
+# adding a card is O(1) and reading the current strength is a table lookup once
+# there are 5 cards (the preflop and flop partial hands fall back to
+# _rank_strength, 13 ranks at most). At showdown all 7 cards are in and
+# strength() is the same value evaluate7 returns.
+#
+# Draws are read off the same masks: a suit holding 4 cards is a flush draw and
+# every missing rank that completes a straight is a straight out.
+class LiveHand:
+    __slots__ = ("counts", "suit_counts", "suit_masks", "mask", "rank_key", "suit_key", "size")
+
+    def __init__(self, cards=()):
+        self.counts = [0] * 13
+        self.suit_counts = [0] * 4
+        self.suit_masks = [0] * 4
+        self.mask = 0
+        self.rank_key = 0
+        self.suit_key = 0
+        self.size = 0
+        for card in cards:
+            self.add(card)
+
+    def add(self, card):
+        suit = card & 3
+        self.counts[card >> 2] += 1
+        self.suit_counts[suit] += 1
+        self.suit_masks[suit] |= RANK_BIT[card]
+        self.mask |= RANK_BIT[card]
+        self.rank_key += RANK_KEY[card]
+        self.suit_key += SUIT_KEY[card]
+        self.size += 1
+
+    def strength(self):
+        if self.size < 5:
+            return _rank_strength(self.counts)
+        suit = FLUSH_SUIT[self.suit_key]
+        if suit >= 0:
+            return FLUSH_TABLE[self.suit_masks[suit]]
+        return RANK_TABLE[self.rank_key]
+
+    # Returns [{"draw", "outs"}] for the draws to a better category, empty on the river
+    def draws(self):
+        if self.size >= 7:
+            return []
+        category = strength_category(self.strength())
+        draws = []
+        flush_suit = -1
+        if category < FLUSH:
+            for suit in range(4):
+                if self.suit_counts[suit] == 4:
+                    flush_suit = suit
+                    draws.append({"draw": "flush", "outs": 9})
+        if category < STRAIGHT:
+            ranks = [rank for rank in range(13) if not self.mask >> rank & 1 and straight_top(self.mask | 1 << rank) >= 0]
+            if ranks:
+                outs = 4 * len(ranks)
+                # the card of each rank in the flush suit is already counted with the flush draw
+                if flush_suit >= 0:
+                    outs -= len(ranks)
+                draws.append({"draw": "straight" if len(ranks) > 1 else "gutshot", "outs": outs})
+        return draws
+
+    # The hand_strength payload for the owner of the hand
+    def view(self):
+        draws = self.draws()
+        return {"hand": strength_name(self.strength()), "draws": draws, "outs": sum(draw["outs"] for draw in draws)}
@@ -0,0 +1,177 @@
+import bisect
+import json
+import threading
+import time
+
+## Metrics ##
+# Counters and histograms served in the Prometheus text format from /metrics.
+#
+# Socket handlers are wrapped with instrument() which times them and tracks, per
+# event, how many DB calls and emits the handler made and how large the emitted
+# payloads were. Collections are wrapped with InstrumentedCollection so every
+# Mongo call is counted and timed, and attributed to the handler running it.
+#
+# Updates are plain attribute increments with no locks, the server runs on
+# gevent so a handler is never preempted half way through one. Payload sizes
+# are only measured on every sample_rate-th emit since it costs a serialization.
+
+LATENCY_BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5]
+COUNT_BUCKETS = [0, 1, 2, 3, 5, 8, 13, 21, 34]
+BYTES_BUCKETS = [64, 256, 1024, 4096, 16384, 65536, 262144]
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(name, value) for name, value in zip(names, values)) + "}"
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, labels=(), amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def expose(self):
+        lines = ["# HELP {} {}".format(self.name, self.help_text), "# TYPE {} counter".format(self.name)]
+        for labels, value in self.values.items():
+            lines.append("{}{} {}".format(self.name, _label_text(self.labels, labels), value))
+        return lines
+
+class Gauge(Counter):
+    def set(self, value, labels=()):
+        self.values[labels] = value
+
+    def expose(self):
+        lines = super().expose()
+        lines[1] = "# TYPE {} gauge".format(self.name)
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, buckets, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+        # labels -> [bucket counts..., +Inf count, sum]
+        self.values = {}
+
+    def observe(self, value, labels=()):
+        series = self.values.get(labels)
+        if series is None:
+            series = [0] * (len(self.buckets) + 2)
+            self.values[labels] = series
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def expose(self):
+        lines = ["# HELP {} {}".format(self.name, self.help_text), "# TYPE {} histogram".format(self.name)]
+        for labels, series in self.values.items():
+            total = 0
+            for bound, count in zip(self.buckets + ["+Inf"], series):
+                total += count
+                lines.append("{}_bucket{} {}".format(self.name, _label_text(self.labels + ("le",), labels + (bound,)), total))
+            lines.append("{}_sum{} {}".format(self.name, _label_text(self.labels, labels), series[-1]))
+            lines.append("{}_count{} {}".format(self.name, _label_text(self.labels, labels), total))
+        return lines
+
+class Registry:
+    def __init__(self, sample_rate=16):
+        self.metrics = []
+        self.sample_rate = sample_rate
+        self.emit_count = 0
+        # per greenlet counts for the handler currently running
+        self.current = threading.local()
+
+        self.handler_latency = self.histogram("poker_handler_latency_seconds", "Socket handler latency", LATENCY_BUCKETS, ("event",))
+        self.handler_db_calls = self.histogram("poker_handler_db_calls", "DB round trips per socket event", COUNT_BUCKETS, ("event",))
+        self.handler_emits = self.histogram("poker_handler_emits", "Emits per socket event", COUNT_BUCKETS, ("event",))
+        self.handler_errors = self.counter("poker_handler_errors_total", "Socket handlers that raised", ("event",))
+        self.emits = self.counter("poker_emits_total", "Emits sent", ("event",))
+        self.payload_bytes = self.histogram("poker_emit_payload_bytes", "JSON size of sampled emit payloads", BYTES_BUCKETS, ("event",))
+        self.db_calls = self.counter("poker_db_calls_total", "Mongo calls", ("collection", "method"))
+        self.db_latency = self.histogram("poker_db_latency_seconds", "Mongo call latency", LATENCY_BUCKETS, ("collection", "method"))
+        self.connections = self.gauge("poker_socket_connections", "Connected socket clients")
+        self.equity_cache = self.gauge("poker_equity_cache", "All in equity cache size, hits and misses", ("stat",))
+
+    def counter(self, name, help_text, labels=()):
+        metric = Counter(name, help_text, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help_text, labels=()):
+        metric = Gauge(name, help_text, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, buckets, labels=()):
+        metric = Histogram(name, help_text, buckets, labels)
+        self.metrics.append(metric)
+        return metric
+
+    # Wraps a socket handler
+    def instrument(self, event, handler):
+        labels = (event,)
+        current = self.current
+        def instrumented(*args, **kwargs):
+            current.db_calls = 0
+            current.emits = 0
+            start = time.perf_counter()
+            try:
+                return handler(*args, **kwargs)
+            except Exception:
+                self.handler_errors.inc(labels)
+                raise
+            finally:
+                self.handler_latency.observe(time.perf_counter() - start, labels)
+                self.handler_db_calls.observe(current.db_calls, labels)
+                self.handler_emits.observe(current.emits, labels)
+                current.db_calls = 0
+                current.emits = 0
+        instrumented.__name__ = handler.__name__
+        return instrumented
+
+    # Call for every emit, payload is only serialized for sampled emits
+    def record_emit(self, event, payload):
+        labels = (event,)
+        self.emits.inc(labels)
+        self.current.emits = getattr(self.current, "emits", 0) + 1
+        self.emit_count += 1
+        if self.emit_count % self.sample_rate == 0:
+            size = len(payload) if isinstance(payload, (bytes, str)) else len(json.dumps(payload, separators=(",", ":")))
+            self.payload_bytes.observe(size, labels)
+
+    def record_db_call(self, collection, method, seconds):
+        labels = (collection, method)
+        self.db_calls.inc(labels)
+        self.db_latency.observe(seconds, labels)
+        self.current.db_calls = getattr(self.current, "db_calls", 0) + 1
+
+    def expose(self):
+        lines = []
+        for metric in self.metrics:
+            lines += metric.expose()
+        return "\n".join(lines) + "\n"
+
+# Proxies a pymongo collection, timing and counting every method call
+class InstrumentedCollection:
+    def __init__(self, collection, registry):
+        self._collection = collection
+        self._registry = registry
+        self._name = collection.name
+
+    def __getattr__(self, method):
+        attr = getattr(self._collection, method)
+        if not callable(attr):
+            return attr
+        registry = self._registry
+        name = self._name
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                registry.record_db_call(name, method, time.perf_counter() - start)
+        return call
@@ -0,0 +1,179 @@
+import mmap
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from math import comb
+
+from card import encode_cards, NUM_CARDS
+
+## Preflop Equity Table ##
+# Heads up preflop equity for all 169x169 canonical starting hand matchups.
+#
+# Canonical hands sit on the usual 13x13 grid (rank index 0 = deuce):
+#   pairs   -> rank * 13 + rank
+#   suited  -> high * 13 + low
+#   offsuit -> low * 13 + high
+#
+# An entry is the exact equity of one class against the other averaged over
+# every concrete combo of the two classes that can be dealt together, so it is
+# the number to quote for "AKs vs QQ" and needs no evaluation to look up.
+#
+# File layout (little endian):
+#   header  - magic b"PFEQ", class count (uint32)
+#   entries - 169 * 169 pairs of float32 (win %, tie %) for the row class
+# The file is memory mapped, a lookup is one unpack at a fixed offset.
+#
+# The table is committed as data/preflop_equity.bin. Rebuild it with:
+#   python preflop_table.py [path] [processes]
+# Every matchup is a full 1,712,304 board enumeration, about half an hour on one core.
+
+NUM_CLASSES = 169
+MAGIC = b"PFEQ"
+HEADER = struct.Struct("<4sI")
+ENTRY = struct.Struct("<2f")
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "preflop_equity.bin")
+
+RANK_NAMES = "23456789TJQKA"
+
+def hand_class(cards):
+    if cards and isinstance(cards[0], dict):
+        cards = encode_cards(cards)
+    high = max(cards[0] >> 2, cards[1] >> 2)
+    low = min(cards[0] >> 2, cards[1] >> 2)
+    if high == low or (cards[0] & 3) != (cards[1] & 3):
+        return low * 13 + high
+    return high * 13 + low
+
+def class_name(index):
+    first = index // 13
+    second = index % 13
+    if first == second:
+        return RANK_NAMES[first] * 2
+    if first > second:
+        return RANK_NAMES[first] + RANK_NAMES[second] + "s"
+    return RANK_NAMES[second] + RANK_NAMES[first] + "o"
+
+# Every concrete two card combo belonging to a class
+def class_combos(index):
+    return [list(combo) for combo in combinations(range(NUM_CARDS), 2) if hand_class(list(combo)) == index]
+
+class PreflopTable:
+    def __init__(self, path=DEFAULT_PATH):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or count != NUM_CLASSES:
+            self.close()
+            raise ValueError("Not a preflop equity table: " + path)
+
+    def lookup_class(self, class_a, class_b):
+        win, tie = ENTRY.unpack_from(self.data, HEADER.size + (class_a * NUM_CLASSES + class_b) * ENTRY.size)
+        return {"win": win, "tie": tie, "equity": win + tie / 2}
+
+    # Class vs class equity for two concrete hands, cards may be dicts or ints
+    def lookup(self, hand_a, hand_b):
+        return self.lookup_class(hand_class(hand_a), hand_class(hand_b))
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+_table = None
+
+# Returns the shared table, None when it has not been built
+def load_table(path=DEFAULT_PATH):
+    global _table
+    if _table is None and os.path.exists(path):
+        _table = PreflopTable(path)
+    return _table
+
+## Builder ##
+# Every hand is evaluated once against all boards with the batch evaluator and
+# kept as the rank of its strength (uint16) by board, so comparing two hands is
+# a couple of array operations over the boards neither of them blocks. A worker
+# evaluates the first combo of each of its row classes, then goes through all
+# 1326 combos once, comparing each with every row. A vs B and B vs A share the
+# evaluations of both hands and nothing is enumerated twice.
+
+_boards = None
+_board_masks = None
+
+def _all_boards():
+    global _boards, _board_masks
+    if _boards is None:
+        import numpy as np
+        _boards = np.array(list(combinations(range(NUM_CARDS), 5)), dtype=np.int8)
+        _board_masks = np.bitwise_or.reduce(np.left_shift(np.int64(1), _boards.astype(np.int64)), axis=1)
+    return _boards, _board_masks
+
+def _card_mask(hand):
+    return (1 << hand[0]) | (1 << hand[1])
+
+# Rank of the hand's strength on every board, 0 on the boards it blocks
+def _hand_ranks(hand, ranks):
+    import numpy as np
+    from batch_evaluator import evaluate_batch
+    boards, masks = _all_boards()
+    valid = (masks & _card_mask(hand)) == 0
+    dealt = boards[valid]
+    cards = np.concatenate([np.broadcast_to(np.array(hand, dtype=np.int8), (len(dealt), 2)), dealt], axis=1)
+    hand_ranks = np.zeros(len(boards), dtype=np.uint16)
+    hand_ranks[valid] = np.searchsorted(ranks, evaluate_batch(cards)) + 1
+    return hand_ranks
+
+# Fills the rows of the given classes, returns [(win %, tie %)] for every
+# column class of every row
+def build_rows(classes):
+    import numpy as np
+    from batch_evaluator import RANK_STRENGTHS, FLUSH_TABLE
+    ranks = np.unique(np.concatenate([RANK_STRENGTHS, FLUSH_TABLE]))
+    hands = [class_combos(class_a)[0] for class_a in classes]
+    row_ranks = [_hand_ranks(hand, ranks) for hand in hands]
+    wins = np.zeros((len(classes), NUM_CLASSES), dtype=np.int64)
+    ties = np.zeros((len(classes), NUM_CLASSES), dtype=np.int64)
+    boards = np.zeros((len(classes), NUM_CLASSES), dtype=np.int64)
+    # a hand ranks 0 on the boards it blocks, so of the boards the other hand
+    # blocks the ones only b blocks count as wins for a and the ones both block as ties
+    dealt = comb(NUM_CARDS - 4, 5)
+    only_b = comb(NUM_CARDS - 2, 5) - dealt
+    both = comb(NUM_CARDS, 5) - 2 * comb(NUM_CARDS - 2, 5) + dealt
+    for hand_b in combinations(range(NUM_CARDS), 2):
+        class_b = hand_class(list(hand_b))
+        ranks_b = _hand_ranks(hand_b, ranks)
+        for i, hand_a in enumerate(hands):
+            if _card_mask(hand_a) & _card_mask(hand_b):
+                continue
+            wins[i, class_b] += np.count_nonzero(row_ranks[i] > ranks_b) - only_b
+            ties[i, class_b] += np.count_nonzero(row_ranks[i] == ranks_b) - both
+            boards[i, class_b] += dealt
+    return [[(100 * wins[i, b] / boards[i, b], 100 * ties[i, b] / boards[i, b]) for b in range(NUM_CLASSES)]
+        for i in range(len(classes))]
+
+def build_table(path=DEFAULT_PATH, processes=None):
+    if processes is None:
+        processes = os.cpu_count()
+    groups = [list(range(first, NUM_CLASSES, processes)) for first in range(processes)]
+    if processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(build_rows, groups))
+    else:
+        results = [build_rows(groups[0])]
+    rows = [None] * NUM_CLASSES
+    for group, group_rows in zip(groups, results):
+        for class_a, row in zip(group, group_rows):
+            rows[class_a] = row
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as out:
+        out.write(HEADER.pack(MAGIC, NUM_CLASSES))
+        for row in rows:
+            for win, tie in row:
+                out.write(ENTRY.pack(win, tie))
+    os.replace(path + ".tmp", path)
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    build_table(path, processes)
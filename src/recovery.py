@@ -0,0 +1,80 @@
+import os
+import time
+
+from hand_history import read_segment, segment_paths
+from table_state import TableState
+
+## Crash Recovery ##
+# Rebuilds the tables of a worker after a restart from the last snapshot the
+# WriteBehindStore wrote for each table and the tail of the hand history.
+#
+# A snapshot is consistent for its table (it is written whole) but can trail
+# the game by a flush. Snapshots carry the start time of the hand they were
+# taken in, so a recorded hand of the same table that started then or later
+# finished after the snapshot was written: the table continues from the recorded
+# result instead, the chips after the hand, its blind positions and blind level,
+# with a fresh deal. Otherwise the snapshot is restored as it is, mid hand if it
+# was taken in one, and play carries on from there. A hand restored mid hand is
+# not written to the history when it finishes, its start was never recorded.
+#
+# Only the segments that can hold such a hand are read, newest first. A hand is
+# written after it started, so a segment last modified before a table's snapshot
+# hand started (and every segment older than it) has nothing newer for it.
+#
+# The table collection also still holds the documents the dealer kept before
+# tables had snapshots (player_count, positions, ...), SNAPSHOTS leaves them out.
+
+SNAPSHOTS = {"seats": {"$exists": True}}
+
+# slack for file systems that keep modification times in whole seconds
+MTIME_SLACK = 2000
+
+# Newest recorded hand of every table that started at or after since[table id].
+# Returns the hands and the tables not searched through because the deadline
+# passed first, their hands have to be looked up again later.
+def latest_hands(directory, since, deadline=None):
+    latest = {}
+    waiting = dict(since)
+    paths = sorted(segment_paths(directory), key=os.path.getmtime, reverse=True)
+    for path in paths:
+        modified = os.path.getmtime(path) * 1000 + MTIME_SLACK
+        for table_id in [table_id for table_id, started in waiting.items() if started > modified]:
+            del waiting[table_id]
+        if not waiting or (deadline is not None and time.time() >= deadline):
+            break
+        for hand in read_segment(path):
+            started = since.get(hand.table_id)
+            if started is None or hand.started < started:
+                continue
+            current = latest.get(hand.table_id)
+            if current is None or hand.started >= current.started:
+                latest[hand.table_id] = hand
+    else:
+        waiting = {}
+    return latest, set(waiting)
+
+# Returns the table state and whether it needs a new hand dealt
+def restore_state(doc, hand=None):
+    state = TableState.from_snapshot(doc)
+    # sessions did not survive the restart, players come back with their token
+    for seat in state.seats:
+        seat.session_id = None
+    if hand is None:
+        return state, False
+    state.small_blind = hand.small_blind
+    state.big_blind = hand.big_blind
+    state.ante = hand.ante
+    for record in hand.seats:
+        seat = state.seat(record.position)
+        seat.chips = record.chips_after
+        seat.cards = []
+        seat.bet_size = 0
+        seat.committed = 0
+    # start_round rotates the positions on from the ones of the recorded hand
+    state.dealer, state.sb, state.bb, state.utg = hand.dealer, hand.sb, hand.bb, hand.utg
+    state.pot = 0
+    state.current_bet = 0
+    state.phase = 0
+    state.table_cards = []
+    state.hand_started = hand.started
+    return state, True
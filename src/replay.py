@@ -0,0 +1,109 @@
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from table_state import TableState
+from engine import Engine
+from hand_history import read_segment, segment_paths
+
+## Hand Replay ##
+# Plays recorded hands back through the engine and checks that it still reaches
+# the same result. A hand is rebuilt from its record alone: the seats get their
+# chips from before the hand, the blinds and ante it was played at and the blind
+# positions of the previous hand are restored and start_round deals from the
+# recorded seed, so the position rotation, blinds, every action, the pot awards,
+# winners and final chips are all recomputed.
+#
+# Replaying skips building client views, so it runs at engine speed. A whole
+# archive is split by segment across processes:
+#   python replay.py history/ [processes]
+
+# Hands out the recorded deck seed in place of the engine's random seeds
+class RecordedSeed:
+    def __init__(self, seed):
+        self.seed = seed
+
+    def getrandbits(self, bits):
+        return self.seed
+
+# Replays one HandRecord, returns the engine's own record of the hand or None if it never finished
+def replay_hand(hand):
+    state = TableState(hand.table_id, hand.small_blind, hand.big_blind, hand.ante)
+    for record in hand.seats:
+        seat = state.add_seat(record.name, record.chips_before, "player", None)
+        seat.b_elim = record.b_elim
+    state.sb = hand.prev_sb
+    state.bb = hand.prev_bb
+    engine = Engine(state, 0, hand.big_blind, rng=RecordedSeed(hand.seed), views=False)
+    engine.start_round()
+    engine.flush()
+    for _, position, option, bet_size in hand.actions:
+        for name, payload, _ in engine.next_turn(position, option, bet_size):
+            if name == "hand_history":
+                return payload
+    return None
+
+# Lists how the replayed hand differs from the recorded one, empty if it matches
+def compare_hands(recorded, replayed):
+    if replayed is None:
+        return ["hand did not finish after {} actions".format(len(recorded.actions))]
+    problems = []
+    for field in ("dealer", "sb", "bb", "utg"):
+        if getattr(recorded, field) != getattr(replayed, field):
+            problems.append("{} {} != {}".format(field, getattr(replayed, field), getattr(recorded, field)))
+    if recorded.board != replayed.board:
+        problems.append("board {} != {}".format(replayed.board, recorded.board))
+    if len(recorded.actions) != len(replayed.actions):
+        problems.append("hand ended after {} of {} actions".format(len(replayed.actions), len(recorded.actions)))
+    for recorded_seat, replayed_seat in zip(recorded.seats, replayed.seats):
+        if recorded_seat.cards != list(replayed_seat.cards):
+            problems.append("{} cards {} != {}".format(recorded_seat.name, replayed_seat.cards, recorded_seat.cards))
+        if recorded_seat.status != replayed_seat.status:
+            problems.append("{} status {} != {}".format(recorded_seat.name, replayed_seat.status, recorded_seat.status))
+        # chips are stored as whole chips
+        if recorded_seat.chips_after != int(replayed_seat.chips_after):
+            problems.append("{} chips {} != {}".format(recorded_seat.name, replayed_seat.chips_after, recorded_seat.chips_after))
+    awards = [(position, int(amount)) for position, amount in replayed.awards]
+    if list(recorded.awards) != awards:
+        problems.append("awards {} != {}".format(awards, list(recorded.awards)))
+    if recorded.winners != replayed.winners:
+        problems.append("winners {} != {}".format(replayed.winners, recorded.winners))
+    return problems
+
+def replay_hands(hands):
+    replayed = 0
+    mismatches = []
+    for i, hand in enumerate(hands):
+        problems = compare_hands(hand, replay_hand(hand))
+        if problems:
+            mismatches.append({"hand": i, "table": hand.table_id, "seed": hand.seed, "problems": problems})
+        replayed += 1
+    return {"hands": replayed, "mismatches": mismatches}
+
+def replay_segment(path):
+    result = replay_hands(read_segment(path))
+    for mismatch in result["mismatches"]:
+        mismatch["segment"] = path
+    return result
+
+# Replays every segment under directory, one segment per task
+def replay_archive(directory, processes=None):
+    paths = segment_paths(directory)
+    if processes == 1:
+        results = [replay_segment(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(replay_segment, paths))
+    total = {"hands": 0, "mismatches": []}
+    for result in results:
+        total["hands"] += result["hands"]
+        total["mismatches"] += result["mismatches"]
+    return total
+
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else "history"
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    result = replay_archive(directory, processes)
+    for mismatch in result["mismatches"][:20]:
+        print("{segment} hand {hand} table {table} seed {seed}: {problems}".format(**mismatch))
+    print("{} hands replayed, {} mismatches".format(result["hands"], len(result["mismatches"])))
+    sys.exit(1 if result["mismatches"] else 0)
@@ -0,0 +1,124 @@
+## Seat Ring ##
+# Circular linked lists over seat positions so the engine can step to the next
+# player without scanning the table.
+#
+# Every position keeps a next and prev link, also positions that are not in the
+# ring: rebuild() points those at the nearest members, and a removed member keeps
+# the links it had. Following links from any position therefore always lands on
+# a member, so a lookup is O(1) (a few hops at most after removals) and removing
+# a member is O(1). Members are only added by rebuild(), once per hand.
+class Ring:
+    def __init__(self):
+        self.next = []
+        self.prev = []
+        self.members = set()
+
+    def __len__(self):
+        return len(self.members)
+
+    def __contains__(self, position):
+        return position in self.members
+
+    def add_position(self):
+        position = len(self.next)
+        if not self.members:
+            self.next.append(position)
+            self.prev.append(position)
+        else:
+            self.next.append(0 if 0 in self.members else self.next[0])
+            self.prev.append(position - 1 if position - 1 in self.members else self.prev[position - 1])
+
+    def rebuild(self, members):
+        size = len(self.next)
+        self.members = set(members)
+        if not self.members:
+            self.next = list(range(size))
+            self.prev = list(range(size))
+            return
+        ordered = sorted(self.members)
+        # walk backwards once for next links and forwards once for prev links
+        following = ordered[0]
+        for position in range(size - 1, -1, -1):
+            self.next[position] = following
+            if position in self.members:
+                following = position
+        preceding = ordered[-1]
+        for position in range(size):
+            self.prev[position] = preceding
+            if position in self.members:
+                preceding = position
+
+    def remove(self, position):
+        if position not in self.members:
+            return
+        self.members.discard(position)
+        before = self.prev[position]
+        after = self.next[position]
+        self.next[before] = after
+        self.prev[after] = before
+
+    # First member after position, position itself if the ring is empty
+    def next_of(self, position):
+        if not self.members:
+            return position
+        member = self.next[position]
+        while member not in self.members:
+            member = self.next[member]
+        return member
+
+    def prev_of(self, position):
+        if not self.members:
+            return position
+        member = self.prev[position]
+        while member not in self.members:
+            member = self.prev[member]
+        return member
+
+    # position if it is a member, otherwise the first member after it
+    def at_or_after(self, position):
+        if position in self.members:
+            return position
+        return self.next_of(position)
+
+# The rings and status sets of a table, kept in step with the seat statuses:
+#   active      in the hand (status 3), the order players act in
+#   blinds      dealt in plus seats whose blind was just eliminated (b_elim), the
+#               order dealer, sb, bb and utg rotate through
+#   all_in      active with no chips behind
+#   folded      folded this hand (status 2)
+#   eliminated  out of chips (status 1)
+class SeatRing:
+    def __init__(self):
+        self.active = Ring()
+        self.blinds = Ring()
+        self.all_in = set()
+        self.folded = set()
+        self.eliminated = set()
+
+    def add_seat(self):
+        self.active.add_position()
+        self.blinds.add_position()
+
+    # Recomputes everything from the seats, once per hand after dealing
+    def rebuild(self, seats):
+        self.active.rebuild(seat.position for seat in seats if seat.status == 3)
+        self.blinds.rebuild(seat.position for seat in seats if seat.status > 1 or seat.b_elim)
+        self.all_in = {seat.position for seat in seats if seat.status == 3 and seat.chips <= 0}
+        self.folded = {seat.position for seat in seats if seat.status == 2}
+        self.eliminated = {seat.position for seat in seats if seat.status == 1}
+
+    def fold(self, position):
+        self.active.remove(position)
+        self.all_in.discard(position)
+        self.folded.add(position)
+
+    # Called whenever a seat's chips change
+    def update_chips(self, seat):
+        if seat.chips > 0:
+            self.all_in.discard(seat.position)
+        elif seat.position in self.active:
+            self.all_in.add(seat.position)
+
+    # Seats dealt into the current hand
+    def playing_count(self):
+        return len(self.active) + len(self.folded)
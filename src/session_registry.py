@@ -0,0 +1,71 @@
+import secrets
+
+## Session Registry ##
+# Which socket session sits in which seat, looked up in memory in both
+# directions so a private emit never has to ask the database for a session id.
+#
+# A seat outlives its session. When a client disconnects the seat keeps playing
+# (the action clock checks or folds for it) and stays bound to its resume token,
+# handed out when the player sat down. Reconnecting with the token rebinds the
+# seat to the new session, the client then only gets the game state deltas it
+# missed instead of a full snapshot.
+class SessionRegistry:
+    def __init__(self):
+        # session id -> (table id, position)
+        self.seats = {}
+        # (table id, position) -> session id, missing while the player is away
+        self.sessions = {}
+        # resume token -> (table id, position)
+        self.tokens = {}
+
+    def __contains__(self, session_id):
+        return session_id in self.seats
+
+    # Binds a session to a newly taken seat, returns the seat's resume token
+    def bind(self, session_id, table_id, position):
+        seat = (table_id, position)
+        self.seats[session_id] = seat
+        self.sessions[seat] = session_id
+        token = secrets.token_urlsafe(16)
+        self.tokens[token] = seat
+        return token
+
+    # Puts back the token of a seat restored after a restart
+    def restore(self, table_id, position, token):
+        seat = (table_id, position)
+        self.tokens[token] = seat
+
+    # The session is gone, the seat keeps its token
+    def unbind(self, session_id):
+        seat = self.seats.pop(session_id, None)
+        if seat is not None and self.sessions.get(seat) == session_id:
+            del self.sessions[seat]
+        return seat
+
+    # Moves the token's seat to session_id, returns (seat, previous session id)
+    # or (None, None) for an unknown token
+    def resume(self, session_id, token):
+        seat = self.tokens.get(token)
+        if seat is None:
+            return None, None
+        previous = self.sessions.get(seat)
+        if previous is not None:
+            self.seats.pop(previous, None)
+        self.unbind(session_id)
+        self.seats[session_id] = seat
+        self.sessions[seat] = session_id
+        return seat, previous
+
+    def seat_for(self, session_id):
+        return self.seats.get(session_id)
+
+    def table_for(self, session_id):
+        seat = self.seats.get(session_id)
+        return seat[0] if seat is not None else None
+
+    def session_for(self, table_id, position):
+        return self.sessions.get((table_id, position))
+
+    # (table id, position) of the seat the token resumes, None for an unknown token
+    def seat_for_token(self, token):
+        return self.tokens.get(token)
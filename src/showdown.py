@@ -0,0 +1,93 @@
+import bisect
+
+from card import encode_cards
+from evaluator import evaluate7
+
+## Showdown ##
+# Settles a hand that reached the river. Every live hand is evaluated once
+# against the board, the chips each seat committed over the hand are cut into a
+# main pot and side pots at the all in levels of the live players, and every pot
+# goes to the best hands among the players who paid into all of it.
+#
+# A pot that does not split evenly gives its odd chips one each to the winners
+# closest to the left of the dealer. Sorting the players is the most expensive
+# step, so the whole showdown is O(players log players).
+
+# Strength of each live hand, board and hole cards as card codes
+def evaluate_hands(hands, board):
+    a, b, c, d, e = board
+    return {position: evaluate7(cards[0], cards[1], a, b, c, d, e) for position, cards in hands.items()}
+
+# Positions grouped by equal strength, best hands first
+def rank_hands(strengths):
+    tiers = []
+    best_first = sorted(strengths, key=strengths.get, reverse=True)
+    for position in best_first:
+        if tiers and strengths[tiers[-1][0]] == strengths[position]:
+            tiers[-1].append(position)
+        else:
+            tiers.append([position])
+    return tiers
+
+# Cuts the pot at every level a live player committed, returns [(level, amount)]
+# from the main pot up. Chips above the highest level (folded overbets, or a pot
+# that does not match the committed amounts) go into the last pot.
+def build_pots(committed, live, total):
+    amounts = sorted(committed.values())
+    prefix = [0]
+    for amount in amounts:
+        prefix.append(prefix[-1] + amount)
+    pots = []
+    covered = 0
+    for level in sorted({committed[position] for position in live}):
+        # chips committed up to this level: everything below it plus level from everyone above
+        below = bisect.bisect_left(amounts, level)
+        upto = prefix[below] + level * (len(amounts) - below)
+        if upto > covered:
+            pots.append((level, upto - covered))
+            covered = upto
+    if not pots:
+        return [(0, total)] if total else []
+    if total != covered:
+        level, amount = pots[-1]
+        pots[-1] = (level, amount + total - covered)
+    return pots
+
+# Splits amount between winners, odd chips go to the first winners left of the dealer
+def split_pot(amount, winners, dealer, seat_count):
+    share, odd = divmod(amount, len(winners))
+    order = sorted(winners, key=lambda position: (position - dealer - 1) % seat_count)
+    return [(position, share + 1 if i < odd else share) for i, position in enumerate(order)]
+
+# Awards every pot, returns [{"amount", "winners": [(position, chips)]}] from the main pot up
+def award_pots(pots, strengths, committed, dealer, seat_count):
+    # walk from the last side pot down, each pot lower down adds the players
+    # who committed less, so the best hand so far only has to be updated
+    contenders = sorted(strengths, key=committed.get, reverse=True)
+    i = 0
+    best = None
+    best_positions = []
+    results = []
+    for level, amount in reversed(pots):
+        while i < len(contenders) and committed[contenders[i]] >= level:
+            position = contenders[i]
+            if best is None or strengths[position] > best:
+                best = strengths[position]
+                best_positions = [position]
+            elif strengths[position] == best:
+                best_positions.append(position)
+            i += 1
+        results.append({"amount": amount, "winners": split_pot(amount, best_positions, dealer, seat_count)})
+    results.reverse()
+    return results
+
+# Settles the table: returns the ranking of live hands and the awarded pots.
+# strengths of the live hands can be passed in when they were already evaluated.
+def settle(state, strengths=None):
+    committed = {seat.position: seat.committed for seat in state.seats}
+    if strengths is None:
+        board = encode_cards(state.table_cards)
+        hands = {seat.position: encode_cards(seat.cards) for seat in state.seats if seat.status == 3}
+        strengths = evaluate_hands(hands, board)
+    pots = build_pots(committed, strengths, state.pot)
+    return rank_hands(strengths), award_pots(pots, strengths, committed, state.dealer, state.player_count)
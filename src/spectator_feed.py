@@ -0,0 +1,64 @@
+from collections import Counter
+
+from state_diff import VersionedState
+from wire import encode
+
+## Spectator Feed ##
+# The public game state of a table as its spectators see it. Spectators sit in
+# their own room per wire protocol, apart from the seated players, and only ever
+# get public data: every delta is encoded once per protocol in use and the
+# same payload goes out to the whole room.
+#
+# With an interval set the feed sends at most one update per interval. States
+# published in between are held back and the next update is the diff from what
+# spectators last got to the newest state, so nothing is lost, the in between
+# versions are just skipped. The feed numbers its own versions for that reason,
+# its seq is not the one the players see.
+#
+# Spectators joining (or resyncing after a gap) get the full snapshot of the
+# current version, encoded once and cached until the next version.
+class SpectatorFeed:
+    def __init__(self, interval=0):
+        self.interval = interval
+        self.versions = VersionedState()
+        self.last_sent = 0
+        self.pending = None
+        # spectators per protocol
+        self.viewers = Counter()
+        # protocol -> (seq, encoded snapshot)
+        self.snapshots = {}
+
+    def __len__(self):
+        return sum(self.viewers.values())
+
+    # Returns the delta to send spectators now, None if there is nothing to send
+    # or the update is held back until flush
+    def publish(self, public_state, now):
+        if self.interval and now - self.last_sent < self.interval:
+            self.pending = public_state
+            return None
+        return self.send(public_state, now)
+
+    # Sends the state held back by publish once the interval has passed
+    def flush(self, now):
+        if self.pending is None or now - self.last_sent < self.interval:
+            return None
+        return self.send(self.pending, now)
+
+    def send(self, public_state, now):
+        self.pending = None
+        delta = self.versions.update(public_state)
+        if delta is not None:
+            self.last_sent = now
+        return delta
+
+    def snapshot(self, protocol, seat_of):
+        seq = self.versions.seq
+        cached = self.snapshots.get(protocol)
+        if cached is None or cached[0] != seq:
+            snapshot = self.versions.snapshot()
+            if snapshot is None:
+                return None
+            cached = (seq, encode("game_state", snapshot, protocol, seat_of))
+            self.snapshots[protocol] = cached
+        return cached[1]
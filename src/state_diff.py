@@ -0,0 +1,84 @@
+## Versioned Game State ##
+# Keeps the last public game state sent for a table and turns the next one into
+# a diff holding only the fields that changed, tagged with a sequence number.
+#
+# Delta format:
+#   {"seq": 12,
+#    "table": {"pot": 60, "currentPlayer": 2},      changed table fields
+#    "players": {"1": {"chips": 4980}},             changed fields per position
+#    "removed": ["equity"],                         table fields no longer present
+#    "playerCount": 3}                              only when players join or leave
+#
+# A client applies deltas in order. If it sees a seq that is not last seq + 1 it
+# asks for a full snapshot instead. The last deltas are kept so a client that
+# reconnects can be sent just the ones it missed.
+
+from collections import deque
+
+def diff_dict(old, new):
+    changes = {}
+    for key, value in new.items():
+        if key not in old or old[key] != value:
+            changes[key] = value
+    removed = [key for key in old if key not in new]
+    return changes, removed
+
+def diff_state(old, new):
+    delta = {}
+    table_changes, removed = diff_dict(old["table"], new["table"])
+    if table_changes:
+        delta["table"] = table_changes
+    if removed:
+        delta["removed"] = removed
+
+    old_players = old["players"]
+    new_players = new["players"]
+    player_changes = {}
+    for i in range(len(new_players)):
+        if i >= len(old_players):
+            player_changes[str(i)] = new_players[i]
+        else:
+            changes, _ = diff_dict(old_players[i], new_players[i])
+            if changes:
+                player_changes[str(i)] = changes
+    if player_changes:
+        delta["players"] = player_changes
+    if len(new_players) != len(old_players):
+        delta["playerCount"] = len(new_players)
+    return delta
+
+class VersionedState:
+    def __init__(self, keep=64):
+        self.seq = 0
+        self.last = None
+        self.deltas = deque(maxlen=keep)
+
+    # Records a new public state, returns the delta to broadcast or None if nothing changed
+    def update(self, public_state):
+        if self.last is None:
+            delta = {"table": public_state["table"], "players": {str(i): player for i, player in enumerate(public_state["players"])}, "playerCount": len(public_state["players"])}
+        else:
+            delta = diff_state(self.last, public_state)
+        if not delta:
+            return None
+        self.seq += 1
+        self.last = public_state
+        delta["seq"] = self.seq
+        self.deltas.append(delta)
+        return delta
+
+    # Deltas after seq in order, None when they are no longer kept
+    def since(self, seq):
+        # a seq from before a restart
+        if seq > self.seq:
+            return None
+        if seq == self.seq:
+            return []
+        if not self.deltas or self.deltas[0]["seq"] > seq + 1:
+            return None
+        return [delta for delta in self.deltas if delta["seq"] > seq]
+
+    def snapshot(self):
+        if self.last is None:
+            return None
+        return {"seq": self.seq, "players": self.last["players"], "table": self.last["table"]}
@@ -0,0 +1,156 @@
+import bisect
+import hashlib
+import time
+
+from table_state import TableState
+from engine import Engine
+from state_diff import VersionedState
+from session_registry import SessionRegistry
+from recovery import restore_state
+from spectator_feed import SpectatorFeed
+
+DEFAULT_TABLE = "main"
+
+## Consistent Hashing ##
+# Maps table ids onto workers. Every worker is placed on the ring many times so
+# tables spread evenly, and adding or removing a worker only moves the tables
+# that hashed next to it.
+class HashRing:
+    def __init__(self, nodes, replicas=160):
+        self.ring = sorted((self.hash("{}:{}".format(node, i)), node) for node in nodes for i in range(replicas))
+        self.keys = [key for key, _ in self.ring]
+
+    @staticmethod
+    def hash(key):
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+    def node_for(self, key):
+        i = bisect.bisect(self.keys, self.hash(key)) % len(self.keys)
+        return self.ring[i][1]
+
+## Table Manager ##
+# Owns the engine of every table hosted by this worker process, keyed by table id, and
+# remembers which seat each socket session is bound to (session_registry.py) so
+# events can be routed without the client repeating the table id. Each table also keeps the
+# versioned public state its game_state deltas are computed from and the feed its
+# spectators watch. Tables recovered after a restart are restored up front or on
+# first use (recovery.py).
+class TableManager:
+    # spectator_interval is the least time in seconds between spectator updates,
+    # schedule is the BlindSchedule shared by every table, None keeps blinds fixed
+    def __init__(self, small_blind, big_blind, time_per_hand, worker_id=0, workers=1, spectator_interval=0, schedule=None):
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.time_per_hand = time_per_hand
+        self.worker_id = worker_id
+        self.ring = HashRing(range(workers))
+        self.tables = {}
+        self.versions = {}
+        self.feeds = {}
+        self.spectator_interval = spectator_interval
+        self.schedule = schedule
+        self.sessions = SessionRegistry()
+        # table id -> (snapshot, hand, searched) of recovered tables not restored yet
+        self.deferred = {}
+        # called with (engine, events) when a recovered table is restored
+        self.on_restore = None
+        # called with a snapshot to look up its newest hand record when the
+        # history was not searched for it at startup
+        self.find_hand = None
+
+    def worker_for(self, table_id):
+        return self.ring.node_for(table_id)
+
+    def owns(self, table_id):
+        return self.worker_for(table_id) == self.worker_id
+
+    def get(self, table_id):
+        if table_id in self.deferred:
+            doc, hand, searched = self.deferred.pop(table_id)
+            if not searched and self.find_hand is not None:
+                hand = self.find_hand(doc)
+            self.restore(doc, hand)
+        return self.tables.get(table_id)
+
+    def new_engine(self, state):
+        return Engine(state, self.time_per_hand, state.big_blind, schedule=self.schedule)
+
+    # Brings a table back from its snapshot and newest hand record (recovery.py)
+    def restore(self, doc, hand=None):
+        state, new_hand = restore_state(doc, hand)
+        engine = self.new_engine(state)
+        table_id = state.table_id
+        self.tables[table_id] = engine
+        self.versions[table_id] = VersionedState()
+        self.feeds[table_id] = SpectatorFeed(self.spectator_interval)
+        for seat in state.seats:
+            if seat.token is not None:
+                self.sessions.restore(table_id, seat.position, seat.token)
+        # the blind level starts over, the time into it is not kept
+        if self.schedule is not None and any(seat.status for seat in state.seats):
+            self.schedule.start(table_id, time.time())
+        events = engine.resume(new_hand)
+        if self.on_restore is not None:
+            self.on_restore(engine, events)
+        return engine
+
+    # Restores the table when it is first used, its resume tokens work right away.
+    # searched is False when the hand history still has to be searched for hand
+    def defer(self, doc, hand=None, searched=True):
+        self.deferred[doc["_id"]] = (doc, hand, searched)
+        for seat_doc in doc["seats"]:
+            if seat_doc.get("token") is not None:
+                self.sessions.restore(doc["_id"], seat_doc["position"], seat_doc["token"])
+
+    def open_table(self, table_id):
+        engine = self.get(table_id)
+        if engine is None:
+            if not self.owns(table_id):
+                raise ValueError("Table " + table_id + " belongs to worker " + str(self.worker_for(table_id)))
+            ante = self.schedule.ante if self.schedule is not None else 0
+            state = TableState(table_id, self.small_blind, self.big_blind, ante)
+            engine = self.new_engine(state)
+            self.tables[table_id] = engine
+            self.versions[table_id] = VersionedState()
+            self.feeds[table_id] = SpectatorFeed(self.spectator_interval)
+        return engine
+
+    # Seats the session, returns the resume token of the seat
+    def join(self, session_id, table_id, position):
+        seat = self.tables[table_id].state.seat(position)
+        seat.session_id = session_id
+        seat.token = self.sessions.bind(session_id, table_id, position)
+        return seat.token
+
+    # The session disconnected, returns the seat it had as (table id, position) or None
+    def leave(self, session_id):
+        seat = self.sessions.unbind(session_id)
+        if seat is not None:
+            engine = self.tables.get(seat[0])
+            if engine is not None and engine.state.seat(seat[1]).session_id == session_id:
+                engine.state.seat(seat[1]).session_id = None
+        return seat
+
+    # Rebinds the seat of token to the session, returns (engine, position, previous
+    # session id), engine is None for an unknown token
+    def resume(self, session_id, token):
+        seat, previous = self.sessions.resume(session_id, token)
+        engine = self.get(seat[0]) if seat is not None else None
+        if engine is None:
+            return None, None, None
+        engine.state.seat(seat[1]).session_id = session_id
+        return engine, seat[1], previous
+
+    def table_for_session(self, session_id):
+        table_id = self.sessions.table_for(session_id)
+        if table_id is None:
+            return None
+        return self.tables.get(table_id)
+
+    # The seat position the session plays, None if it is not seated
+    def position_for_session(self, session_id):
+        seat = self.sessions.seat_for(session_id)
+        return seat[1] if seat is not None else None
+
+    def session_for(self, table_id, position):
+        return self.sessions.session_for(table_id, position)
@@ -0,0 +1,160 @@
+## Table State ##
+# The in process source of truth for a table. The engine reads and modifies
+# these objects directly and the server hands a snapshot to the WriteBehindStore
+# (write_behind.py) afterwards, so an action never waits on a database round trip.
+# The seat ring (seat_ring.py) indexes the seats by status and is rebuilt from
+# them, it is not part of the snapshot.
+
+## Player Status ##
+# 0: joined, waiting for the game to start
+# 1: eliminated
+# 2: folded
+# 3: in the hand
+
+from seat_ring import SeatRing
+
+class Seat:
+    __slots__ = ("name", "position", "status", "chips", "cards", "bet_size", "committed", "rebuys", "permissions", "session_id", "token", "b_elim")
+
+    def __init__(self, name, position, chips, permissions, session_id):
+        self.name = name
+        self.position = position
+        self.status = 0
+        self.chips = chips
+        self.cards = []
+        self.bet_size = 0
+        # chips put into the pot this hand
+        self.committed = 0
+        self.rebuys = 0
+        self.permissions = permissions
+        self.session_id = session_id
+        # resume token of the seat (session_registry.py)
+        self.token = None
+        self.b_elim = 0
+
+    def to_doc(self):
+        return {
+            "name": self.name,
+            "position": self.position,
+            "status": self.status,
+            "chips": self.chips,
+            "cards": self.cards,
+            "betSize": self.bet_size,
+            "committed": self.committed,
+            "rebuys": self.rebuys,
+            "permissions": self.permissions,
+            "sessionid": self.session_id,
+            "token": self.token,
+            "b_elim": self.b_elim
+        }
+
+    @classmethod
+    def from_doc(cls, doc):
+        seat = cls(doc["name"], doc["position"], doc["chips"], doc["permissions"], doc["sessionid"])
+        seat.status = doc["status"]
+        seat.cards = doc["cards"]
+        seat.bet_size = doc["betSize"]
+        seat.committed = doc.get("committed", 0)
+        seat.rebuys = doc["rebuys"]
+        seat.token = doc.get("token")
+        seat.b_elim = doc["b_elim"]
+        return seat
+
+class TableState:
+    __slots__ = ("table_id", "seats", "seats_by_name", "ring", "folded", "eliminated",
+        "dealer", "sb", "bb", "utg", "current_player", "action",
+        "pot", "small_blind", "big_blind", "ante", "current_bet",
+        "game_time", "phase", "table_cards", "hand_started")
+
+    def __init__(self, table_id, small_blind, big_blind, ante=0):
+        self.table_id = table_id
+        # seats are indexed by position
+        self.seats = []
+        self.seats_by_name = {}
+        self.ring = SeatRing()
+        self.folded = 0
+        self.eliminated = 0
+        self.dealer = 0
+        self.sb = 0
+        self.bb = 0
+        self.utg = 0
+        self.current_player = 0
+        self.action = -1
+        self.pot = 0
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.ante = ante
+        self.current_bet = 0
+        self.game_time = 0
+        self.phase = 0
+        self.table_cards = []
+        # start time (epoch ms) of the current hand, matches its hand history record
+        self.hand_started = 0
+
+    @property
+    def player_count(self):
+        return len(self.seats)
+
+    def add_seat(self, name, chips, permissions, session_id):
+        seat = Seat(name, len(self.seats), chips, permissions, session_id)
+        self.seats.append(seat)
+        self.seats_by_name[name] = seat
+        self.ring.add_seat()
+        return seat
+
+    def seat(self, position):
+        return self.seats[position]
+
+    def find_seat(self, name):
+        return self.seats_by_name.get(name)
+
+    def snapshot(self):
+        return {
+            "_id": self.table_id,
+            "seats": [seat.to_doc() for seat in self.seats],
+            "folded": self.folded,
+            "eliminated": self.eliminated,
+            "positions": {
+                "dealer": self.dealer,
+                "sb": self.sb,
+                "bb": self.bb,
+                "utg": self.utg,
+                "current_player": self.current_player,
+                "action": self.action
+            },
+            "pot": self.pot,
+            "small_blind": self.small_blind,
+            "big_blind": self.big_blind,
+            "ante": self.ante,
+            "current_bet": self.current_bet,
+            "game_time": self.game_time,
+            "phase": self.phase,
+            "table_cards": list(self.table_cards),
+            "hand_started": self.hand_started
+        }
+
+    @classmethod
+    def from_snapshot(cls, doc):
+        state = cls(doc["_id"], doc["small_blind"], doc["big_blind"], doc.get("ante", 0))
+        for seat_doc in doc["seats"]:
+            seat = Seat.from_doc(seat_doc)
+            state.seats.append(seat)
+            state.seats_by_name[seat.name] = seat
+            state.ring.add_seat()
+        state.folded = doc["folded"]
+        state.eliminated = doc["eliminated"]
+        positions = doc["positions"]
+        state.dealer = positions["dealer"]
+        state.sb = positions["sb"]
+        state.bb = positions["bb"]
+        state.utg = positions["utg"]
+        state.current_player = positions["current_player"]
+        state.action = positions["action"]
+        state.pot = doc["pot"]
+        state.current_bet = doc["current_bet"]
+        state.game_time = doc["game_time"]
+        state.phase = doc["phase"]
+        state.table_cards = doc["table_cards"]
+        state.hand_started = doc.get("hand_started", 0)
+        state.ring.rebuild(state.seats)
+        return state
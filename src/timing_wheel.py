@@ -0,0 +1,82 @@
+import math
+
+## Hierarchical Timing Wheel ##
+# Timers are bucketed by the tick they expire on. Level 0 has one slot per tick,
+# every level above it has slots that are `slots` times wider. A timer goes in
+# the lowest level whose range reaches its deadline and is moved down a level
+# when the wheel reaches its slot, so scheduling and cancelling are O(1) and an
+# advance only touches the slots it passes, however many timers are pending.
+#
+# With the defaults (0.1s ticks, 64 slots, 4 levels) level 0 spans 6.4s and the
+# top level about 19 days, later deadlines wait in the top level and are
+# rescheduled each time it comes round.
+
+class Timer:
+    __slots__ = ("tick", "key", "slot")
+
+    def __init__(self, tick, key):
+        self.tick = tick
+        self.key = key
+        self.slot = None
+
+class TimingWheel:
+    def __init__(self, resolution=0.1, slots=64, levels=4, now=0):
+        self.resolution = resolution
+        self.slots = slots
+        self.spans = [slots ** level for level in range(levels)]
+        self.wheels = [[set() for _ in range(slots)] for _ in range(levels)]
+        # timers already due, fired on the next advance
+        self.ready = set()
+        self.current = math.floor(round(now / resolution, 6))
+
+    def __len__(self):
+        return len(self.ready) + sum(len(slot) for wheel in self.wheels for slot in wheel)
+
+    # A timer fires on the first tick at or after its deadline, never before it
+    def schedule(self, deadline, key):
+        return self.insert(Timer(math.ceil(round(deadline / self.resolution, 6)), key))
+
+    def insert(self, timer):
+        delta = timer.tick - self.current
+        if delta <= 0:
+            slot = self.ready
+        else:
+            level = 0
+            while level < len(self.spans) - 1 and delta >= self.spans[level + 1]:
+                level += 1
+            slot = self.wheels[level][(timer.tick // self.spans[level]) % self.slots]
+        timer.slot = slot
+        slot.add(timer)
+        return timer
+
+    def cancel(self, timer):
+        if timer.slot is not None:
+            timer.slot.discard(timer)
+            timer.slot = None
+
+    # Moves the wheel up to now, returns the timers that expired in deadline order
+    def advance(self, now):
+        target = math.floor(round(now / self.resolution, 6))
+        expired = []
+        while self.current < target:
+            self.current += 1
+            # bring timers from higher levels down as the lower level wraps
+            level = 1
+            while level < len(self.spans) and self.current % self.spans[level] == 0:
+                slot = self.wheels[level][(self.current // self.spans[level]) % self.slots]
+                timers = list(slot)
+                slot.clear()
+                for timer in timers:
+                    self.insert(timer)
+                level += 1
+            slot = self.wheels[0][self.current % self.slots]
+            if slot:
+                expired += slot
+                slot.clear()
+        if self.ready:
+            expired += self.ready
+            self.ready.clear()
+        for timer in expired:
+            timer.slot = None
+        expired.sort(key=lambda timer: timer.tick)
+        return expired
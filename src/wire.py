@@ -0,0 +1,116 @@
+import json
+
+import msgpack
+
+from card import encode_card
+
+## Wire Protocol ##
+# A client picks how it wants its events encoded when it connects, with
+# auth={"protocol": "msgpack"}, and sends its own messages the same way.
+#   json     the payloads as the engine builds them, the default
+#   msgpack  one binary msgpack message per event, laid out by the schema below
+#
+# msgpack schema:
+#   - a card is one byte, encode_card(card) with 0x40 set when it is revealed,
+#     a face down card is 0xff, a list of cards is a byte string
+#   - players, table info and game state records are maps keyed by the index of
+#     the field name in PLAYER_FIELDS, TABLE_FIELDS and STATE_FIELDS, a delta
+#     sends just the fields that changed like the JSON one does
+#   - players are referenced by seat position instead of name (equity, winners)
+#     and delta players are keyed by int position
+#   - deal_cards is just the byte string of the hole cards
+#   - declare_winners is [[winner positions], [[amount, [winner positions]] per pot]]
+#   - equity is [phase, {position: result}]
+#   - every other event is its JSON payload packed with msgpack
+#
+# Table broadcasts are encoded once per protocol in use at the table, not per client.
+# Spectators get the same encodings, spectator_feed.py caches their snapshots.
+
+JSON = "json"
+MSGPACK = "msgpack"
+PROTOCOLS = (JSON, MSGPACK)
+
+PLAYER_FIELDS = ["name", "position", "status", "chips", "cards", "betSize", "rebuys", "permissions"]
+TABLE_FIELDS = ["pot", "minBet", "currentBet", "phase", "dealer", "sb", "bb", "utg", "currentPlayer", "action",
+    "playerCount", "folded", "eliminated", "tableCards", "equity", "ante"]
+STATE_FIELDS = ["seq", "table", "players", "removed", "playerCount"]
+
+PLAYER_KEYS = {field: i for i, field in enumerate(PLAYER_FIELDS)}
+TABLE_KEYS = {field: i for i, field in enumerate(TABLE_FIELDS)}
+STATE_KEYS = {field: i for i, field in enumerate(STATE_FIELDS)}
+
+REVEALED = 0x40
+FACE_DOWN = 0xff
+
+def negotiate(auth):
+    if isinstance(auth, dict) and auth.get("protocol") in PROTOCOLS:
+        return auth["protocol"]
+    return JSON
+
+def pack_card(card):
+    if card["value"] is None:
+        return FACE_DOWN
+    return encode_card(card) | (REVEALED if card.get("revealed") else 0)
+
+def pack_cards(cards):
+    return bytes(pack_card(card) for card in cards)
+
+# Seat positions in place of player names
+def pack_positions(names, seat_of):
+    return [seat_of(name).position for name in names]
+
+def pack_player(player):
+    packed = {}
+    for field, value in player.items():
+        packed[PLAYER_KEYS.get(field, field)] = pack_cards(value) if field == "cards" else value
+    return packed
+
+def pack_table(table, seat_of):
+    packed = {}
+    for field, value in table.items():
+        if field == "tableCards":
+            value = pack_cards(value)
+        elif field == "equity":
+            value = {seat_of(name).position: result for name, result in value.items()}
+        packed[TABLE_KEYS.get(field, field)] = value
+    return packed
+
+# Full snapshots (game_state) and deltas (game_state_delta), see state_diff.py
+def pack_state(state, seat_of):
+    packed = {}
+    for field, value in state.items():
+        if field == "table":
+            value = pack_table(value, seat_of)
+        elif field == "players":
+            if isinstance(value, list):
+                value = [pack_player(player) for player in value]
+            else:
+                value = {int(position): pack_player(player) for position, player in value.items()}
+        elif field == "removed":
+            value = [TABLE_KEYS.get(name, name) for name in value]
+        packed[STATE_KEYS[field]] = value
+    return packed
+
+def pack_winners(payload, seat_of):
+    pots = [[pot["amount"], pack_positions(pot["winners"], seat_of)] for pot in payload["pots"]]
+    return [pack_positions(payload["winners"], seat_of), pots]
+
+# Encodes an outgoing event for protocol, seat_of maps player names to seats
+def encode(name, payload, protocol, seat_of=None):
+    if protocol == JSON:
+        return payload
+    if name in ("game_state", "game_state_delta"):
+        payload = pack_state(payload, seat_of)
+    elif name == "deal_cards":
+        payload = pack_cards(payload["cards"])
+    elif name == "declare_winners":
+        payload = pack_winners(payload, seat_of)
+    elif name == "equity":
+        payload = [payload["phase"], {seat_of(player).position: result for player, result in payload["equity"].items()}]
+    return msgpack.packb(payload)
+
+# Incoming messages are a JSON string or msgpack bytes holding the same map
+def decode(message):
+    if isinstance(message, (bytes, bytearray)):
+        return msgpack.unpackb(message)
+    return json.loads(message)
@@ -0,0 +1,65 @@
+import time
+import traceback
+from threading import Thread, Event, Lock
+
+from pymongo import ReplaceOne
+
+## Write Behind Persistence ##
+# save() takes a snapshot straight away (cheap, no I/O) and a background thread
+# writes the newest snapshot of every table in one bulk_write. Snapshots of the
+# same table saved between flushes are coalesced, only the last one is written.
+# A failed write puts its snapshots back, unless the table has saved a newer one
+# since, and is retried after retry seconds.
+class WriteBehindStore:
+    def __init__(self, collection, interval=0.05, retry=1.0):
+        self.collection = collection
+        self.interval = interval
+        self.retry = retry
+        self.pending = {}
+        self.lock = Lock()
+        self.wake = Event()
+        self.stopped = Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def save(self, state):
+        snapshot = state.snapshot()
+        with self.lock:
+            self.pending[state.table_id] = snapshot
+        self.wake.set()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.wake.wait()
+            self.wake.clear()
+            # give other actions a moment to land in the same batch
+            time.sleep(self.interval)
+            # the database being away for a while must not stop the thread
+            try:
+                self.flush()
+            except Exception:
+                traceback.print_exc()
+                self.stopped.wait(self.retry)
+                self.wake.set()
+
+    def flush(self):
+        with self.lock:
+            pending = self.pending
+            self.pending = {}
+        if not pending:
+            return
+        try:
+            self.collection.bulk_write([ReplaceOne({"_id": table_id}, snapshot, upsert=True) for table_id, snapshot in pending.items()], ordered=False)
+        except Exception:
+            with self.lock:
+                for table_id, snapshot in pending.items():
+                    self.pending.setdefault(table_id, snapshot)
+            raise
+
+    def stop(self):
+        self.stopped.set()
+        self.wake.set()
+        self.flush()
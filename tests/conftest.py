@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# the modules live flat in src and import each other by name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+RANKS = "23456789TJQKA"
+SUITS = "cdhs"
+
+# "As Kd" -> card codes (see card.py)
+def cards(text):
+    return [RANKS.index(card[0]) * 4 + SUITS.index(card[1]) for card in text.split()]
+
+# payloads of the name events a socketio test client got since the last call
+def received(client, name):
+    return [message["args"][0] for message in client.get_received() if message["name"] == name]
+
+# a dealer on an empty mongomock database, with no tables to recover
+@pytest.fixture
+def server():
+    mongomock = pytest.importorskip("mongomock")
+    pytest.importorskip("flask_socketio")
+    from dealer import create_app
+    return create_app("http://localhost:5000", db=mongomock.MongoClient().pokerdb, recover=False)
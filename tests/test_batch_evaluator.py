@@ -0,0 +1,13 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from evaluator import evaluate
+from batch_evaluator import evaluate_batch
+
+def test_batch_evaluator_matches_evaluate():
+    rng = random.Random(11)
+    hands = [rng.sample(range(52), 7) for _ in range(500)]
+    assert list(evaluate_batch(np.array(hands, dtype=np.int64))) == [evaluate(hand) for hand in hands]
@@ -0,0 +1,106 @@
+import random
+
+from blind_schedule import BlindSchedule
+from engine import Engine
+from table_state import TableState
+
+FOLD, CALL, RAISE, ALL_IN = 4, 1, 3, 7
+
+def make_engine(stacks, ante=0, schedule=None, seed=0):
+    state = TableState("test", 10, 20, ante)
+    engine = Engine(state, 15, 20, rng=random.Random(seed), views=False, schedule=schedule)
+    for i, chips in enumerate(stacks):
+        engine.add_player("p%d" % i, chips, "s%d" % i)
+    return engine
+
+def table_chips(state):
+    return sum(seat.chips for seat in state.seats) + state.pot
+
+def test_short_blinds_post_what_is_left():
+    engine = make_engine([1000, 12, 12], ante=5)
+    engine.start_game()
+    state = engine.state
+    assert all(seat.chips >= 0 for seat in state.seats)
+    assert table_chips(state) == 1024
+
+def test_short_big_blind_still_owes_the_full_blind():
+    # four players: the big blind is seat 0
+    engine = make_engine([8, 1000, 1000, 1000])
+    state = engine.state
+    engine.start_game()
+    assert state.bb == 0
+    assert state.seat(0).bet_size == 8 and state.seat(0).chips == 0
+    assert state.current_bet == 20
+
+def test_random_play_keeps_every_chip():
+    rng = random.Random(5)
+    for game in range(20):
+        stacks = [rng.choice([15, 40, 200, 1000]) for _ in range(rng.randint(2, 6))]
+        engine = make_engine(stacks, ante=rng.choice([0, 5]), schedule=BlindSchedule(0), seed=game)
+        state = engine.state
+        engine.start_game()
+        for _ in range(400):
+            if sum(seat.chips > 0 for seat in state.seats) < 2:
+                break
+            position = state.current_player
+            seat = state.seat(position)
+            roll = rng.random()
+            if roll < 0.15:
+                engine.next_turn(position, FOLD, seat.bet_size)
+            elif roll < 0.3:
+                engine.next_turn(position, RAISE, min(state.current_bet + 40, seat.chips + seat.bet_size))
+            elif roll < 0.4:
+                engine.next_turn(position, ALL_IN, seat.chips + seat.bet_size)
+            else:
+                engine.next_turn(position, CALL, min(state.current_bet, seat.chips + seat.bet_size))
+            assert all(seat.chips >= 0 for seat in state.seats)
+            assert table_chips(state) == sum(stacks)
+
+def test_all_in_seats_get_no_turns_and_are_never_timed_out_of_the_pot():
+    engine = make_engine([5000, 5000, 300])
+    state = engine.state
+    engine.start_game()
+    # three players: the button at 1 acts first, then the blinds at 2 and 0
+    assert (state.dealer, state.sb, state.bb) == (1, 2, 0)
+    engine.next_turn(1, CALL, 20)
+    engine.next_turn(2, ALL_IN, 300)
+    engine.next_turn(0, CALL, 300)
+    engine.next_turn(1, CALL, 300)
+    assert state.phase == 1
+    # the short stack is all in, the flop starts with the big blind
+    assert state.current_player == 0
+    engine.next_turn(0, RAISE, 100)
+    assert state.current_player == 1
+    engine.next_turn(1, CALL, 100)
+    hand = engine.hand
+    events = []
+    while engine.hand is hand:
+        assert state.seat(2).status == 3
+        assert state.current_player != 2
+        events += engine.timeout(state.current_player)
+    winners = [payload for name, payload, _ in events if name == "declare_winners"]
+    assert winners[0]["pots"][0]["amount"] == 900
+    assert table_chips(state) == 10300
+
+def test_timeout_checks_for_an_all_in_seat():
+    engine = make_engine([20, 10])
+    state = engine.state
+    engine.start_game()
+    # both blinds are all in, the seats still take turns but can only check
+    assert state.ring.all_in == {0, 1}
+    engine.timeout(state.current_player)
+    assert state.seat(0).status != 2 and state.seat(1).status != 2
+
+def test_late_actions_are_dropped():
+    engine = make_engine([1000, 1000, 1000])
+    state = engine.state
+    engine.start_game()
+    assert state.current_player == 1
+    # the button runs out of time facing the big blind and is folded
+    engine.timeout(1)
+    assert state.seat(1).status == 2
+    pot, action, current = state.pot, state.action, state.current_player
+    assert engine.next_turn(1, RAISE, 100) == []
+    # nor can anybody act out of turn
+    assert engine.next_turn(0, RAISE, 100) == []
+    assert (state.pot, state.action, state.current_player) == (pot, action, current)
@@ -0,0 +1,75 @@
+import json
+import random
+import threading
+import time
+
+import pytest
+
+from conftest import cards
+from equity import known_equity, cached_equity, exact_equity
+from hand_cache import LRUCache
+
+def test_flop_on_is_exact():
+    hands = [cards("Ac Ad"), cards("Kc Kd")]
+    for board in ("2h 7s 9c", "2h 7s 9c Ts", "2h 7s 9c Ts 3d"):
+        assert known_equity(hands, cards(board)) == exact_equity(hands, cards(board), processes=1)
+
+def test_heads_up_preflop_uses_the_real_suits():
+    hands = [cards("Ah Kh"), cards("3h 2h")]
+    assert known_equity(hands) is None
+    result = cached_equity(hands, processes=1)
+    # the AKs vs 32s class average is 64.6%
+    assert result["players"][0]["equity"] == pytest.approx(67.07, abs=0.01)
+    assert result["margin"] == 0
+    # answered from the cache with the suits renamed
+    assert known_equity([cards("As Ks"), cards("3s 2s")]) == result
+
+def test_multiway_preflop_is_sampled_once():
+    rng = random.Random(3)
+    deal = rng.sample(range(52), 6)
+    hands = [deal[0:2], deal[2:4], deal[4:6]]
+    assert known_equity(hands) is None
+    result = cached_equity(hands)
+    assert known_equity(hands) == result
+    assert abs(sum(player["equity"] for player in result["players"]) - 100) < 1e-6
+
+def test_cache_is_shared_between_threads():
+    cache = LRUCache(16)
+    errors = []
+    def use(seed):
+        rng = random.Random(seed)
+        try:
+            for i in range(20000):
+                if rng.random() < 0.5:
+                    cache.put(rng.randrange(64), i)
+                else:
+                    cache.get(rng.randrange(64))
+        except Exception as error:
+            errors.append(error)
+    threads = [threading.Thread(target=use, args=(seed,)) for seed in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(cache) == 16
+
+def test_all_in_equity_follows_the_game_state(server):
+    app, socketio = server
+    clients = []
+    for name in ("a", "b", "c"):
+        client = socketio.test_client(app)
+        client.emit("set_player_name", json.dumps({"name": name, "table": "t"}))
+        clients.append(client)
+    clients[0].emit("start_game")
+    # three players: the dealer is 1 and first to act, then the blinds at 2 and 0
+    for position in (1, 2, 0):
+        clients[position].emit("next_turn", json.dumps({"position": position, "option": 7, "betSize": 5000}))
+    received = []
+    deadline = time.time() + 10
+    while time.time() < deadline and not any(message["name"] == "equity" for message in received):
+        socketio.sleep(0.05)
+        received += clients[0].get_received()
+    equity = [message["args"][0] for message in received if message["name"] == "equity"]
+    assert equity and equity[0]["phase"] == 0
+    assert sorted(equity[0]["equity"]) == ["a", "b", "c"]
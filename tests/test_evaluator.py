@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from conftest import cards
+from evaluator import (evaluate, evaluate7, strength_category, HIGH_CARD, PAIR, TWO_PAIR, TRIPS, STRAIGHT,
+    FLUSH, FULL_HOUSE, QUADS, STRAIGHT_FLUSH)
+
+@pytest.mark.parametrize("hand, category", [
+    ("2c 7d 9h Js Kc", HIGH_CARD),
+    ("2c 2d 9h Js Kc", PAIR),
+    ("2c 2d 9h 9s Kc", TWO_PAIR),
+    ("2c 2d 2h 9s Kc", TRIPS),
+    ("Ac 2d 3h 4s 5c", STRAIGHT),
+    ("Tc Jd Qh Ks Ac", STRAIGHT),
+    ("2c 7c 9c Jc Kc", FLUSH),
+    ("2c 2d 2h 9s 9c", FULL_HOUSE),
+    ("2c 2d 2h 2s 9c", QUADS),
+    ("Ac 2c 3c 4c 5c", STRAIGHT_FLUSH),
+    ("Tc Jc Qc Kc Ac", STRAIGHT_FLUSH),
+])
+def test_categories(hand, category):
+    assert strength_category(evaluate(cards(hand))) == category
+
+# the best hand of each category against the worst of the next one up
+@pytest.mark.parametrize("lower, higher", [
+    ("Ac Kd Qh Js 9c", "2c 2d 3h 4s 5c"),
+    ("Ac Ad Kh Qs Jc", "2c 2d 3h 3s 4c"),
+    ("Ac Ad Kh Ks Qc", "2c 2d 2h 3s 4c"),
+    ("Ac Ad Ah Ks Qc", "Ac 2d 3h 4s 5c"),
+    ("Tc Jd Qh Ks Ac", "2c 3c 4c 5c 7c"),
+    ("Ac Kc Qc Jc 9c", "2c 2d 2h 3s 3c"),
+    ("Ac Ad Ah Ks Kc", "2c 2d 2h 2s 3c"),
+    ("Ac Ad Ah As Kc", "Ac 2c 3c 4c 5c"),
+])
+def test_category_boundaries(lower, higher):
+    assert evaluate(cards(lower)) < evaluate(cards(higher))
+
+def test_wheel_is_the_lowest_straight():
+    assert evaluate(cards("Ac 2d 3h 4s 5c")) < evaluate(cards("2c 3d 4h 5s 6c"))
+    assert evaluate(cards("Ac 2c 3c 4c 5c")) < evaluate(cards("2d 3d 4d 5d 6d"))
+
+def test_kickers():
+    assert evaluate(cards("Ac Ad Kh 9s 8c")) > evaluate(cards("Ac Ad Qh Js Tc"))
+    assert evaluate(cards("Ac Ad Kh 9s 8c")) == evaluate(cards("Ah As Kd 9c 8d"))
+
+def test_seven_cards_use_the_best_five():
+    # third pair only counts as a kicker
+    assert evaluate(cards("Ac Ad Kh Ks Qc Qd 2h")) == evaluate(cards("Ac Ad Kh Ks Qc"))
+    # two sets make a full house with the higher set
+    assert evaluate(cards("9c 9d 9h 5s 5c 5d 2h")) == evaluate(cards("9c 9d 9h 5s 5c"))
+    # flush over a straight on the same board
+    assert strength_category(evaluate(cards("4c 5c 6d 7c 8h Kc 2c"))) == FLUSH
+
+def test_evaluate7_matches_evaluate():
+    rng = random.Random(7)
+    for _ in range(2000):
+        hand = rng.sample(range(52), 7)
+        assert evaluate7(*hand) == evaluate(hand)
@@ -0,0 +1,65 @@
+import os
+
+from conftest import cards
+from hand_history import (HandRecord, SeatRecord, HandHistoryWriter, encode_record, decode_record, read_hands,
+    read_segment, segment_paths, LENGTH, MAGIC)
+
+def make_hand(seed=7, ante=0):
+    seats = [
+        SeatRecord(0, "ann", 3, False, 1000, cards("As Kd"), 1250),
+        SeatRecord(1, "bö", 2, False, 800, cards("7c 2h"), 780),
+        SeatRecord(2, "cy", 0, True, 0, []),
+    ]
+    hand = HandRecord("main", seed, 1700000000000, (0, 1, 0, 0), (1, 0), 10, 20, seats, cards("2c 7d 9h Js Kc"), ante)
+    hand.actions = [(0, 0, 3, 60), (0, 1, 4, 20)]
+    hand.awards = [(0, 250)]
+    hand.winners = [0]
+    return hand
+
+def same(a, b):
+    fields = ("table_id", "seed", "started", "dealer", "sb", "bb", "utg", "prev_sb", "prev_bb", "small_blind",
+        "big_blind", "ante", "board", "awards", "winners")
+    seat_fields = ("position", "name", "status", "b_elim", "chips_before", "chips_after", "cards")
+    return (all(getattr(a, field) == getattr(b, field) for field in fields)
+        and [tuple(action) for action in a.actions] == [tuple(action) for action in b.actions]
+        and [[getattr(seat, field) for field in seat_fields] for seat in a.seats]
+            == [[getattr(seat, field) for field in seat_fields] for seat in b.seats])
+
+def test_record_round_trip():
+    for hand in (make_hand(), make_hand(seed=2 ** 64 - 1, ante=5)):
+        record = encode_record(hand)
+        (length,) = LENGTH.unpack_from(record, 0)
+        assert length == len(record) - LENGTH.size
+        assert same(decode_record(record, LENGTH.size, len(record)), hand)
+
+def test_records_without_an_ante_read_as_zero():
+    hand = make_hand(ante=30)
+    # a record from before antes ends right after the winners
+    record = encode_record(hand)[:-4]
+    assert decode_record(record, LENGTH.size, len(record)).ante == 0
+
+def test_writer_rotates_segments(tmp_path):
+    writer = HandHistoryWriter(str(tmp_path), segment_bytes=300)
+    hands = [make_hand(seed) for seed in range(5)]
+    for hand in hands:
+        writer.append(hand)
+    writer.close()
+    paths = segment_paths(str(tmp_path))
+    assert len(paths) > 1
+    assert all(open(path, "rb").read(4) == MAGIC for path in paths)
+    assert [hand.seed for hand in read_hands(str(tmp_path))] == list(range(5))
+
+def test_partial_record_is_dropped_on_reopen(tmp_path):
+    writer = HandHistoryWriter(str(tmp_path))
+    writer.append(make_hand(1))
+    writer.close()
+    path = segment_paths(str(tmp_path))[0]
+    # a crash in the middle of the second record
+    with open(path, "ab") as segment:
+        segment.write(encode_record(make_hand(2))[:20])
+    assert [hand.seed for hand in read_segment(path)] == [1]
+    writer = HandHistoryWriter(str(tmp_path))
+    writer.append(make_hand(3))
+    writer.close()
+    assert [hand.seed for hand in read_hands(str(tmp_path))] == [1, 3]
+    assert os.path.getsize(path) == len(MAGIC) + len(encode_record(make_hand(1))) + len(encode_record(make_hand(3)))
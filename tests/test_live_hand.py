@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from conftest import cards
+from evaluator import evaluate7
+from live_hand import LiveHand
+
+def test_strength_matches_evaluate7_card_by_card():
+    rng = random.Random(20)
+    for _ in range(500):
+        deal = rng.sample(range(52), 7)
+        hand = LiveHand(deal[:2])
+        for card in deal[2:]:
+            hand.add(card)
+        assert hand.strength() == evaluate7(*deal)
+
+@pytest.mark.parametrize("hole, board, draws", [
+    ("Ah Kh", "2h 7h 9c", [{"draw": "flush", "outs": 9}]),
+    ("8c 9d", "Ts Jh 2c", [{"draw": "straight", "outs": 8}]),
+    ("8c 9d", "Js Qh 2c", [{"draw": "gutshot", "outs": 4}]),
+    ("Ac 2d", "3s 4h 9c", [{"draw": "gutshot", "outs": 4}]),
+    # the 7h and Qh are counted with the flush
+    ("8h 9h", "Th Jh 2c", [{"draw": "flush", "outs": 9}, {"draw": "straight", "outs": 6}]),
+    # a made straight only draws to the flush, a made flush to nothing
+    ("8h 9h", "Th Jh Qc", [{"draw": "flush", "outs": 9}]),
+    ("Ah Kh", "2h 7h 9h", []),
+    ("Ac Kd", "2h 7s 9c", []),
+])
+def test_draws(hole, board, draws):
+    assert LiveHand(cards(hole + " " + board)).draws() == draws
+
+def test_no_draws_on_the_river():
+    assert LiveHand(cards("8h 9h Th Jh 2c 3d 4s")).draws() == []
+
+def test_view_adds_up_the_outs():
+    view = LiveHand(cards("8h 9h Th Jh 2c")).view()
+    assert view == {"hand": "high card", "draws": [{"draw": "flush", "outs": 9}, {"draw": "straight", "outs": 6}],
+        "outs": 15}
@@ -0,0 +1,29 @@
+import pytest
+
+from conftest import cards
+from equity import class_equity
+from preflop_table import NUM_CLASSES, load_table, hand_class
+
+table = load_table()
+pytestmark = pytest.mark.skipif(table is None, reason="the preflop table has not been built")
+
+@pytest.mark.parametrize("hand_a, hand_b, equity", [
+    ("Ac Ad", "Kc Kd", 81.9),
+    ("Ac Kc", "Qd Qh", 46.0),
+    ("7c 2d", "Ah As", 11.8),
+])
+def test_known_matchups(hand_a, hand_b, equity):
+    result = class_equity(hand_class(cards(hand_a)), hand_class(cards(hand_b)))
+    assert result["players"][0]["equity"] == pytest.approx(equity, abs=0.3)
+
+def test_rows_mirror_their_columns():
+    for class_a in range(0, NUM_CLASSES, 7):
+        for class_b in range(NUM_CLASSES):
+            a = table.lookup_class(class_a, class_b)
+            b = table.lookup_class(class_b, class_a)
+            assert a["tie"] == pytest.approx(b["tie"], abs=1e-3)
+            assert a["win"] + a["tie"] + b["win"] == pytest.approx(100, abs=1e-3)
+
+def test_lookup_ignores_suits_and_order():
+    assert hand_class(cards("Ac Kc")) == hand_class(cards("Kh Ah"))
+    assert table.lookup(cards("Ac Kc"), cards("Qd Qh")) == table.lookup(cards("Ks As"), cards("Qc Qs"))
@@ -0,0 +1,76 @@
+import json
+import time
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+pytest.importorskip("flask_socketio")
+
+from conftest import received
+from dealer import create_app
+from recovery import latest_hands
+
+# the documents the dealer kept in the table collection before tables had snapshots
+BASELINE_TABLE = [
+    {"_id": "player_count", "count": 2, "folded": 0, "eliminated": 0},
+    {"_id": "positions", "dealer": 0, "bb": 1, "sb": 0, "utg": 0, "current_player": 0, "action": -1},
+    {"_id": "table_chips", "pot": 30, "small_blind": 10, "big_blind": 20, "current_bet": 20},
+    {"_id": "game_time", "time": 0},
+    {"_id": "game_phase", "phase": 1},
+    {"_id": "table_cards", "0": 12, "1": 40, "2": 7},
+]
+
+def join(socketio, app, name, table_id="t"):
+    client = socketio.test_client(app)
+    client.emit("set_player_name", json.dumps({"name": name, "table": table_id}))
+    return client, received(client, "player_info")[0]["token"]
+
+# plays a few hands, returns the seated clients and their tokens
+def play(db, history_dir):
+    app, socketio = create_app("http://localhost:5000", db=db, history_dir=history_dir)
+    (a, _), (b, token) = join(socketio, app, "a"), join(socketio, app, "b")
+    a.emit("start_game")
+    for turn in range(7):
+        for client, position in ((a, 0), (b, 1)):
+            client.emit("next_turn", json.dumps({"position": position, "option": 4 if turn % 3 == 2 else 1, "betSize": 20}))
+    # let the write behind store flush the snapshot
+    time.sleep(0.3)
+    return token
+
+def test_starts_on_a_baseline_database():
+    db = mongomock.MongoClient().pokerdb
+    db.table.insert_many(BASELINE_TABLE)
+    app, socketio = create_app("http://localhost:5000", db=db)
+    client, token = join(socketio, app, "a")
+    assert token
+    client.emit("start_game")
+
+def test_resume_after_restart(tmp_path):
+    db = mongomock.MongoClient().pokerdb
+    db.table.insert_many(BASELINE_TABLE)
+    token = play(db, str(tmp_path))
+    snapshot = db.table.find_one({"_id": "t"})
+    app, socketio = create_app("http://localhost:5000", db=db, history_dir=str(tmp_path))
+    client = socketio.test_client(app)
+    client.emit("resume", json.dumps({"token": token}))
+    states = received(client, "game_state")
+    assert states
+    chips = {player["name"]: player["chips"] for player in states[-1]["players"]}
+    assert sum(chips.values()) + states[-1]["table"]["pot"] == sum(seat["chips"] + seat["committed"] for seat in snapshot["seats"])
+
+def test_tables_over_the_startup_budget_are_restored_on_first_use(tmp_path):
+    db = mongomock.MongoClient().pokerdb
+    token = play(db, str(tmp_path))
+    app, socketio = create_app("http://localhost:5000", db=db, history_dir=str(tmp_path), startup_budget=0)
+    client = socketio.test_client(app)
+    client.emit("resume", json.dumps({"token": token}))
+    assert received(client, "game_state")
+
+def test_latest_hands_stops_at_the_deadline(tmp_path):
+    db = mongomock.MongoClient().pokerdb
+    play(db, str(tmp_path))
+    since = {"t": 0}
+    hands, missed = latest_hands(str(tmp_path), since)
+    assert hands["t"].table_id == "t" and not missed
+    hands, missed = latest_hands(str(tmp_path), since, time.time() - 1)
+    assert hands == {} and missed == {"t"}
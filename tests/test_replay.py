@@ -0,0 +1,53 @@
+import random
+
+from blind_schedule import BlindSchedule
+from engine import Engine
+from hand_history import HandHistoryWriter
+from replay import replay_archive, replay_hand, compare_hands
+from table_state import TableState
+
+FOLD, CALL, RAISE, ALL_IN = 4, 1, 3, 7
+
+# plays random games and returns the engine's record of every finished hand
+def play_hands(seed, games=20):
+    rng = random.Random(seed)
+    hands = []
+    for game in range(games):
+        state = TableState("t%d" % game, 10, 20, rng.choice([0, 5]))
+        engine = Engine(state, 15, 20, rng=random.Random(game), views=False, schedule=BlindSchedule(0))
+        for i in range(rng.randint(2, 6)):
+            engine.add_player("p%d" % i, rng.choice([200, 1000, 3000]), "s%d" % i)
+        events = engine.start_game()
+        for _ in range(300):
+            hands += [payload for name, payload, _ in events if name == "hand_history"]
+            # one seat left that is not eliminated
+            if sum(seat.status != 1 for seat in state.seats) < 2:
+                break
+            position = state.current_player
+            seat = state.seat(position)
+            roll = rng.random()
+            if roll < 0.15:
+                events = engine.next_turn(position, FOLD, seat.bet_size)
+            elif roll < 0.3:
+                events = engine.next_turn(position, RAISE, min(state.current_bet + 40, seat.chips + seat.bet_size))
+            elif roll < 0.4:
+                events = engine.next_turn(position, ALL_IN, seat.chips + seat.bet_size)
+            else:
+                events = engine.next_turn(position, CALL, min(state.current_bet, seat.chips + seat.bet_size))
+    return hands
+
+def test_recorded_hands_replay(tmp_path):
+    hands = play_hands(1)
+    assert len(hands) > 50
+    writer = HandHistoryWriter(str(tmp_path), segment_bytes=4096)
+    for hand in hands:
+        writer.append(hand)
+    writer.close()
+    result = replay_archive(str(tmp_path), processes=1)
+    assert result == {"hands": len(hands), "mismatches": []}
+
+def test_changed_hand_is_reported():
+    hand = play_hands(2, games=1)[0]
+    hand.seats[0].chips_after += 1
+    problems = compare_hands(hand, replay_hand(hand))
+    assert problems == ["p0 chips {} != {}".format(hand.seats[0].chips_after - 1, hand.seats[0].chips_after)]
@@ -0,0 +1,50 @@
+import json
+
+from conftest import received
+
+def sit(app, socketio, name):
+    client = socketio.test_client(app)
+    client.emit("set_player_name", json.dumps({"name": name, "table": "t"}))
+    return client, received(client, "player_info")[0]
+
+def test_token_resumes_its_own_seat(server):
+    app, socketio = server
+    sit(app, socketio, "a")
+    b, info = sit(app, socketio, "b")
+    b.disconnect()
+    client = socketio.test_client(app)
+    client.emit("set_player_name", json.dumps({"name": "b", "table": "t", "token": info["token"]}))
+    assert received(client, "player_info")[0] == {"accepted": True, "resumed": True, "position": info["position"],
+        "token": info["token"]}
+
+def test_token_for_another_name_is_refused(server):
+    app, socketio = server
+    sit(app, socketio, "a")
+    _, info = sit(app, socketio, "b")
+    client = socketio.test_client(app)
+    client.emit("set_player_name", json.dumps({"name": "a", "table": "t", "token": info["token"]}))
+    assert received(client, "player_info") == [{"accepted": False, "resumed": False}]
+
+def test_unknown_token_is_refused(server):
+    app, socketio = server
+    sit(app, socketio, "a")
+    client = socketio.test_client(app)
+    client.emit("resume", json.dumps({"token": "nope"}))
+    assert received(client, "player_info") == [{"accepted": False, "resumed": False}]
+
+def test_names_too_long_for_the_history_are_refused(server):
+    app, socketio = server
+    client = socketio.test_client(app)
+    client.emit("set_player_name", json.dumps({"name": "é" * 128, "table": "t"}))
+    assert received(client, "player_info") == [{"accepted": False}]
+    client.emit("spectate", json.dumps({"table": "t" * 256}))
+    assert received(client, "spectator_info") == [{"accepted": False}]
+    _, info = sit(app, socketio, "é" * 127)
+    assert info["accepted"]
+
+def test_index_does_not_touch_the_tables(server):
+    app, socketio = server
+    client, _ = sit(app, socketio, "a")
+    response = app.test_client().get("/")
+    assert response.status_code == 200 and response.get_json() == {"hello": "world"}
+    assert received(client, "deal_cards") == []
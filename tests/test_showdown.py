@@ -0,0 +1,100 @@
+from card import decode_cards
+from conftest import cards
+from showdown import build_pots, split_pot, award_pots, settle
+from table_state import TableState
+
+def make_table(stacks, committed, hands, board, dealer=0):
+    state = TableState("test", 5, 10)
+    for i, chips in enumerate(stacks):
+        seat = state.add_seat("p%d" % i, chips, 0, None)
+        seat.committed = committed[i]
+        if hands[i] is None:
+            seat.status = 2
+        else:
+            seat.status = 3
+            seat.cards = decode_cards(cards(hands[i]))
+    state.table_cards = decode_cards(cards(board))
+    state.pot = sum(committed)
+    state.dealer = dealer
+    return state
+
+def payouts(pots):
+    paid = {}
+    for pot in pots:
+        for position, chips in pot["winners"]:
+            paid[position] = paid.get(position, 0) + chips
+    return paid
+
+def test_single_pot():
+    assert build_pots({0: 100, 1: 100, 2: 100}, [0, 1, 2], 300) == [(100, 300)]
+
+def test_side_pots_at_each_all_in_level():
+    committed = {0: 50, 1: 200, 2: 500, 3: 500}
+    assert build_pots(committed, [0, 1, 2, 3], 1250) == [(50, 200), (200, 450), (500, 600)]
+
+def test_folded_chips_stay_in_their_levels():
+    # seat 3 folded after putting in 300, above the short all in
+    committed = {0: 100, 1: 400, 2: 400, 3: 300}
+    assert build_pots(committed, [0, 1, 2], 1200) == [(100, 400), (400, 800)]
+
+def test_folded_overbet_goes_to_the_last_pot():
+    assert build_pots({0: 100, 1: 100, 2: 250}, [0, 1], 450) == [(100, 450)]
+
+def test_odd_chips_go_left_of_the_dealer():
+    assert sorted(split_pot(101, [0, 2], 0, 4)) == [(0, 50), (2, 51)]
+    assert sorted(split_pot(101, [0, 2], 1, 4)) == [(0, 50), (2, 51)]
+    assert sorted(split_pot(101, [0, 2], 2, 4)) == [(0, 51), (2, 50)]
+    assert sorted(split_pot(100, [1, 3, 4], 3, 5)) == [(1, 33), (3, 33), (4, 34)]
+
+def test_split_pot_never_loses_chips():
+    for amount in range(50):
+        for count in range(1, 6):
+            winners = list(range(count))
+            assert sum(chips for _, chips in split_pot(amount, winners, 2, 6)) == amount
+
+def test_short_all_in_wins_only_the_main_pot():
+    strengths = {0: 30, 1: 20, 2: 10}
+    committed = {0: 50, 1: 200, 2: 200}
+    pots = build_pots(committed, strengths, 450)
+    results = award_pots(pots, strengths, committed, 0, 3)
+    assert [pot["winners"] for pot in results] == [[(0, 150)], [(1, 300)]]
+
+def test_multiway_all_in_three_pots():
+    strengths = {0: 10, 1: 40, 2: 30, 3: 20}
+    committed = {0: 500, 1: 100, 2: 300, 3: 500}
+    pots = build_pots(committed, strengths, 1400)
+    results = award_pots(pots, strengths, committed, 0, 4)
+    assert [pot["amount"] for pot in results] == [400, 600, 400]
+    assert payouts(results) == {1: 400, 2: 600, 3: 400}
+
+def test_tied_side_pot_splits_with_the_odd_chip():
+    # seat 3 folded, seats 1 and 2 tie for the side pot of 153
+    strengths = {0: 50, 1: 20, 2: 20}
+    committed = {0: 10, 1: 61, 2: 61, 3: 61}
+    pots = build_pots(committed, strengths, 193)
+    results = award_pots(pots, strengths, committed, 2, 4)
+    assert results[0] == {"amount": 40, "winners": [(0, 40)]}
+    # left of the dealer at 2 come 3, 0, then 1
+    assert results[1] == {"amount": 153, "winners": [(1, 77), (2, 76)]}
+
+def test_settle_split_board():
+    # everybody plays the board straight, the odd chip goes to the first seat left of the dealer
+    state = make_table([0, 0, 0], [35, 35, 35], ["2c 3d", "2d 3h", "2h 3s"], "Tc Jd Qh Ks Ac", dealer=1)
+    ranking, pots = settle(state)
+    assert ranking == [[0, 1, 2]]
+    assert sorted(pots[0]["winners"]) == [(0, 35), (1, 35), (2, 35)]
+
+def test_settle_skips_folded_hands():
+    state = make_table([0, 0, 0], [20, 20, 5], ["2c 7d", "Kc Kd", None], "Ac Ad 9h 4s 3c")
+    ranking, pots = settle(state)
+    assert ranking == [[1], [0]]
+    assert pots == [{"amount": 45, "winners": [(1, 45)]}]
+
+def test_settle_multiway_all_in():
+    hands = ["Ac As", "Kc Ks", "Qc Qs", "Jc Js"]
+    committed = [100, 250, 400, 400]
+    state = make_table([0, 0, 0, 0], committed, hands, "2d 5h 8c 9d 3h")
+    ranking, pots = settle(state)
+    assert ranking == [[0], [1], [2], [3]]
+    assert payouts(pots) == {0: 400, 1: 450, 2: 300}
+    assert sum(payouts(pots).values()) == state.pot
@@ -0,0 +1,49 @@
+import json
+
+from conftest import received
+
+def seat_players(app, socketio, table_id, count=2):
+    clients = []
+    for i in range(count):
+        client = socketio.test_client(app)
+        client.emit("set_player_name", json.dumps({"name": table_id + str(i), "table": table_id}))
+        clients.append(client)
+    clients[0].emit("start_game")
+    return clients
+
+def test_json_spectators_get_objects(server):
+    app, socketio = server
+    players = seat_players(app, socketio, "a")
+    viewer = socketio.test_client(app)
+    viewer.emit("spectate", json.dumps({"table": "a"}))
+    states = received(viewer, "game_state")
+    assert isinstance(states[-1], dict)
+    assert all(player["cards"][0]["value"] is None for player in states[-1]["players"])
+    players[1].emit("next_turn", json.dumps({"position": 1, "option": 1, "betSize": 20}))
+    messages = viewer.get_received()
+    assert {"game_state_delta", "action_clock"} <= {message["name"] for message in messages}
+    assert all(isinstance(message["args"][0], dict) for message in messages)
+
+def test_spectating_another_table_moves_the_viewer(server):
+    app, socketio = server
+    seat_players(app, socketio, "a")
+    b = seat_players(app, socketio, "b")
+    viewer = socketio.test_client(app)
+    viewer.emit("spectate", json.dumps({"table": "a"}))
+    viewer.emit("spectate", json.dumps({"table": "b"}))
+    viewer.get_received()
+    # heads up the small blind on the button acts first
+    b[1].emit("next_turn", json.dumps({"position": 1, "option": 1, "betSize": 20}))
+    assert received(viewer, "game_state_delta")
+    viewer.emit("spectate", json.dumps({"table": "a"}))
+    viewer.get_received()
+    b[0].emit("next_turn", json.dumps({"position": 0, "option": 1, "betSize": 20}))
+    assert not received(viewer, "game_state_delta")
+
+def test_table_ids_cannot_name_another_tables_room(server):
+    app, socketio = server
+    client = socketio.test_client(app)
+    client.emit("set_player_name", json.dumps({"name": "x", "table": "a/msgpack"}))
+    assert received(client, "player_info") == [{"accepted": False}]
+    client.emit("spectate", json.dumps({"table": "a/spectators/json"}))
+    assert received(client, "spectator_info") == [{"accepted": False}]
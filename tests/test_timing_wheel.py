@@ -0,0 +1,82 @@
+from action_clock import ActionClock
+from timing_wheel import TimingWheel
+
+def keys(timers):
+    return [timer.key for timer in timers]
+
+def test_timers_fire_at_their_deadline():
+    wheel = TimingWheel(resolution=0.1, now=0)
+    wheel.schedule(0.5, "a")
+    wheel.schedule(0.3, "b")
+    assert keys(wheel.advance(0.2)) == []
+    assert keys(wheel.advance(0.3)) == ["b"]
+    assert keys(wheel.advance(10)) == ["a"]
+    assert len(wheel) == 0
+
+def test_expired_timers_come_out_in_deadline_order():
+    wheel = TimingWheel(resolution=0.1, now=0)
+    for deadline, key in ((3.0, "c"), (1.0, "a"), (2.0, "b")):
+        wheel.schedule(deadline, key)
+    assert keys(wheel.advance(5)) == ["a", "b", "c"]
+
+def test_past_deadlines_fire_on_the_next_advance():
+    wheel = TimingWheel(resolution=0.1, now=10)
+    wheel.schedule(5, "late")
+    assert keys(wheel.advance(10)) == ["late"]
+
+def test_cancel():
+    wheel = TimingWheel(resolution=0.1, now=0)
+    timer = wheel.schedule(1, "a")
+    wheel.schedule(1, "b")
+    wheel.cancel(timer)
+    wheel.cancel(timer)
+    assert keys(wheel.advance(2)) == ["b"]
+
+def test_timers_cascade_down_from_higher_levels():
+    # level 0 spans 6.4s, level 1 409.6s
+    wheel = TimingWheel(resolution=0.1, slots=64, levels=4, now=0)
+    wheel.schedule(30, "level 1")
+    wheel.schedule(1000, "level 2")
+    assert keys(wheel.advance(29.9)) == []
+    assert keys(wheel.advance(30)) == ["level 1"]
+    assert keys(wheel.advance(999.9)) == []
+    assert keys(wheel.advance(1000)) == ["level 2"]
+
+def test_deadlines_past_the_top_level_wait_there():
+    wheel = TimingWheel(resolution=1, slots=4, levels=2, now=0)
+    wheel.schedule(50, "far")
+    assert keys(wheel.advance(49)) == []
+    assert keys(wheel.advance(50)) == ["far"]
+
+def test_clock_times_out_the_running_turn_once():
+    timeouts = []
+    clock = ActionClock(lambda table_id, position: timeouts.append((table_id, position)))
+    clock.start_turn("t", 0, 1)
+    # a new turn replaces the table's clock
+    clock.start_turn("t", 1, 1)
+    clock.start_turn("u", 2, 5)
+    clock.cancel("u")
+    assert clock.current_turn("t")[0] == 1
+    clock.expire(clock.wheel.current * clock.resolution + 2)
+    assert timeouts == [("t", 1)]
+    assert clock.current_turn("t") is None
+    clock.expire(clock.wheel.current * clock.resolution + 10)
+    assert timeouts == [("t", 1)]
+
+def test_a_failing_timeout_does_not_stop_the_others():
+    timeouts = []
+    def on_timeout(table_id, position):
+        timeouts.append(table_id)
+        if table_id == "bad":
+            raise RuntimeError("boom")
+    clock = ActionClock(on_timeout)
+    clock.start_turn("bad", 0, 1)
+    clock.start_turn("good", 0, 1)
+    clock.expire(clock.wheel.current * clock.resolution + 2)
+    assert sorted(timeouts) == ["bad", "good"]
+
+def test_timers_never_fire_early():
+    wheel = TimingWheel(resolution=0.1, now=0)
+    wheel.schedule(0.25, "a")
+    assert keys(wheel.advance(0.2)) == []
+    assert keys(wheel.advance(0.3)) == ["a"]
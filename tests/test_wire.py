@@ -0,0 +1,76 @@
+import json
+
+import msgpack
+
+from card import decode_card
+from wire import (JSON, MSGPACK, FACE_DOWN, REVEALED, PLAYER_KEYS, TABLE_KEYS, STATE_KEYS, negotiate, pack_card,
+    encode, decode)
+
+class Seat:
+    def __init__(self, position):
+        self.position = position
+
+SEATS = {"alice": Seat(0), "bob": Seat(3)}
+
+def seat_of(name):
+    return SEATS[name]
+
+def test_negotiate():
+    assert negotiate({"protocol": "msgpack"}) == MSGPACK
+    assert negotiate({"protocol": "xml"}) == JSON
+    assert negotiate(None) == JSON
+
+def test_cards_are_one_byte():
+    for card in range(52):
+        assert pack_card(decode_card(card)) == card
+        assert pack_card(decode_card(card, True)) == card | REVEALED
+    assert pack_card({"value": None, "suit": None}) == FACE_DOWN
+
+def test_json_payloads_pass_through():
+    payload = {"cards": [decode_card(5)]}
+    assert encode("deal_cards", payload, JSON) is payload
+
+def test_deal_cards():
+    payload = {"cards": [decode_card(51), decode_card(0)]}
+    assert msgpack.unpackb(encode("deal_cards", payload, MSGPACK)) == bytes([51, 0])
+
+def test_game_state():
+    state = {
+        "seq": 7,
+        "table": {"pot": 30, "tableCards": [decode_card(12, True)], "equity": {"alice": 0.25, "bob": 0.75}},
+        "players": [{"name": "alice", "position": 0, "cards": [{"value": None, "suit": None}], "chips": 990}],
+    }
+    packed = msgpack.unpackb(encode("game_state", state, MSGPACK, seat_of), strict_map_key=False)
+    assert packed[STATE_KEYS["seq"]] == 7
+    table = packed[STATE_KEYS["table"]]
+    assert table[TABLE_KEYS["pot"]] == 30
+    assert table[TABLE_KEYS["tableCards"]] == bytes([12 | REVEALED])
+    assert table[TABLE_KEYS["equity"]] == {0: 0.25, 3: 0.75}
+    player = packed[STATE_KEYS["players"]][0]
+    assert player[PLAYER_KEYS["cards"]] == bytes([FACE_DOWN])
+    assert player[PLAYER_KEYS["chips"]] == 990
+
+def test_game_state_delta():
+    delta = {"seq": 8, "players": {"3": {"chips": 40}}, "removed": ["action"]}
+    packed = msgpack.unpackb(encode("game_state_delta", delta, MSGPACK, seat_of), strict_map_key=False)
+    assert packed == {STATE_KEYS["seq"]: 8, STATE_KEYS["players"]: {3: {PLAYER_KEYS["chips"]: 40}},
+        STATE_KEYS["removed"]: [TABLE_KEYS["action"]]}
+
+def test_declare_winners():
+    payload = {"winners": ["bob"], "pots": [{"amount": 100, "winners": ["bob"]}, {"amount": 51, "winners": ["alice", "bob"]}]}
+    assert msgpack.unpackb(encode("declare_winners", payload, MSGPACK, seat_of)) == [[3], [[100, [3]], [51, [0, 3]]]]
+
+def test_other_events_are_plain_msgpack():
+    payload = {"name": "alice", "time": 15}
+    assert msgpack.unpackb(encode("action_clock", payload, MSGPACK)) == payload
+
+def test_decode():
+    message = {"name": "alice", "bet": 20}
+    assert decode(json.dumps(message)) == message
+    assert decode(msgpack.packb(message)) == message
+    assert decode(bytearray(msgpack.packb(message))) == message
+
+def test_equity():
+    payload = {"phase": 0, "equity": {"alice": {"equity": 40.0}, "bob": {"equity": 60.0}}}
+    assert msgpack.unpackb(encode("equity", payload, MSGPACK, seat_of), strict_map_key=False) == \
+        [0, {0: {"equity": 40.0}, 3: {"equity": 60.0}}]
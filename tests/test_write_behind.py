@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from write_behind import WriteBehindStore
+
+class State:
+    def __init__(self, table_id, hand):
+        self.table_id = table_id
+        self.hand = hand
+
+    def snapshot(self):
+        return {"hand": self.hand}
+
+# fails the first bulk_write calls, then passes them on
+class FlakyCollection:
+    def __init__(self, failures):
+        self.collection = mongomock.MongoClient().pokerdb.tables
+        self.failures = failures
+
+    def bulk_write(self, requests, ordered=True):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database unavailable")
+        return self.collection.bulk_write(requests, ordered=ordered)
+
+def test_failed_write_keeps_newer_snapshots():
+    collection = FlakyCollection(1)
+    store = WriteBehindStore(collection)
+    store.save(State("a", 1))
+    store.save(State("b", 1))
+    with pytest.raises(RuntimeError):
+        store.flush()
+    # a newer snapshot of a is saved before the retry
+    store.save(State("a", 2))
+    store.flush()
+    assert {doc["_id"]: doc["hand"] for doc in collection.collection.find()} == {"a": 2, "b": 1}
+
+def test_thread_survives_a_failed_write(capsys):
+    collection = FlakyCollection(2)
+    store = WriteBehindStore(collection, interval=0.01, retry=0.01)
+    store.start()
+    store.save(State("a", 1))
+    deadline = time.time() + 5
+    while time.time() < deadline and collection.collection.find_one({"_id": "a"}) is None:
+        time.sleep(0.01)
+    assert collection.collection.find_one({"_id": "a"})["hand"] == 1
+    assert store.thread.is_alive()
+    assert "database unavailable" in capsys.readouterr().err
+    store.stopped.set()
+    store.wake.set()